@@ -1,5 +1,5 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from sqlalchemy import func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.ext.asyncio import AsyncAttrs
@@ -9,6 +9,11 @@ class Base(AsyncAttrs, DeclarativeBase):
     pass
 
 
+def utcnow() -> datetime:
+    """Naive UTC, the form timestamp columns are stored in (server_default now() on a UTC server)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 # Base Model for other models.
 class BaseModel(Base):
     __abstract__ = True
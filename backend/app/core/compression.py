@@ -0,0 +1,205 @@
+import gzip
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from compression import zstd  # stdlib since Python 3.14
+except ImportError:  # pragma: no cover - older interpreters
+    zstd = None
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class _ClientDisconnected(Exception):
+    pass
+
+
+def _supported_encodings() -> set[str]:
+    return {"gzip", "zstd"} if zstd is not None else {"gzip"}
+
+
+def _decompress(encoding: str, data: bytes, limit: int) -> bytes:
+    """Decompress at most `limit` bytes; raise _BodyTooLarge past it and ValueError on corrupt input.
+
+    Concatenated gzip members / zstd frames are all decoded, as `gzip -d` and `zstd -d` do; trailing
+    bytes that are not another member are corrupt input.
+    """
+    parts: list[bytes] = []
+    size = 0
+    while True:
+        out, data = _decompress_member(encoding, data, limit - size)
+        parts.append(out)
+        size += len(out)
+        if not data:
+            return b"".join(parts)
+
+
+def _decompress_member(encoding: str, data: bytes, limit: int) -> tuple[bytes, bytes]:
+    """One gzip member or zstd frame: (decoded bytes, the input left after it)."""
+    if encoding == "gzip":
+        decoder = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        try:
+            out = decoder.decompress(data, limit + 1)
+        except zlib.error as exc:
+            raise ValueError(str(exc)) from exc
+        if len(out) > limit or decoder.unconsumed_tail:
+            raise _BodyTooLarge
+        if not decoder.eof:
+            raise ValueError("truncated gzip body")
+        return out, decoder.unused_data
+    decoder = zstd.ZstdDecompressor()
+    try:
+        out = decoder.decompress(data, max_length=limit + 1)
+    except zstd.ZstdError as exc:
+        raise ValueError(str(exc)) from exc
+    if len(out) > limit or not decoder.needs_input and not decoder.eof:
+        raise _BodyTooLarge
+    if not decoder.eof:
+        raise ValueError("truncated zstd body")
+    return out, decoder.unused_data
+
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "zstd":
+        return zstd.compress(data, level=3)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _pick_encoding(accept_encoding: str) -> str | None:
+    accepted: set[str] = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if params.replace(" ", "") in {"q=0", "q=0.0"}:
+            continue
+        accepted.add(name.strip())
+    for encoding in ("zstd", "gzip"):
+        if encoding in accepted and encoding in _supported_encodings():
+            return encoding
+    return None
+
+
+class RequestDecompressionMiddleware:
+    """Decodes gzip/zstd request bodies and enforces raw and decoded body size limits."""
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int, max_decompressed_bytes: int) -> None:
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        self.max_decompressed_bytes = max_decompressed_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        encoding = headers.get("content-encoding", "identity").strip().lower()
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_body_bytes:
+            await JSONResponse({"detail": "Request body too large"}, status_code=413)(scope, receive, send)
+            return
+        if encoding in {"", "identity"} and content_length.isdigit():
+            await self.app(scope, receive, send)
+            return
+        if encoding not in {"", "identity"} and encoding not in _supported_encodings():
+            unsupported = JSONResponse({"detail": f"Unsupported Content-Encoding: {encoding}"}, status_code=415)
+            await unsupported(scope, receive, send)
+            return
+
+        try:
+            body = await self._read_body(receive)
+            if encoding not in {"", "identity"}:
+                body = _decompress(encoding, body, self.max_decompressed_bytes)
+        except _ClientDisconnected:
+            # Nobody to answer, and a partial body must not reach the app.
+            return
+        except _BodyTooLarge:
+            await JSONResponse({"detail": "Request body too large"}, status_code=413)(scope, receive, send)
+            return
+        except ValueError:
+            await JSONResponse({"detail": "Malformed compressed body"}, status_code=400)(scope, receive, send)
+            return
+
+        scope = dict(scope)
+        mutable = MutableHeaders(scope=scope)
+        if "content-encoding" in mutable:
+            del mutable["content-encoding"]
+        mutable["content-length"] = str(len(body))
+        await self.app(scope, _replay(body, receive), send)
+
+    async def _read_body(self, receive: Receive) -> bytes:
+        chunks: list[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise _ClientDisconnected
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                raise _BodyTooLarge
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+
+def _replay(body: bytes, receive: Receive) -> Receive:
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if sent:
+            # After the body, delegate so disconnect detection keeps working.
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+
+class ResponseCompressionMiddleware:
+    """Compresses complete responses with zstd (preferred) or gzip. Streaming responses pass through."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _pick_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough or start is None:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if message.get("more_body", False) or "content-encoding" in headers or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            compressed = _compress(encoding, body)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
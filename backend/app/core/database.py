@@ -1,4 +1,8 @@
+import asyncio
+from functools import cache
+
 from sqlalchemy.engine.url import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from sqlalchemy.ext.asyncio.engine import create_async_engine
 from sqlalchemy.ext.asyncio.session import async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
@@ -13,9 +17,30 @@ DATABASE_URL = URL.create(
     database=s.postgres_db,
 )
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Bound to the engine on first use, so importing the app does not load the driver or build a pool.
+async_session_maker = async_sessionmaker(expire_on_commit=False)
+
+
+@cache
+def get_engine() -> AsyncEngine:
+    engine = create_async_engine(DATABASE_URL, echo=True, pool_size=s.database_pool_size)
+    async_session_maker.configure(bind=engine)
+    return engine
+
+
+def new_session() -> AsyncSession:
+    get_engine()
+    return async_session_maker()
+
 
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+async def warm_up_pool(connections: int) -> None:
+    """Open `connections` pooled connections concurrently and return them, so early requests skip the handshake."""
+    engine = get_engine()
+    opened = await asyncio.gather(*(engine.connect().start() for _ in range(connections)), return_exceptions=True)
+    await asyncio.gather(*(conn.close() for conn in opened if not isinstance(conn, BaseException)))
+    for result in opened:
+        if isinstance(result, BaseException):
+            raise result
 
 
 class Base(DeclarativeBase):
@@ -23,5 +48,5 @@ class Base(DeclarativeBase):
 
 
 async def get_db():
-    async with async_session_maker() as session:
+    async with new_session() as session:
         yield session
@@ -0,0 +1,36 @@
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from app.core.profiling import profile_stage
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            body = await self.body()
+            with profile_stage("parse_json"):
+                self._json = orjson.loads(body)
+        return self._json
+
+
+# Route class that decodes JSON request bodies with orjson instead of the stdlib json module.
+class ORJSONRoute(APIRoute):
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            # "route" covers body parsing, Pydantic validation, dependencies, the endpoint and serialization.
+            with profile_stage("route"):
+                return await handler(ORJSONRequest(request.scope, request.receive))
+
+        return route_handler
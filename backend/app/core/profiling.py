@@ -0,0 +1,177 @@
+import asyncio
+import hmac
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.settings import s
+
+PROFILE_TOKEN_HEADER = "x-profile-token"
+PROFILE_ID_HEADER = "x-profile-id"
+MAX_STACK_DEPTH = 64
+TOP_STACKS = 200
+
+_PROFILE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class RequestProfile:
+    """Wall-clock stage totals plus stack samples of the event loop thread for one request."""
+
+    def __init__(self) -> None:
+        self.id = uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.stages: dict[str, list[float]] = {}
+        self.samples: Counter[str] = Counter()
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        entry = self.stages.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def report(self, scope: Scope, status_code: int | None, interval: float) -> dict[str, Any]:
+        total = time.perf_counter() - self.started
+        return {
+            "id": self.id,
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "status_code": status_code,
+            "total_ms": round(total * 1000, 3),
+            # Stages may nest (route contains auth, validate, ...) and overlap under concurrency.
+            "stages": {
+                name: {"count": count, "total_ms": round(seconds * 1000, 3)}
+                for name, (count, seconds) in sorted(self.stages.items(), key=lambda item: -item[1][1])
+            },
+            "sample_interval_ms": interval * 1000,
+            "samples": sum(self.samples.values()),
+            # Collapsed stacks (outermost first), the input format of most flame graph tools.
+            "stacks": [{"stack": stack, "count": count} for stack, count in self.samples.most_common(TOP_STACKS)],
+        }
+
+
+current_profile: ContextVar[RequestProfile | None] = ContextVar("current_profile", default=None)
+
+
+class profile_stage:
+    """Adds the wall-clock time of the block to the current request profile; a no-op when not profiling."""
+
+    __slots__ = ("name", "profile", "started")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.profile = current_profile.get()
+        if self.profile is not None:
+            self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self.profile is not None:
+            self.profile.add_stage(self.name, time.perf_counter() - self.started)
+
+
+def _collapse(frame: Any) -> str:
+    names: list[str] = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _Sampler(threading.Thread):
+    """Samples the stack of one thread at a fixed interval.
+
+    The event loop thread is shared, so concurrent requests show up in the samples as well.
+    """
+
+    def __init__(self, thread_id: int, interval: float, profile: RequestProfile) -> None:
+        super().__init__(daemon=True, name="request-profiler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.profile = profile
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.profile.samples[_collapse(frame)] += 1
+
+
+class ProfileStore:
+    """Profiles as JSON files in a local directory; the oldest are removed past `max_count`."""
+
+    def __init__(self, directory: str, max_count: int) -> None:
+        self.directory = Path(directory)
+        self.max_count = max_count
+
+    def save(self, report: dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{report['id']}.json").write_text(json.dumps(report, ensure_ascii=False))
+        files = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for stale in files[: max(0, len(files) - self.max_count)]:
+            stale.unlink(missing_ok=True)
+
+    def load(self, profile_id: str) -> dict[str, Any] | None:
+        if not _PROFILE_ID_RE.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.json"
+        if not path.is_file():
+            return None
+        return json.loads(path.read_text())
+
+
+profile_store = ProfileStore(directory=s.profiles_dir, max_count=s.profiles_max_count)
+
+
+class ProfilingMiddleware:
+    """Profiles a request when it carries the configured X-Profile-Token; other requests pass straight through."""
+
+    def __init__(self, app: ASGIApp, token: str, store: ProfileStore, sample_interval: float) -> None:
+        self.app = app
+        self.token = token.encode()
+        self.store = store
+        self.sample_interval = sample_interval
+
+    def _requested(self, scope: Scope) -> bool:
+        if not self.token or scope["type"] != "http":
+            return False
+        supplied = Headers(scope=scope).get(PROFILE_TOKEN_HEADER)
+        return supplied is not None and hmac.compare_digest(supplied.encode(), self.token)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        status_code: int | None = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(raw=message["headers"])[PROFILE_ID_HEADER] = profile.id
+            await send(message)
+
+        sampler = _Sampler(threading.get_ident(), self.sample_interval, profile)
+        token = current_profile.set(profile)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stopped.set()
+            sampler.join()
+            current_profile.reset(token)
+            report = profile.report(scope, status_code, self.sample_interval)
+            await asyncio.to_thread(self.store.save, report)
@@ -1,28 +1,41 @@
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from functools import cache
+from typing import TYPE_CHECKING, Any, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 
 from app.core.settings import s
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
 
 ALGORITHM = "HS256"
 security_scheme = HTTPBearer(auto_error=True)
 
 
+# passlib/argon2 are only needed for email login; load them on first use.
+@cache
+def get_pwd_context() -> "CryptContext":
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["argon2"], deprecated="auto")
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -34,18 +47,117 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def _invalid_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired token",
+    )
+
+
 def decode_access_token(token: str) -> dict[str, Any]:
+    """Full verification: signature and claims on every call. Request handlers use verify_access_token."""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, s.jwt_secret_key, algorithms=[ALGORITHM])
         return payload
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-        )
+        raise _invalid_token()
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RevocationList:
+    """Revoked token digests and inactive user ids, checked in memory on every request.
+
+    A logout revokes its token at once in this process; the Postgres copy reaches other replicas when
+    they reload (see app/modules/auth/services/revocations.py). Inactive users come only from that
+    reload, so deactivating a user takes effect within jwt_revocation_refresh_seconds.
+    """
+
+    def __init__(self) -> None:
+        self.digests: set[str] = set()
+        self.user_ids: set[str] = set()
+        # Revoked here but not yet seen in a reload; kept across replace() so a reload that raced the
+        # database write does not drop them.
+        self._local_digests: set[str] = set()
+
+    def revoke_token(self, digest: str) -> None:
+        self.digests.add(digest)
+        self._local_digests.add(digest)
+        verified_tokens.discard(digest)
+
+    def replace(self, digests: set[str], user_ids: set[str]) -> None:
+        self._local_digests -= digests
+        self.digests = digests | self._local_digests
+        self.user_ids = user_ids
+
+    def is_revoked(self, digest: str, payload: dict[str, Any]) -> bool:
+        return digest in self.digests or str(payload.get("id")) in self.user_ids
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of already verified JWTs: token digest -> (payload, exp).
+
+    A hit skips the HMAC check and claim parsing; entries are dropped once exp passes, so the cache
+    never extends a token's lifetime. Tokens without exp are not cached.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: str) -> dict[str, Any] | None:
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, exp = entry
+        if exp <= time.time():
+            del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return payload
+
+    def put(self, digest: str, payload: dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        if not isinstance(exp, int | float) or self.max_entries <= 0:
+            return
+        self._entries[digest] = (payload, float(exp))
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, digest: str) -> None:
+        self._entries.pop(digest, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+verified_tokens = VerifiedTokenCache(max_entries=s.jwt_cache_max_entries)
+revocations = RevocationList()
+
+
+def verify_access_token(token: str) -> dict[str, Any]:
+    """Shared fast path for JWT auth: revocation check, then the verified cache, then full decode."""
+    digest = token_digest(token)
+    payload = verified_tokens.get(digest)
+    if payload is None:
+        payload = decode_access_token(token)
+        verified_tokens.put(digest, payload)
+    if revocations.is_revoked(digest, payload):
+        raise _invalid_token()
+    return payload
 
 
 def get_current_user_payload(
     credentials: HTTPAuthorizationCredentials = Depends(security_scheme),
 ) -> dict[str, Any]:
-    return decode_access_token(credentials.credentials)
+    return verify_access_token(credentials.credentials)
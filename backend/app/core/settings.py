@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,9 +15,123 @@ class Settings(BaseSettings):
     postgres_port: int = 5432
 
     jwt_secret_key: str = "SECRET_KEY"
+    # Verified-JWT cache (sha256 of the token -> payload, kept until exp) and the revocation list
+    # (logged-out tokens, inactive users) reloaded from Postgres every jwt_revocation_refresh_seconds.
+    # A logout is immediate on the replica serving it; a user deactivation waits for the next reload.
+    jwt_cache_max_entries: int = 10_000
+    jwt_revocation_refresh_seconds: float = 30.0
+
+    database_pool_size: int = 5
+    # Startup warm-up: pre-open DB connections, create the Gemini client, compile validator patterns.
+    warmup_enabled: bool = True
+    warmup_db_connections: int = 2
+    # Emails allowed to use admin-only endpoints (analytics).
+    admin_emails: list[str] = []
+
+    # Generation rate limits per user and per CLI token: token bucket (per minute, burst) plus a daily quota.
+    # Daily counts are flushed to Postgres every rate_limit_flush_interval_seconds.
+    rate_limit_enabled: bool = True
+    rate_limit_per_minute: float = 20.0
+    rate_limit_burst: int = 10
+    daily_quota_per_user: int = 1000
+    daily_quota_per_token: int = 500
+    rate_limit_flush_interval_seconds: float = 10.0
+    # CLI tokens: last_used_at is buffered in memory and written in one batch every flush interval.
+    # Listing is keyset-paginated (X-Next-Cursor header) once a client sends limit or cursor; a request
+    # with neither gets every token, as before pagination. Page size with a cursor only, and the maximum.
+    cli_token_usage_flush_interval_seconds: float = 30.0
+    cli_tokens_page_size: int = 50
+    cli_tokens_page_max: int = 200
+
+    # Per-request profiling: requests carrying X-Profile-Token equal to this value are profiled.
+    # Empty disables profiling entirely.
+    profiling_token: str = ""
+    profiles_dir: str = "profiles"
+    profiles_max_count: int = 200
+    profile_sample_interval_ms: float = 5.0
+
+    # Request/response body limits and compression (gzip, zstd).
+    max_request_body_bytes: int = 8 * 1024 * 1024
+    max_decompressed_body_bytes: int = 32 * 1024 * 1024
+    response_compression_min_size: int = 1024
 
     gemini_api_key: str = "GEMINI_API_KEY"
 
+    # Model tiers: "fast" handles planning and the first files attempt,
+    # "strong" is used once validation still fails after a local fix.
+    gemini_fast_model: str = "gemini-2.5-flash"
+    gemini_strong_model: str = "gemini-2.5-pro"
+    gemini_plan_tier: Literal["fast", "strong"] = "fast"
+    gemini_files_tier: Literal["fast", "strong"] = "fast"
+    gemini_repair_tier: Literal["fast", "strong"] = "strong"
+
+    # Upper bound for GenerateRequest.candidates (parallel sampling, opt-in).
+    generate_max_candidates: int = 4
+    # Repair rounds resend only the failing files plus a plan summary instead of the full prompt.
+    generate_compact_repair: bool = True
+    # Replace raw lockfiles in prompts with compact structured summaries.
+    generate_summarize_lockfiles: bool = True
+    # Single-call mode: projects at or below these sizes get plan and files from one model call.
+    generate_fast_mode_enabled: bool = True
+    generate_fast_mode_max_services: int = 1
+    generate_fast_mode_max_manifests: int = 2
+    generate_fast_mode_max_paths: int = 200
+    # Runtime settings filled into plans that leave them out: per-service CPU and memory limits and the
+    # open-files ulimit. Worker counts are derived from the framework and the CPU limit.
+    generate_default_cpus: float = 2.0
+    generate_default_memory: str = "512M"
+    generate_default_nofile: int = 65536
+    # /generate: look up CLI tokens concurrently with preprocessing (context serialization, prompt assembly);
+    # model calls still start only after auth succeeds, and the rate limit is charged once both succeed.
+    # JWTs and malformed tokens are rejected before preprocessing. Off by default because well-formed but
+    # unknown CLI tokens then cost preprocessing CPU (bounded by the body and context limits).
+    generate_overlap_auth: bool = False
+
+    # Per-request memory budget: raw context (UTF-8 bytes of its strings) and the shared prompt prefix, in bytes.
+    # The context, and a lower bound for the prompt, are checked before the context is serialized.
+    generate_max_context_bytes: int = 16 * 1024 * 1024
+    generate_max_prompt_bytes: int = 2 * 1024 * 1024
+    # Stream files responses: each file is checked as it arrives and the response is abandoned on the first
+    # error no later file can fix (output path, Python base image, COPY sources); the rest is validated at the end.
+    generate_stream_files: bool = True
+    # Context cache for the shared prompt prefix of a request: "" (off), "gemini" or "local" (stand-in
+    # that only counts tokens). Prefixes under min_tokens (estimated) are not worth a cache.
+    prompt_cache: str = ""
+    prompt_cache_ttl_seconds: int = 300
+    prompt_cache_min_tokens: int = 1024
+
+    # /generate/batch: max concurrent generations per batch and max items per batch.
+    generate_batch_parallelism: int = 8
+    generate_batch_max_items: int = 500
+    # /validate: max items per request (no model calls, CPU only).
+    validate_max_items: int = 1000
+    # Upper bound for the client-supplied X-Deadline-Ms budget, and the assumed latency of a model call
+    # before any have been measured (another attempt is skipped when less time than that is left).
+    generate_max_deadline_seconds: float = 600.0
+    generate_default_call_seconds: float = 10.0
+
+    # Content-addressed store for delta-encoded ProjectContext uploads.
+    context_store_max_bytes: int = 64 * 1024 * 1024
+
+    # Near-duplicate cache (MinHash/LSH over ProjectContext). Scores are estimated Jaccard similarity:
+    # at plan_threshold the plan is reused, at result_threshold the files are reused after re-validation.
+    similarity_cache_enabled: bool = True
+    similarity_cache_max_entries: int = 2048
+    similarity_plan_threshold: float = 0.8
+    similarity_result_threshold: float = 0.95
+
+    # Generation history: rows are buffered in memory and inserted in batches off the request path.
+    history_enabled: bool = True
+    history_batch_size: int = 100
+    history_flush_interval_seconds: float = 2.0
+    history_max_pending: int = 10_000
+
+    # Tracing: "" (off), "stdout", "file" (JSON lines in tracing_file) or "package.module:ExporterClass".
+    # Traces are exported from a background thread; past tracing_max_pending queued traces new ones are dropped.
+    tracing_exporter: str = ""
+    tracing_file: str = "traces.jsonl"
+    tracing_max_pending: int = 10_000
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
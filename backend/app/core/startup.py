@@ -0,0 +1,31 @@
+import time
+from collections.abc import Awaitable
+from typing import Any
+
+
+class StartupTimings:
+    """Wall-clock duration of each startup phase, reported by GET /health."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+        self.ready = False
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = round(seconds * 1000, 3)
+
+    async def measure(self, name: str, work: Awaitable[Any]) -> None:
+        """Await one warm-up step. Failures are recorded, not raised: a cold path is still a working path."""
+        started = time.perf_counter()
+        try:
+            await work
+        except Exception as exc:
+            self.errors[name] = f"{type(exc).__name__}: {exc}"
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"ready": self.ready, "phases_ms": self.phases, "errors": self.errors}
+
+
+startup_timings = StartupTimings()
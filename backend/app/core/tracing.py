@@ -0,0 +1,238 @@
+import importlib
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Protocol
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.settings import s
+
+logger = logging.getLogger(__name__)
+
+TRACE_ID_HEADER = "x-trace-id"
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "_Trace", name: str, parent_id: str | None, attributes: dict[str, Any]) -> None:
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes = attributes
+        self.error: str | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self, trace_start_ns: int) -> dict[str, Any]:
+        end_ns = self.end_ns or time.time_ns()
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.start_ns - trace_start_ns) / 1e6, 3),
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans", "lock")
+
+    def __init__(self) -> None:
+        self.trace_id = uuid.uuid4().hex
+        self.spans: list[Span] = []
+        self.lock = threading.Lock()
+
+    def to_dict(self) -> dict[str, Any]:
+        root = self.spans[0]
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "start": root.start_ns / 1e9,
+            "duration_ms": round(((root.end_ns or time.time_ns()) - root.start_ns) / 1e6, 3),
+            "spans": sorted((span.to_dict(root.start_ns) for span in self.spans), key=lambda item: item["start_ms"]),
+        }
+
+
+class SpanExporter(Protocol):
+    """Receives one finished trace (root span plus every descendant) as a dict."""
+
+    def export(self, trace: dict[str, Any]) -> None: ...
+
+
+class StdoutSpanExporter:
+    def export(self, trace: dict[str, Any]) -> None:
+        sys.stdout.write(json.dumps(trace, ensure_ascii=False, default=str) + "\n")
+        sys.stdout.flush()
+
+
+class FileSpanExporter:
+    """Appends one JSON line per trace."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace: dict[str, Any]) -> None:
+        line = json.dumps(trace, ensure_ascii=False, default=str) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(line)
+
+
+def build_exporter(name: str, file_path: str) -> SpanExporter | None:
+    """Empty name disables tracing; "stdout" and "file" are built in; "package.module:Class" loads a custom exporter."""
+    if not name:
+        return None
+    if name == "stdout":
+        return StdoutSpanExporter()
+    if name == "file":
+        return FileSpanExporter(file_path)
+    module_name, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "name", "attributes", "span", "token")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        parent = _current_span.get()
+        trace = parent.trace if parent is not None else _Trace()
+        self.span = Span(trace, self.name, parent.span_id if parent is not None else None, self.attributes)
+        with trace.lock:
+            trace.spans.append(self.span)
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, _tb: object) -> None:
+        span = self.span
+        span.end_ns = time.time_ns()
+        if exc is not None:
+            span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self.token)
+        if span.parent_id is None:
+            self.tracer.finish(span.trace)
+
+
+class Tracer:
+    """Finished traces are exported from a background thread: exporters do blocking I/O, and traces
+    finish on the event loop. The queue is bounded; traces that do not fit are dropped and counted."""
+
+    def __init__(self, exporter: SpanExporter | None, max_pending: int = 10_000) -> None:
+        self.exporter = exporter
+        self._queue: queue.Queue[dict[str, Any] | None] = queue.Queue(maxsize=max_pending)
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+        self.exported = 0
+        self.export_errors = 0
+        self.dropped = 0
+
+    def span(self, name: str, **attributes: Any) -> _SpanContext | _NoopSpan:
+        if self.exporter is None:
+            return _NOOP_SPAN
+        return _SpanContext(self, name, attributes)
+
+    def finish(self, trace: _Trace) -> None:
+        with trace.lock:
+            data = trace.to_dict()
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while (data := self._queue.get()) is not None:
+            try:
+                self.exporter.export(data)
+            except Exception:
+                # Tracing must never fail a request; the trace is lost and counted.
+                self.export_errors += 1
+                logger.warning("Trace export failed (%d failures so far)", self.export_errors, exc_info=True)
+            else:
+                self.exported += 1
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Export the traces already queued, then stop the thread. Blocks; call it off the event loop."""
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("Trace exporter did not drain in time; %d traces lost", self._queue.qsize())
+            return
+        thread.join(timeout)
+
+
+tracer = Tracer(build_exporter(s.tracing_exporter, s.tracing_file), max_pending=s.tracing_max_pending)
+
+
+def span(name: str, **attributes: Any) -> _SpanContext | _NoopSpan:
+    """Open a child of the current span (or a new trace). A no-op when no exporter is configured."""
+    return tracer.span(name, **attributes)
+
+
+class TracingMiddleware:
+    """Root span per HTTP request; the trace id is returned in X-Trace-Id."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or tracer.exporter is None:
+            await self.app(scope, receive, send)
+            return
+        with span("http.request", method=scope.get("method"), path=scope.get("path")) as root:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    root.set_attribute("status_code", message["status"])
+                    MutableHeaders(raw=message["headers"])[TRACE_ID_HEADER] = root.trace.trace_id
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
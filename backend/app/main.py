@@ -1,20 +1,97 @@
-import uvicorn
+import time
+
+# Taken before the other imports so the "imports" startup phase covers them.
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi.applications import FastAPI
 
+from app.core.compression import RequestDecompressionMiddleware, ResponseCompressionMiddleware
+from app.core.database import warm_up_pool
 from app.core.exeptions import setup_exeption_handler
+from app.core.profiling import ProfilingMiddleware, profile_store
+from app.core.settings import s
+from app.core.startup import startup_timings
+from app.core.tracing import TracingMiddleware, tracer
+from app.modules.analytics.history import writer as history_writer
+from app.modules.analytics.router import router as analytics_router
 from app.modules.auth.router import router as auth_router
+from app.modules.auth.services.rate_limits import rate_limiter
+from app.modules.auth.services.revocations import revocation_sync
+from app.modules.auth.services.token_usage import token_usage
 from app.modules.generate.router import router as generate_router
+from app.modules.generate.service import warm_up_client, warm_up_validators
+
+startup_timings.record("imports", time.perf_counter() - _IMPORT_STARTED)
+
+
+def _import_jwt() -> None:
+    import jose.jwt  # noqa: F401
+
+
+async def _warm_up() -> None:
+    # Independent steps run concurrently; each records its own phase timing.
+    await asyncio.gather(
+        startup_timings.measure("db_pool", warm_up_pool(s.warmup_db_connections)),
+        startup_timings.measure("gemini_client", asyncio.to_thread(warm_up_client)),
+        startup_timings.measure("validators", asyncio.to_thread(warm_up_validators)),
+        startup_timings.measure("jwt", asyncio.to_thread(_import_jwt)),
+    )
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    if s.warmup_enabled:
+        await startup_timings.measure("warm_up", _warm_up())
+    history_writer.start()
+    rate_limiter.start()
+    token_usage.start()
+    revocation_sync.start()
+    startup_timings.ready = True
+    try:
+        yield
+    finally:
+        await revocation_sync.stop()
+        await token_usage.stop()
+        await rate_limiter.stop()
+        await history_writer.stop()
+        await asyncio.to_thread(tracer.shutdown)
 
 
 def main() -> FastAPI:
-    app = FastAPI()
+    started = time.perf_counter()
+    app = FastAPI(lifespan=lifespan)
     setup_exeption_handler(app)
+    app.add_middleware(ResponseCompressionMiddleware, minimum_size=s.response_compression_min_size)
+    app.add_middleware(
+        RequestDecompressionMiddleware,
+        max_body_bytes=s.max_request_body_bytes,
+        max_decompressed_bytes=s.max_decompressed_body_bytes,
+    )
+    app.add_middleware(TracingMiddleware)
+    # Outermost, so the profile covers decompression and auth as well.
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=s.profiling_token,
+        store=profile_store,
+        sample_interval=s.profile_sample_interval_ms / 1000,
+    )
 
     app.include_router(auth_router)
     app.include_router(generate_router)
+    app.include_router(analytics_router)
+
+    @app.get("/health", tags=["Health"], summary="Readiness and startup phase timings")
+    async def health():
+        return {"status": "ok", "startup": startup_timings.to_dict()}
 
+    startup_timings.record("create_app", time.perf_counter() - started)
     return app
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run("app.main:main", factory=True, reload=True)
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any
+
+from sqlalchemy import insert
+
+from app.core.database import new_session
+from app.core.settings import s
+from app.modules.analytics.models import Generation
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """Buffers generation rows in memory and inserts them in batches from a background task."""
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: deque[dict[str, Any]] = deque(maxlen=max_pending)
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+    def add(self, row: dict[str, Any]) -> None:
+        if len(self._pending) == self._pending.maxlen:
+            # Losing the oldest analytics row beats blocking or growing without bound.
+            self.dropped += 1
+        self._pending.append(row)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            try:
+                async with new_session() as session:
+                    await session.execute(insert(Generation), batch)
+                    await session.commit()
+            except Exception:
+                self.write_errors += 1
+                self.dropped += len(batch)
+                logger.exception("Failed to write %d generation records", len(batch))
+                return
+            self.written += len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+writer = HistoryWriter(
+    batch_size=s.history_batch_size,
+    flush_interval=s.history_flush_interval_seconds,
+    max_pending=s.history_max_pending,
+)
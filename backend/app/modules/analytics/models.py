@@ -0,0 +1,33 @@
+import uuid
+from typing import Any
+
+from sqlalchemy import Float, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.base_model import BaseModel
+
+
+class Generation(BaseModel):
+    """One /generate or /generate/incremental request: what it cost and how it ended."""
+
+    __tablename__ = "generations"
+    __table_args__ = (
+        Index("ix_generations_created_at", "created_at"),
+        Index("ix_generations_user_id_created_at", "user_id", "created_at"),
+    )
+
+    user_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+    endpoint: Mapped[str] = mapped_column(String, nullable=False)
+    request_hash: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    stack: Mapped[str | None] = mapped_column(String, nullable=True)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=False)
+    cache: Mapped[str | None] = mapped_column(String, nullable=True)
+    total_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    stage_ms: Mapped[dict[str, float]] = mapped_column(JSONB, nullable=False, default=dict)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    model_calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    prompt_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    validation_errors: Mapped[list[str]] = mapped_column(JSONB, nullable=False, default=list)
+    output_hashes: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False, default=dict)
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.json_codec import ORJSONResponse, ORJSONRoute
+from app.core.profiling import profile_store
+from app.modules.analytics.schemas import LatencyReport
+from app.modules.analytics.service import latency_report
+from app.modules.auth.dependencies import get_admin_user
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"],
+    default_response_class=ORJSONResponse,
+    route_class=ORJSONRoute,
+)
+
+
+@router.get("/latency/stacks", response_model=LatencyReport, summary="Generation latency by stack")
+async def latency_by_stack(
+    days: int = Query(default=7, ge=1, le=365),
+    limit: int = Query(default=50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    _admin: dict = Depends(get_admin_user),
+):
+    return await latency_report("stack", days, limit, db)
+
+
+@router.get("/latency/users", response_model=LatencyReport, summary="Generation latency by user")
+async def latency_by_user(
+    days: int = Query(default=7, ge=1, le=365),
+    limit: int = Query(default=50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    _admin: dict = Depends(get_admin_user),
+):
+    return await latency_report("user", days, limit, db)
+
+
+@router.get("/profiles/{profile_id}", summary="Stored request profile (see X-Profile-Token)")
+async def get_profile(profile_id: str, _admin: dict = Depends(get_admin_user)):
+    profile = profile_store.load(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found",
+        )
+    return profile
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+class LatencyGroup(BaseModel):
+    key: str | None
+    requests: int
+    p50_ms: float
+    p95_ms: float
+    avg_attempts: float
+    repair_rate: float
+    error_rate: float
+    cache_hit_rate: float
+    prompt_tokens: int
+    output_tokens: int
+
+
+class LatencyReport(BaseModel):
+    days: int
+    groups: list[LatencyGroup]
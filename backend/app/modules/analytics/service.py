@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from sqlalchemy import Float, String, case, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.base_model import utcnow
+from app.modules.analytics.models import Generation
+from app.modules.analytics.schemas import LatencyGroup, LatencyReport
+
+
+def _rate(condition) -> object:
+    return func.avg(case((condition, 1.0), else_=0.0))
+
+
+async def latency_report(group_by: str, days: int, limit: int, db: AsyncSession) -> LatencyReport:
+    """p50/p95 latency, repair/error/cache rates and token totals per stack or per user."""
+    key = Generation.stack if group_by == "stack" else cast(Generation.user_id, String)
+    p95 = func.percentile_cont(0.95).within_group(Generation.total_ms)
+    since = utcnow() - timedelta(days=days)
+    stmt = (
+        select(
+            key.label("key"),
+            func.count().label("requests"),
+            func.percentile_cont(0.5).within_group(Generation.total_ms).label("p50_ms"),
+            p95.label("p95_ms"),
+            cast(func.avg(Generation.attempts), Float).label("avg_attempts"),
+            _rate(Generation.attempts > 1).label("repair_rate"),
+            _rate(Generation.status_code >= 400).label("error_rate"),
+            _rate(Generation.cache.is_not(None)).label("cache_hit_rate"),
+            func.coalesce(func.sum(Generation.prompt_tokens), 0).label("prompt_tokens"),
+            func.coalesce(func.sum(Generation.output_tokens), 0).label("output_tokens"),
+        )
+        .where(Generation.created_at >= since)
+        .group_by(key)
+        .order_by(p95.desc())
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    groups = [
+        LatencyGroup(
+            key=row.key,
+            requests=row.requests,
+            p50_ms=round(row.p50_ms or 0.0, 3),
+            p95_ms=round(row.p95_ms or 0.0, 3),
+            avg_attempts=round(row.avg_attempts or 0.0, 3),
+            repair_rate=round(float(row.repair_rate or 0.0), 4),
+            error_rate=round(float(row.error_rate or 0.0), 4),
+            cache_hit_rate=round(float(row.cache_hit_rate or 0.0), 4),
+            prompt_tokens=row.prompt_tokens,
+            output_tokens=row.output_tokens,
+        )
+        for row in result
+    ]
+    return LatencyReport(days=days, groups=groups)
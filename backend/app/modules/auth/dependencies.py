@@ -1,38 +1,110 @@
 """Зависимости для auth: приём и JWT, и CLI-токена в Bearer."""
 
+import asyncio
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.core.security import decode_access_token
+from app.core.profiling import profile_stage
+from app.core.security import revocations, verify_access_token
+from app.core.settings import s
+from app.core.tracing import span
 from app.modules.auth.services import cli_tokens as cli_tokens_service
+from app.modules.auth.services.rate_limits import rate_limiter
 
 security_scheme = HTTPBearer(auto_error=True)
 
 
+def user_key(user: dict) -> str:
+    """Ключ пользователя для данных, которые нельзя смешивать между пользователями (кэши, хранилища)."""
+    return str(user.get("id") or user.get("sub"))
+
+
 async def get_current_user_from_bearer(
     credentials: HTTPAuthorizationCredentials = Depends(security_scheme),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
     """
     Принимает Bearer: либо JWT (сайт), либо CLI-токен (wt_...).
-    Возвращает {"id": str(user_id), "sub": email}.
+    Возвращает {"id": str(user_id), "sub": email} (+ "token_id" для CLI-токена).
     """
     token = credentials.credentials
+    with profile_stage("auth"), span("auth", kind="cli_token" if token.startswith("wt_") else "jwt"):
+        return await _resolve_bearer(token, db)
+
+
+async def _resolve_bearer(token: str, db: AsyncSession) -> dict:
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Missing token",
         )
     if token.startswith("wt_"):
-        user = await cli_tokens_service.verify_cli_token(token, db)
-        if not user:
+        resolved = cli_tokens_service.is_well_formed(token) and await cli_tokens_service.resolve_cli_token(token, db)
+        if not resolved:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or expired CLI token",
             )
-        return {"id": str(user.id), "sub": user.email}
+        user, cli_token = resolved
+        if not user.is_active or str(user.id) in revocations.user_ids:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User is inactive",
+            )
+        return {"id": str(user.id), "sub": user.email, "token_id": str(cli_token.id)}
     # JWT
-    payload = decode_access_token(token)
+    payload = verify_access_token(token)
     return {"id": payload.get("id"), "sub": payload.get("sub")}
+
+
+async def get_admin_user(user: dict = Depends(get_current_user_from_bearer)) -> dict:
+    """Тот же Bearer, но только для адресов из ADMIN_EMAILS."""
+    if user.get("sub") not in s.admin_emails:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return user
+
+
+async def get_rate_limited_user(
+    user: dict = Depends(get_current_user_from_bearer),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """Bearer + лимиты на генерацию (token bucket и дневная квота); при превышении 429."""
+    await rate_limiter.acquire(user, db)
+    return user
+
+
+async def _rate_limited_user(credentials: HTTPAuthorizationCredentials, db: AsyncSession) -> dict:
+    user = await get_current_user_from_bearer(credentials, db)
+    await rate_limiter.acquire(user, db)
+    return user
+
+
+async def start_rate_limited_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> asyncio.Future[dict]:
+    """
+    Как get_rate_limited_user, но возвращает задачу проверки, а не пользователя.
+    Без GENERATE_OVERLAP_AUTH задача уже завершена: токен проверен и генерация списана (401/429 здесь же).
+    С ним задача только проверяет токен, а лимиты хендлер списывает после успешной подготовки запроса,
+    так что отклонённые запросы квоту не тратят. JWT проверяется сразу (подпись, из кэша), CLI-токен
+    неверного формата отклоняется сразу: подготовку получают только прошедшие дешёвую проверку.
+    Хендлер обязан дождаться задачи до первого обращения к LLM.
+    """
+    if not s.generate_overlap_auth:
+        auth = asyncio.ensure_future(_rate_limited_user(credentials, db))
+        await auth
+        return auth
+    token = credentials.credentials
+    if token.startswith("wt_") and cli_tokens_service.is_well_formed(token):
+        # Поиск в БД — медленная часть, её и перекрываем подготовкой.
+        return asyncio.ensure_future(get_current_user_from_bearer(credentials, db))
+    auth = asyncio.ensure_future(get_current_user_from_bearer(credentials, db))
+    await auth
+    return auth
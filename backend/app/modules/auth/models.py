@@ -1,6 +1,7 @@
 import uuid
+from datetime import date, datetime
 
-from sqlalchemy import Boolean, ForeignKey, String
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.base_model import BaseModel
@@ -19,7 +20,30 @@ class CLIToken(BaseModel):
     """Постоянный токен только для CLI (не JWT)."""
 
     __tablename__ = "cli_tokens"
+    __table_args__ = (Index("ix_cli_tokens_user_id_created_at", "user_id", "created_at"),)
 
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
     token_hash: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
     name: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Пишется пачками из памяти (см. services/token_usage.py), может отставать на интервал сброса.
+    last_used_at: Mapped[datetime | None] = mapped_column(nullable=True)
+
+
+class UsageCounter(BaseModel):
+    """Дневной счётчик генераций по ключу лимита ("user:<id>" или "token:<id>")."""
+
+    __tablename__ = "usage_counters"
+    __table_args__ = (UniqueConstraint("key", "day", name="uq_usage_counters_key_day"),)
+
+    key: Mapped[str] = mapped_column(String, nullable=False)
+    day: Mapped[date] = mapped_column(nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class RevokedToken(BaseModel):
+    """Отозванный JWT (logout): sha256 токена, хранится до его exp."""
+
+    __tablename__ = "revoked_tokens"
+
+    token_digest: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(nullable=False, index=True)
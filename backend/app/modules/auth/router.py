@@ -1,10 +1,13 @@
 import uuid
 
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.core.security import get_current_user_payload
+from app.core.json_codec import ORJSONResponse, ORJSONRoute
+from app.core.security import get_current_user_payload, security_scheme, verify_access_token
+from app.core.settings import s
 from app.modules.auth.schemas import (
     CLITokenCreateResponse,
     CLITokenListItem,
@@ -16,8 +19,9 @@ from app.modules.auth.schemas import (
 )
 from app.modules.auth.services import cli_tokens as cli_tokens_service
 from app.modules.auth.services import email_auth
+from app.modules.auth.services import revocations as revocations_service
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], default_response_class=ORJSONResponse, route_class=ORJSONRoute)
 
 
 @router.post("/register", summary="Register new user")
@@ -30,6 +34,16 @@ async def login(dto: EmailAuthDTO, db: AsyncSession = Depends(get_db)):
     return await email_auth.auth(dto, db)
 
 
+@router.post("/logout", summary="Revoke the current JWT (Bearer)")
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme),
+    db: AsyncSession = Depends(get_db),
+):
+    payload = verify_access_token(credentials.credentials)
+    await revocations_service.revoke_token(credentials.credentials, payload, db)
+    return {"message": "Logged out"}
+
+
 @router.get("/verify", summary="Verify JWT (Bearer)")
 async def verify_jwt(payload: dict = Depends(get_current_user_payload)):
     return {"user_id": payload.get("id"), "email": payload.get("sub")}
@@ -69,12 +83,19 @@ async def verify_cli_token(
 
 @router.get("/cli-tokens", response_model=list[CLITokenListItem], summary="List user CLI tokens")
 async def list_cli_tokens(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=s.cli_tokens_page_max),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
     payload: dict = Depends(get_current_user_payload),
     db: AsyncSession = Depends(get_db),
 ):
     user_id = uuid.UUID(payload["id"])
-    tokens = await cli_tokens_service.list_cli_tokens(user_id, db)
+    if limit is None and cursor is not None:
+        limit = s.cli_tokens_page_size
+    tokens, next_cursor = await cli_tokens_service.list_cli_tokens(user_id, db, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [
-        CLITokenListItem(id=t.id, name=t.name, created_at=t.created_at)
+        CLITokenListItem(id=t.id, name=t.name, created_at=t.created_at, last_used_at=t.last_used_at)
         for t in tokens
     ]
@@ -40,3 +40,4 @@ class CLITokenListItem(BaseModel):
     id: UUID
     name: str | None
     created_at: datetime
+    last_used_at: datetime | None = None
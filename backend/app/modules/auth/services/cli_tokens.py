@@ -1,12 +1,25 @@
+import base64
 import hashlib
+import re
 import secrets
 import uuid
+from datetime import datetime
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import insert, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.auth.models import CLIToken, User
+from app.modules.auth.services.token_usage import token_usage
+
+
+# wt_ + secrets.token_urlsafe(32).
+_TOKEN_RE = re.compile(r"wt_[A-Za-z0-9_-]{43}")
+
+
+def is_well_formed(token: str) -> bool:
+    """Формат CLI-токена, без обращения к БД."""
+    return _TOKEN_RE.fullmatch(token.strip()) is not None
 
 
 def _hash_token(token: str) -> str:
@@ -21,15 +34,21 @@ async def create_cli_token(
     """Создаёт CLI-токен, сохраняет хэш в БД, возвращает (plain_token, record)."""
     plain = f"wt_{secrets.token_urlsafe(32)}"
     token_hash = _hash_token(plain)
-    record = CLIToken(user_id=user_id, token_hash=token_hash, name=name)
-    db.add(record)
+    # RETURNING отдаёт created_at (server_default) в том же запросе, без db.refresh.
+    stmt = insert(CLIToken).values(user_id=user_id, token_hash=token_hash, name=name).returning(CLIToken)
+    record = (await db.execute(stmt)).scalar_one()
     await db.commit()
-    await db.refresh(record)
     return plain, record
 
 
 async def verify_cli_token(token: str, db: AsyncSession) -> User | None:
     """Проверяет токен по телу запроса. Возвращает User или None."""
+    resolved = await resolve_cli_token(token, db)
+    return resolved[0] if resolved else None
+
+
+async def resolve_cli_token(token: str, db: AsyncSession) -> tuple[User, CLIToken] | None:
+    """Как verify_cli_token, но вместе с записью токена (нужна для лимитов по токену)."""
     if not token or not token.strip():
         return None
     token_hash = _hash_token(token.strip())
@@ -40,11 +59,47 @@ async def verify_cli_token(token: str, db: AsyncSession) -> User | None:
         return None
     stmt = select(User).where(User.id == cli_token.user_id)
     result = await db.execute(stmt)
-    return result.scalar_one_or_none()
+    user = result.scalar_one_or_none()
+    if not user:
+        return None
+    token_usage.touch(cli_token.id)
+    return user, cli_token
 
 
-async def list_cli_tokens(user_id: uuid.UUID, db: AsyncSession) -> list[CLIToken]:
-    """Список CLI-токенов пользователя (без самого токена)."""
-    stmt = select(CLIToken).where(CLIToken.user_id == user_id).order_by(CLIToken.created_at.desc())
+def encode_cursor(record: CLIToken) -> str:
+    raw = f"{record.created_at.isoformat()}|{record.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, token_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(token_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+async def list_cli_tokens(
+    user_id: uuid.UUID,
+    db: AsyncSession,
+    limit: int | None,
+    cursor: str | None = None,
+) -> tuple[list[CLIToken], str | None]:
+    """Страница CLI-токенов пользователя (без самого токена), новые первыми.
+
+    Keyset-пагинация по (created_at, id) на индексе (user_id, created_at): cursor — значение последней
+    строки предыдущей страницы, а не OFFSET. Возвращает (токены, cursor следующей страницы или None).
+    limit=None — все токены одним списком, как до пагинации: так отвечают клиентам без limit и cursor.
+    """
+    stmt = select(CLIToken).where(CLIToken.user_id == user_id)
+    if cursor:
+        stmt = stmt.where(tuple_(CLIToken.created_at, CLIToken.id) < tuple_(*decode_cursor(cursor)))
+    stmt = stmt.order_by(CLIToken.created_at.desc(), CLIToken.id.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
     result = await db.execute(stmt)
-    return list(result.scalars().all())
+    tokens = list(result.scalars().all())
+    if limit is None or len(tokens) <= limit:
+        return tokens, None
+    return tokens[:limit], encode_cursor(tokens[limit - 1])
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import math
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import new_session
+from app.core.settings import s
+from app.modules.auth.models import UsageCounter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _Bucket:
+    tokens: float
+    updated: float
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _seconds_until_tomorrow() -> int:
+    now = datetime.now(timezone.utc)
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    return max(1, math.ceil((tomorrow - now).total_seconds()))
+
+
+def _too_many(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class RateLimiter:
+    """Token bucket per minute plus a daily quota, per user and per CLI token.
+
+    Checks never touch the database except for the first time a key is seen on a given day. Daily counts
+    are flushed to usage_counters in batches and re-read, so restarts and other replicas converge.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, _Bucket] = {}
+        self._persisted: dict[tuple[str, date], int] = {}
+        self._pending: dict[tuple[str, date], int] = {}
+        self._inflight: dict[tuple[str, date], int] = {}
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def limits_for(user: dict) -> list[tuple[str, int]]:
+        limits = [(f"user:{user.get('id') or user.get('sub')}", s.daily_quota_per_user)]
+        if user.get("token_id"):
+            limits.append((f"token:{user['token_id']}", s.daily_quota_per_token))
+        return limits
+
+    def _used(self, counter: tuple[str, date]) -> int:
+        return self._persisted.get(counter, 0) + self._inflight.get(counter, 0) + self._pending.get(counter, 0)
+
+    async def _ensure_loaded(self, keys: list[str], day: date, db: AsyncSession) -> None:
+        missing = [key for key in keys if (key, day) not in self._persisted]
+        if not missing:
+            return
+        result = await db.execute(
+            select(UsageCounter.key, UsageCounter.count).where(UsageCounter.day == day, UsageCounter.key.in_(missing))
+        )
+        counts = dict(result.tuples().all())
+        for key in missing:
+            self._persisted[(key, day)] = counts.get(key, 0)
+
+    async def acquire(self, user: dict, db: AsyncSession, cost: int = 1, quota_only: bool = False) -> None:
+        """Charge `cost` generations to the user (and CLI token) or raise 429.
+
+        `quota_only` charges the daily quota but not the per-minute bucket: a batch is one request, and a
+        cost above the burst could never pass the bucket.
+        """
+        if not s.rate_limit_enabled:
+            return
+        limits = self.limits_for(user)
+        day = _today()
+        await self._ensure_loaded([key for key, _ in limits], day, db)
+        self.consume(limits, day, cost, quota_only)
+
+    def consume(self, limits: list[tuple[str, int]], day: date, cost: int, quota_only: bool = False) -> None:
+        now = time.monotonic()
+        rate = s.rate_limit_per_minute / 60
+        buckets: list[_Bucket] = []
+        for key, quota in limits:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(tokens=float(s.rate_limit_burst), updated=now)
+            bucket.tokens = min(float(s.rate_limit_burst), bucket.tokens + (now - bucket.updated) * rate)
+            bucket.updated = now
+            if not quota_only and bucket.tokens < cost:
+                raise _too_many("Rate limit exceeded, slow down", (cost - bucket.tokens) / rate if rate else 60)
+            if self._used((key, day)) + cost > quota:
+                raise _too_many(f"Daily generation quota of {quota} exceeded", _seconds_until_tomorrow())
+            buckets.append(bucket)
+        if not quota_only:
+            for bucket in buckets:
+                bucket.tokens -= cost
+        for key, _ in limits:
+            self._pending[(key, day)] = self._pending.get((key, day), 0) + cost
+
+    async def flush(self) -> None:
+        batch, self._pending = self._pending, {}
+        self._inflight = batch
+        today = _today()
+        active = {key for key, day in (*self._persisted, *batch) if day == today}
+        try:
+            async with new_session() as session:
+                if batch:
+                    stmt = insert(UsageCounter).values(
+                        [
+                            {"id": uuid.uuid4(), "key": key, "day": day, "count": count}
+                            for (key, day), count in batch.items()
+                        ]
+                    )
+                    stmt = stmt.on_conflict_do_update(
+                        constraint="uq_usage_counters_key_day",
+                        set_={"count": UsageCounter.count + stmt.excluded.count, "updated_at": func.now()},
+                    )
+                    await session.execute(stmt)
+                    await session.commit()
+                counts: dict[str, int] = {}
+                if active:
+                    # Re-read rather than add locally: picks up what other replicas flushed since the last sync.
+                    result = await session.execute(
+                        select(UsageCounter.key, UsageCounter.count).where(
+                            UsageCounter.day == today, UsageCounter.key.in_(active)
+                        )
+                    )
+                    counts = dict(result.tuples().all())
+        except Exception:
+            logger.exception("Failed to flush usage counters")
+            for counter, count in batch.items():
+                self._pending[counter] = self._pending.get(counter, 0) + count
+            return
+        finally:
+            self._inflight = {}
+        self._persisted = {(key, today): counts.get(key, 0) for key in active}
+        self._prune_buckets()
+
+    def _prune_buckets(self) -> None:
+        # A bucket idle long enough to be full again carries no state.
+        refill_seconds = s.rate_limit_burst / (s.rate_limit_per_minute / 60) if s.rate_limit_per_minute else 0
+        now = time.monotonic()
+        for key in [k for k, bucket in self._buckets.items() if now - bucket.updated >= refill_seconds]:
+            del self._buckets[key]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(s.rate_limit_flush_interval_seconds)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None and s.rate_limit_enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            await self.flush()
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.base_model import utcnow
+from app.core.database import new_session
+from app.core.security import revocations, token_digest
+from app.core.settings import s
+from app.modules.auth.models import RevokedToken, User
+
+logger = logging.getLogger(__name__)
+
+
+async def revoke_token(token: str, payload: dict[str, Any], db: AsyncSession) -> None:
+    """Logout: сразу в памяти этого процесса, затем в revoked_tokens для остальных реплик."""
+    digest = token_digest(token)
+    revocations.revoke_token(digest)
+    expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None)
+    stmt = insert(RevokedToken).values(id=uuid.uuid4(), token_digest=digest, expires_at=expires_at)
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=["token_digest"]))
+    await db.commit()
+
+
+async def load_revocations(db: AsyncSession) -> None:
+    """Заменяет список отзыва в памяти: неистёкшие revoked_tokens и неактивные пользователи."""
+    now = utcnow()
+    digests = await db.execute(select(RevokedToken.token_digest).where(RevokedToken.expires_at > now))
+    user_ids = await db.execute(select(User.id).where(User.is_active.is_(False)))
+    revocations.replace({digest for (digest,) in digests}, {str(user_id) for (user_id,) in user_ids})
+
+
+class RevocationSync:
+    """Периодически перечитывает список отзыва из Postgres и удаляет истёкшие записи."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def refresh(self) -> None:
+        try:
+            async with new_session() as session:
+                await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= utcnow()))
+                await session.commit()
+                await load_revocations(session)
+        except Exception:
+            # Остаётся прежний список: отзывы из этого процесса в нём уже есть.
+            logger.exception("Failed to load the token revocation list")
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+revocation_sync = RevocationSync(interval=s.jwt_revocation_refresh_seconds)
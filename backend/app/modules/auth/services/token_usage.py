@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, bindparam, func, update
+
+from app.core.base_model import utcnow
+from app.core.database import new_session
+from app.core.settings import s
+from app.modules.auth.models import CLIToken
+
+logger = logging.getLogger(__name__)
+
+_table = CLIToken.__table__
+
+
+class TokenUsageTracker:
+    """Последнее использование CLI-токенов: в памяти на горячем пути, в БД одним UPDATE раз в интервал.
+
+    На токен хранится только самое позднее время, так что буфер не больше числа активных токенов.
+    """
+
+    def __init__(self, flush_interval: float) -> None:
+        self.flush_interval = flush_interval
+        self._pending: dict[uuid.UUID, datetime] = {}
+        self._task: asyncio.Task | None = None
+        self.written = 0
+        self.write_errors = 0
+
+    def touch(self, token_id: uuid.UUID) -> None:
+        self._pending[token_id] = utcnow()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        # GREATEST: не откатываем время, записанное другой репликой позже. updated_at не трогаем:
+        # использование токена не изменение записи.
+        stmt = (
+            update(_table)
+            .where(_table.c.id == bindparam("token_id"))
+            .values(
+                last_used_at=func.greatest(_table.c.last_used_at, bindparam("used_at", type_=DateTime())),
+                updated_at=_table.c.updated_at,
+            )
+        )
+        try:
+            async with new_session() as session:
+                await session.execute(stmt, [{"token_id": key, "used_at": used} for key, used in batch.items()])
+                await session.commit()
+        except Exception:
+            self.write_errors += 1
+            logger.exception("Failed to write last_used_at for %d CLI tokens", len(batch))
+            for key, used in batch.items():
+                # Оставляем более позднее из неудачно записанного и пришедшего за это время.
+                if key not in self._pending or self._pending[key] < used:
+                    self._pending[key] = used
+            return
+        self.written += len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+token_usage = TokenUsageTracker(flush_interval=s.cli_token_usage_flush_interval_seconds)
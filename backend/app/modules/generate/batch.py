@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+
+import orjson
+from fastapi import HTTPException
+
+from app.modules.auth.dependencies import user_key
+from app.modules.generate.budget import enforce_context_budget
+from app.modules.generate.context_store import remember_context, resolve_context_delta
+from app.modules.generate.history import record_generation, request_hash
+from app.modules.generate.metrics import metrics
+from app.modules.generate.paths import resolve_structure
+from app.modules.generate.schemas import GenerateRequest, GenerateResponse
+from app.modules.generate.service import generate_docker_files
+
+logger = logging.getLogger(__name__)
+
+
+def _line(payload: dict[str, Any]) -> bytes:
+    return orjson.dumps(payload) + b"\n"
+
+
+async def _run_item(item: GenerateRequest, user: dict, semaphore: asyncio.Semaphore, key: str) -> dict[str, Any]:
+    async with semaphore:
+        try:
+            async with record_generation("generate/batch", user, key) as recording:
+                project_context = item.project_context
+                if project_context is None and item.project_context_delta is not None:
+                    project_context = resolve_context_delta(user_key(user), item.project_context_delta)
+                try:
+                    project_structure, structure_format, project_context = resolve_structure(
+                        item.project_structure, item.format or "tree", project_context
+                    )
+                except ValueError as exc:
+                    raise HTTPException(status_code=400, detail=str(exc)) from exc
+                enforce_context_budget(project_context)
+                if item.project_context is not None:
+                    remember_context(user_key(user), item.project_context)
+                result = await generate_docker_files(
+                    project_structure=project_structure,
+                    format=structure_format,
+                    project_context=project_context,
+                    candidates=item.candidates,
+                    owner=user_key(user),
+                )
+                recording.set_result(result.files, result.plan)
+        except HTTPException as exc:
+            metrics.incr("batch.failed_items")
+            return {"status": exc.status_code, "detail": exc.detail}
+        except Exception:
+            # The exception text may carry internals (model errors, database details): log it, answer generically.
+            metrics.incr("batch.failed_items")
+            logger.exception("Batch item %s failed", key)
+            return {"status": 500, "detail": "Generation failed"}
+    response = GenerateResponse(files=result.files, plan=result.plan)
+    return {"status": 200, **response.model_dump()}
+
+
+async def stream_batch(items: list[GenerateRequest], user: dict, parallelism: int) -> AsyncIterator[bytes]:
+    """Yield one NDJSON line per item as it finishes, then a summary line.
+
+    Items with identical structure and context share a single generation.
+    """
+    metrics.incr("batch.requests")
+    metrics.incr("batch.items", len(items))
+    semaphore = asyncio.Semaphore(parallelism)
+    indexes_by_key: dict[str, list[int]] = {}
+    tasks: dict[asyncio.Task, str] = {}
+    for index, item in enumerate(items):
+        key = request_hash(
+            item.format or "tree",
+            item.project_structure,
+            item.project_context.model_dump_json() if item.project_context is not None else "",
+            item.project_context_delta.model_dump_json() if item.project_context_delta is not None else "",
+            str(item.candidates),
+        )
+        if key in indexes_by_key:
+            indexes_by_key[key].append(index)
+            continue
+        indexes_by_key[key] = [index]
+        tasks[asyncio.create_task(_run_item(item, user, semaphore, key))] = key
+    metrics.incr("batch.deduplicated_items", len(items) - len(tasks))
+
+    failed = 0
+    try:
+        # Iterating asynchronously yields the original tasks, so each result maps back to its key.
+        async for task in asyncio.as_completed(tasks):
+            result = task.result()
+            indexes = indexes_by_key[tasks[task]]
+            if result["status"] != 200:
+                failed += len(indexes)
+            for index in indexes:
+                yield _line({"index": index, **result})
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            metrics.incr("batch.cancelled_items", len(pending))
+            await asyncio.gather(*pending, return_exceptions=True)
+    yield _line({"done": True, "items": len(items), "generated": len(tasks), "failed": failed})
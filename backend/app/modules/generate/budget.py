@@ -0,0 +1,50 @@
+from fastapi import HTTPException, status
+
+from app.core.settings import s
+from app.modules.generate.metrics import metrics
+from app.modules.generate.schemas import ProjectContext
+
+
+def utf8_len(text: str) -> int:
+    """Encoded size of `text`; ASCII, the common case, is measured without encoding a copy."""
+    return len(text) if text.isascii() else len(text.encode())
+
+
+def context_bytes(project_context: ProjectContext) -> int:
+    """UTF-8 bytes held by the context's strings: a lower bound for its serialized size."""
+    return (
+        sum(map(utf8_len, project_context.paths))
+        + sum(utf8_len(path) + utf8_len(content) for path, content in project_context.manifests.items())
+        + sum(utf8_len(path) + utf8_len(content) for path, content in project_context.snippets.items())
+        + sum(map(utf8_len, project_context.entrypoints))
+        + sum(map(utf8_len, project_context.commands))
+    )
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+def enforce_context_budget(*contexts: ProjectContext | None) -> None:
+    """Reject an oversized context before any serialization or prompt formatting copies it."""
+    size = sum(context_bytes(context) for context in contexts if context is not None)
+    metrics.observe("budget.context_bytes", size)
+    if size > s.generate_max_context_bytes:
+        metrics.incr("budget.context_rejected")
+        raise _too_large(
+            f"Project context is {size} bytes, the limit is {s.generate_max_context_bytes}: "
+            "send fewer snippets or smaller manifests"
+        )
+
+
+def enforce_prompt_budget(size: int, estimated: bool = False) -> None:
+    """Reject a request whose shared prompt prefix (rules, structure, context) would exceed the limit.
+
+    estimated=True takes a lower bound computed before serialization; only exact sizes are recorded.
+    """
+    if not estimated:
+        metrics.observe("budget.prompt_bytes", size)
+    if size > s.generate_max_prompt_bytes:
+        metrics.incr("budget.prompt_rejected")
+        at_least = "at least " if estimated else ""
+        raise _too_large(f"Prompt would be {at_least}{size} bytes, the limit is {s.generate_max_prompt_bytes}")
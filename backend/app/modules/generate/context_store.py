@@ -0,0 +1,124 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from fastapi import HTTPException, status
+
+from app.core.settings import s
+from app.modules.generate.metrics import metrics
+from app.modules.generate.schemas import ProjectContext, ProjectContextDelta
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _join_paths(paths: list[str]) -> str:
+    # Path sets are stored as blobs too: sorted, newline-joined. The CLI hashes the same form.
+    return "\n".join(sorted(paths))
+
+
+class ContextStore:
+    """Content-addressed LRU of manifests, snippets and path sets, bounded by total size.
+
+    Content is namespaced by owner (the user id): a hash uploaded by one user is unknown to every other,
+    so the store neither shares content nor reveals which hashes others have sent.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._lock = threading.Lock()
+        self._items: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._size = 0
+        self.max_bytes = max_bytes
+
+    def get(self, owner: str, key: str) -> str | None:
+        with self._lock:
+            value = self._items.get((owner, key))
+            if value is not None:
+                self._items.move_to_end((owner, key))
+            return value
+
+    def put(self, owner: str, content: str, key: str | None = None) -> str:
+        key = key or content_hash(content)
+        with self._lock:
+            if (owner, key) in self._items:
+                self._items.move_to_end((owner, key))
+                return key
+            self._items[(owner, key)] = content
+            self._size += len(content)
+            while self._size > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+        return key
+
+
+store = ContextStore(max_bytes=s.context_store_max_bytes)
+
+
+def remember_context(owner: str, project_context: ProjectContext) -> None:
+    """Seed the owner's store from a full upload so their next delta can reference it."""
+    for content in (*project_context.manifests.values(), *project_context.snippets.values()):
+        store.put(owner, content)
+    store.put(owner, _join_paths(project_context.paths))
+
+
+def _resolve_blobs(owner: str, refs: dict[str, str], missing: list[str]) -> dict[str, str]:
+    resolved: dict[str, str] = {}
+    for path, key in refs.items():
+        content = store.get(owner, key)
+        if content is None:
+            missing.append(key)
+        else:
+            resolved[path] = content
+    return resolved
+
+
+def resolve_context_delta(owner: str, delta: ProjectContextDelta) -> ProjectContext:
+    """Rebuild a full ProjectContext from hashes and deltas, against the owner's part of the store.
+
+    Raises 409 with the list of hashes this owner has not uploaded; the client then resends them (or the
+    full context).
+    """
+    metrics.incr("context_delta.requests")
+    for key, content in delta.blobs.items():
+        if content_hash(content) != key:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Blob content does not match its hash: {key}",
+            )
+        store.put(owner, content, key=key)
+
+    missing: list[str] = []
+    paths: list[str] = []
+    if delta.paths is not None:
+        paths = sorted(delta.paths)
+    elif delta.paths_base:
+        base = store.get(owner, delta.paths_base)
+        if base is None:
+            missing.append(delta.paths_base)
+        else:
+            current = set(base.split("\n")) if base else set()
+            current.difference_update(delta.paths_removed)
+            current.update(delta.paths_added)
+            paths = sorted(current)
+    manifests = _resolve_blobs(owner, delta.manifests, missing)
+    snippets = _resolve_blobs(owner, delta.snippets, missing)
+    if missing:
+        metrics.incr("context_delta.missing")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Unknown context hashes, resend their content", "missing": sorted(set(missing))},
+        )
+
+    store.put(owner, _join_paths(paths))
+    reused = [manifests[p] for p, key in delta.manifests.items() if key not in delta.blobs]
+    reused += [snippets[p] for p, key in delta.snippets.items() if key not in delta.blobs]
+    metrics.incr("context_delta.bytes_saved", sum(len(content) for content in reused))
+    # Every value was already validated as a string on the delta model; skip a second validation pass.
+    return ProjectContext.model_construct(
+        paths=paths,
+        manifests=manifests,
+        snippets=snippets,
+        entrypoints=delta.entrypoints,
+        commands=delta.commands,
+    )
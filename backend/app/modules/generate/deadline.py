@@ -0,0 +1,80 @@
+import asyncio
+import time
+from collections.abc import Awaitable
+from contextvars import ContextVar
+from typing import TypeVar
+
+from fastapi import HTTPException, Request, status
+from starlette.types import Receive
+
+from app.core.settings import s
+from app.modules.generate.metrics import metrics
+
+DEADLINE_HEADER = "x-deadline-ms"
+# Non-standard "client closed request" status; the client is gone, so it only shows up in logs and history.
+CLIENT_CLOSED_REQUEST = 499
+
+T = TypeVar("T")
+
+_deadline: ContextVar[float | None] = ContextVar("generation_deadline", default=None)
+
+
+def parse_deadline(request: Request) -> float | None:
+    """Budget in seconds from X-Deadline-Ms (relative, so client/server clock skew does not matter)."""
+    raw = request.headers.get(DEADLINE_HEADER)
+    if raw is None:
+        return None
+    try:
+        budget = float(raw) / 1000
+    except ValueError:
+        budget = -1.0
+    if budget <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{DEADLINE_HEADER} must be a positive number of milliseconds",
+        )
+    return min(budget, s.generate_max_deadline_seconds)
+
+
+def remaining() -> float | None:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def has_budget_for(tier: str, stage: str) -> bool:
+    """False when the time left is below the typical (p50) latency of a model call for this tier and stage."""
+    left = remaining()
+    if left is None:
+        return True
+    typical = metrics.percentile(f"tier.{tier}.{stage}.latency", 0.5)
+    return left >= (typical if typical is not None else s.generate_default_call_seconds)
+
+
+async def _wait_for_disconnect(receive: Receive) -> None:
+    # The body has already been read by the time the endpoint runs, so the next message is the disconnect.
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def run_cancellable(request: Request, work: Awaitable[T], budget: float | None) -> T:
+    """Await `work`, cancelling it when the client disconnects (499) or the deadline passes (504)."""
+    token = _deadline.set(time.monotonic() + budget if budget is not None else None)
+    try:
+        task = asyncio.ensure_future(work)
+    finally:
+        _deadline.reset(token)
+    watcher = asyncio.create_task(_wait_for_disconnect(request.receive))
+    try:
+        done, _ = await asyncio.wait({task, watcher}, timeout=budget, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for pending in (task, watcher):
+            if not pending.done():
+                pending.cancel()
+        await asyncio.gather(task, watcher, return_exceptions=True)
+    if task in done:
+        return task.result()
+    if watcher in done:
+        metrics.incr("generate.client_disconnects")
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    metrics.incr("generate.deadline_exceeded")
+    raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Generation deadline exceeded")
@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import HTTPException
+
+from app.core.settings import s
+from app.core.tracing import span
+from app.modules.analytics.history import writer
+from app.modules.generate.deadline import CLIENT_CLOSED_REQUEST
+from app.modules.generate.metrics import GenerationStats, track_generation
+from app.modules.generate.schemas import FileContent
+
+
+def request_hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def output_hashes(files: list[FileContent]) -> dict[str, str]:
+    return {f.path.strip(): hashlib.sha256(f.content.encode()).hexdigest() for f in files}
+
+
+def _parse_user_id(value: Any) -> uuid.UUID | None:
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Recording:
+    def __init__(self, stats: GenerationStats) -> None:
+        self.stats = stats
+        self.stack: str | None = None
+        self.files: list[FileContent] = []
+
+    def set_result(self, files: list[FileContent], plan: dict[str, Any] | None) -> None:
+        self.files = files
+        if plan and isinstance(plan.get("stack"), str):
+            self.stack = plan["stack"]
+
+
+@asynccontextmanager
+async def record_generation(endpoint: str, user: dict, request_key: str):
+    """Collect stats for the wrapped pipeline call and queue a `generations` row when it finishes."""
+    started = time.perf_counter()
+    status_code = 200
+    # request_hash and stack on this span tie slow traces back to a specific repo.
+    with track_generation() as stats, span(endpoint, request_hash=request_key) as generation_span:
+        recording = _Recording(stats)
+        try:
+            yield recording
+        except HTTPException as exc:
+            status_code = exc.status_code
+            raise
+        except asyncio.CancelledError:
+            # The request task itself was cancelled (client gone or server shutting down), not a 200.
+            status_code = CLIENT_CLOSED_REQUEST
+            raise
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            generation_span.set_attribute("stack", recording.stack)
+            generation_span.set_attribute("status_code", status_code)
+            generation_span.set_attribute("attempts", stats.attempts)
+            generation_span.set_attribute("cache", stats.cache)
+            if s.history_enabled:
+                writer.add(
+                    {
+                        "user_id": _parse_user_id(user.get("id")),
+                        "endpoint": endpoint,
+                        "request_hash": request_key,
+                        "stack": recording.stack,
+                        "status_code": status_code,
+                        "cache": stats.cache,
+                        "total_ms": round((time.perf_counter() - started) * 1000, 3),
+                        "stage_ms": {k: round(v * 1000, 3) for k, v in stats.stage_seconds.items()},
+                        "attempts": stats.attempts,
+                        "model_calls": stats.model_calls,
+                        "prompt_tokens": stats.prompt_tokens,
+                        "output_tokens": stats.output_tokens,
+                        "validation_errors": stats.validation_errors,
+                        "output_hashes": output_hashes(recording.files),
+                    }
+                )
@@ -0,0 +1,150 @@
+import posixpath
+from typing import Any
+
+from app.modules.generate.metrics import metrics
+from app.modules.generate.runtime import compose_dockerfiles, compose_services
+from app.modules.generate.schemas import FileContent, ProjectContext
+from app.modules.generate.service import (
+    FILES_HARD_RULES,
+    files_to_json,
+    get_client,
+    prompt_context,
+    repair_summary,
+    run_files_attempts,
+)
+
+COMPOSE_PATHS = {"docker-compose.yaml", "docker-compose.yml"}
+
+_INCREMENTAL_PROMPT_TEMPLATE = """You are a senior DevOps assistant.
+
+Part of the project changed. Update ONLY the Docker files listed below so they match the change.
+Return JSON only, shaped by schema, containing only those files, each rewritten in full.
+Keep everything that the change does not affect exactly as it is.
+
+Project summary:
+{summary}
+
+Changed project context:
+{changes_json}
+
+Hard rules:
+{hard_rules}
+
+Files to update:
+{files_json}
+"""
+
+
+def _normalize_dir(path: str) -> str:
+    path = path.strip().removeprefix("./").strip("/")
+    return "" if path in {"", "."} else path
+
+
+def _is_under(path: str, directory: str) -> bool:
+    return not directory or path == directory or path.startswith(directory + "/")
+
+
+def _is_dockerfile(path: str) -> bool:
+    return path == "Dockerfile" or path.endswith("/Dockerfile")
+
+
+def _changed_inputs(changes: ProjectContext) -> set[str]:
+    candidates = [*changes.paths, *changes.manifests, *changes.snippets, *changes.entrypoints]
+    return {path.strip().removeprefix("./") for path in candidates if path.strip()}
+
+
+def _derive_plan(files: list[FileContent]) -> dict[str, Any]:
+    services = []
+    for file in files:
+        path = file.path.strip()
+        if _is_dockerfile(path):
+            directory = _normalize_dir(posixpath.dirname(path))
+            services.append({"name": posixpath.basename(directory) or "app", "path": directory or "."})
+    return {"stack": "unknown", "services": services, "notes": []}
+
+
+def _affected_dockerfiles(files: list[FileContent], changes: ProjectContext, plan: dict[str, Any]) -> set[str]:
+    """Dockerfiles whose service contains at least one changed manifest, entrypoint or path."""
+    dockerfile_dirs = {
+        _normalize_dir(posixpath.dirname(file.path.strip())): file.path.strip()
+        for file in files
+        if _is_dockerfile(file.path.strip())
+    }
+    service_dirs = [
+        _normalize_dir(str(service.get("path", "")))
+        for service in plan.get("services", [])
+        if isinstance(service, dict)
+    ]
+    affected: set[str] = set()
+    for changed in _changed_inputs(changes):
+        # Attribute the change to its most specific plan service, then to the Dockerfile building that service.
+        key = max((d for d in service_dirs if _is_under(changed, d)), key=len, default=changed)
+        owner = max((d for d in dockerfile_dirs if _is_under(key, d)), key=len, default=None)
+        if owner is not None:
+            affected.add(dockerfile_dirs[owner])
+    return affected
+
+
+def _declaring_compose_files(files: list[FileContent], dockerfiles: set[str], plan: dict[str, Any]) -> set[str]:
+    """Compose files that build one of `dockerfiles` or declare the plan service it builds."""
+    dirs = {_normalize_dir(posixpath.dirname(path)) for path in dockerfiles}
+    names = {
+        str(service.get("name"))
+        for service in plan.get("services", [])
+        if isinstance(service, dict) and _normalize_dir(str(service.get("path", ""))) in dirs
+    }
+    declaring: set[str] = set()
+    for file in files:
+        path = file.path.strip()
+        if path.lower() not in COMPOSE_PATHS:
+            continue
+        if compose_dockerfiles(path, file.content) & dockerfiles or names & compose_services(file.content).keys():
+            declaring.add(path)
+    return declaring
+
+
+async def regenerate_docker_files(
+    files: list[FileContent],
+    changes: ProjectContext,
+    plan: dict[str, Any] | None = None,
+    project_context: ProjectContext | None = None,
+) -> tuple[list[FileContent], list[str]]:
+    """Regenerate only the files affected by `changes`; returns (files, regenerated_paths)."""
+    metrics.incr("incremental.requests")
+    plan = plan or _derive_plan(files)
+    targets = _affected_dockerfiles(files, changes, plan)
+    # Ports, commands and build settings of an affected service live in its compose entry too.
+    targets |= _declaring_compose_files(files, targets, plan)
+    if changes.snippets:
+        # Settings/database snippets drive the compose environment contract.
+        targets.update(f.path.strip() for f in files if f.path.strip().lower() in COMPOSE_PATHS)
+    if not targets:
+        metrics.incr("incremental.no_llm")
+        metrics.incr("incremental.reused_files", len(files))
+        return files, []
+
+    if project_context is None:
+        # Partial context: skip COPY source checks, which need the full path list.
+        project_context = changes.model_copy(update={"paths": []})
+    prompt = _INCREMENTAL_PROMPT_TEMPLATE.format(
+        summary=repair_summary(plan, project_context),
+        changes_json=prompt_context(changes).model_dump_json(indent=2, exclude_defaults=True),
+        hard_rules=FILES_HARD_RULES,
+        files_json=files_to_json([f for f in files if f.path.strip() in targets]),
+    )
+    result = await run_files_attempts(
+        get_client(),
+        [prompt],
+        plan,
+        project_context,
+        previous_files=files,
+        is_patch=True,
+        stage="incremental",
+        target_paths=targets,
+    )
+
+    before = {f.path.strip(): f.content for f in files}
+    regenerated = sorted(f.path.strip() for f in result if before.get(f.path.strip()) != f.content)
+    metrics.incr("incremental.regenerated_files", len(regenerated))
+    metrics.incr("incremental.reused_files", len(result) - len(regenerated))
+    return result, regenerated
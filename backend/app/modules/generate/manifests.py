@@ -0,0 +1,182 @@
+import json
+import posixpath
+import re
+import tomllib
+from functools import partial
+from typing import Any
+
+from app.modules.generate.metrics import metrics
+from app.modules.generate.schemas import ProjectContext
+
+# Rough prompt-token estimate used for reporting only.
+CHARS_PER_TOKEN = 4
+MAX_LISTED = 20
+
+LOCKFILE_MANAGERS = {
+    "package-lock.json": "npm",
+    "yarn.lock": "yarn",
+    "pnpm-lock.yaml": "pnpm",
+    "poetry.lock": "poetry",
+    "uv.lock": "uv",
+}
+
+# Packages that usually compile native code on install and need build tools in the image.
+NODE_NATIVE_HINTS = {
+    "bcrypt", "better-sqlite3", "canvas", "node-gyp", "node-sass", "sharp", "sqlite3", "argon2",
+    "re2", "utf-8-validate", "bufferutil", "cpu-features", "ssh2", "esbuild", "@swc/core", "grpc",
+}
+PYTHON_NATIVE_HINTS = {
+    "psycopg2", "mysqlclient", "lxml", "numpy", "pandas", "scipy", "cryptography", "cffi", "grpcio",
+    "pillow", "uvloop", "httptools", "asyncpg", "argon2-cffi-bindings", "pyyaml", "greenlet", "orjson",
+    "pydantic-core", "shapely", "gevent", "bcrypt",
+}
+
+
+def _native(names: set[str], hints: set[str]) -> list[str]:
+    return sorted(name for name in names if name.lower() in hints)[:MAX_LISTED]
+
+
+def _summarize_package_lock(content: str) -> dict[str, Any]:
+    summary: dict[str, Any] = {}
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        # The CLI truncates large manifests; fall back to scanning what arrived.
+        summary["truncated"] = True
+        version = re.search(r'"lockfileVersion"\s*:\s*(\d+)', content)
+        if version:
+            summary["lockfile_version"] = int(version.group(1))
+        names = set(re.findall(r'"(?:[^"]*node_modules/)(@?[^"/]+(?:/[^"/]+)?)"\s*:\s*\{', content))
+        engines = re.search(r'"engines"\s*:\s*\{([^}]*)\}', content)
+        if engines:
+            summary["engines"] = dict(re.findall(r'"([^"]+)"\s*:\s*"([^"]*)"', engines.group(1)))
+        summary["packages"] = len(names)
+        summary["native"] = _native(names, NODE_NATIVE_HINTS)
+        return summary
+
+    summary["lockfile_version"] = data.get("lockfileVersion")
+    packages = data.get("packages") or {}
+    root = packages.get("", {}) if isinstance(packages, dict) else {}
+    if isinstance(root, dict) and root.get("engines"):
+        summary["engines"] = root["engines"]
+    names: set[str] = set()
+    install_scripts: set[str] = set()
+    for key, meta in (packages.items() if isinstance(packages, dict) else []):
+        if not key:
+            continue
+        name = key.rsplit("node_modules/", 1)[-1]
+        names.add(name)
+        if isinstance(meta, dict) and meta.get("hasInstallScript"):
+            install_scripts.add(name)
+    if not names:
+        names = set((data.get("dependencies") or {}).keys())
+    summary["packages"] = len(names)
+    # hasInstallScript marks packages that build or download binaries on install.
+    summary["native"] = sorted(set(_native(names, NODE_NATIVE_HINTS)) | install_scripts)[:MAX_LISTED]
+    return summary
+
+
+def _summarize_yarn_lock(content: str) -> dict[str, Any]:
+    names = set(re.findall(r'(?m)^"?(@?[^@\s"]+)@', content))
+    return {
+        "flavor": "berry" if "__metadata:" in content else "classic",
+        "packages": len(names),
+        "native": _native(names, NODE_NATIVE_HINTS),
+    }
+
+
+def _summarize_pnpm_lock(content: str) -> dict[str, Any]:
+    summary: dict[str, Any] = {}
+    version = re.search(r"(?m)^lockfileVersion:\s*'?([\d.]+)'?", content)
+    if version:
+        summary["lockfile_version"] = version.group(1)
+    names = set(re.findall(r"(?m)^  '?/?(@?[^@\s'/]+(?:/[^@\s'/]+)?)@[^:\s]*'?:\s*$", content))
+    node = re.search(r"engines:\s*\{?\s*node:\s*'?([^'},\n]+)", content)
+    if node:
+        summary["engines"] = {"node": node.group(1).strip()}
+    summary["packages"] = len(names)
+    summary["native"] = _native(names, NODE_NATIVE_HINTS)
+    if "requiresBuild: true" in content:
+        summary["requires_build"] = True
+    return summary
+
+
+def _toml_python_fallback(manager: str, content: str) -> str | None:
+    # Only where each tool writes it: poetry under [metadata], uv at the top level before any table.
+    # Per-package python-versions / requires-python lines are constraints of dependencies, not the project.
+    if manager == "poetry":
+        section = re.search(r"(?ms)^\[metadata\]\s*$(.*?)(?=^\[|\Z)", content)
+        scope, key = (section.group(1) if section else ""), "python-versions"
+    else:
+        scope, key = re.split(r"(?m)^\[", content, maxsplit=1)[0], "requires-python"
+    python = re.search(rf'(?m)^{key}\s*=\s*"([^"]+)"', scope)
+    return python.group(1) if python else None
+
+
+def _summarize_toml_lock(content: str, manager: str) -> dict[str, Any]:
+    summary: dict[str, Any] = {}
+    try:
+        data = tomllib.loads(content)
+    except tomllib.TOMLDecodeError:
+        # The CLI truncates large manifests; fall back to scanning what arrived.
+        summary["truncated"] = True
+        python = _toml_python_fallback(manager, content)
+        names = set(re.findall(r'(?m)^\[\[package\]\]\s*\nname\s*=\s*"([^"]+)"', content))
+    else:
+        if manager == "poetry":
+            metadata = data.get("metadata")
+            python = metadata.get("python-versions") if isinstance(metadata, dict) else None
+        else:
+            python = data.get("requires-python")
+        packages = data.get("package")
+        names = {
+            package["name"]
+            for package in (packages if isinstance(packages, list) else [])
+            if isinstance(package, dict) and isinstance(package.get("name"), str)
+        }
+    if isinstance(python, str):
+        summary["python"] = python
+    summary["packages"] = len(names)
+    summary["native"] = _native(names, PYTHON_NATIVE_HINTS)
+    return summary
+
+
+_SUMMARIZERS = {
+    "npm": _summarize_package_lock,
+    "yarn": _summarize_yarn_lock,
+    "pnpm": _summarize_pnpm_lock,
+    "poetry": partial(_summarize_toml_lock, manager="poetry"),
+    "uv": partial(_summarize_toml_lock, manager="uv"),
+}
+
+
+def summarize_manifest(path: str, content: str) -> str | None:
+    """Compact JSON summary for a lockfile; None for manifests that should be sent as-is."""
+    manager = LOCKFILE_MANAGERS.get(posixpath.basename(path))
+    if manager is None:
+        return None
+    summary = {"lockfile": posixpath.basename(path), "package_manager": manager}
+    summary.update(_SUMMARIZERS[manager](content))
+    return json.dumps(summary, ensure_ascii=False, separators=(",", ":"))
+
+
+def summarize_lockfiles(project_context: ProjectContext | None) -> ProjectContext | None:
+    """Replace raw lockfiles with structured summaries for prompting. Validation keeps the original context."""
+    if project_context is None or not project_context.manifests:
+        return project_context
+    manifests: dict[str, str] = {}
+    saved = 0
+    for path, content in project_context.manifests.items():
+        summary = summarize_manifest(path, content)
+        if summary is None or len(summary) >= len(content):
+            manifests[path] = content
+            continue
+        manifests[path] = summary
+        saved += len(content.encode()) - len(summary.encode())
+    if not saved:
+        return project_context
+    metrics.incr("manifests.summarized_requests")
+    metrics.incr("manifests.bytes_saved", saved)
+    metrics.observe("manifests.bytes_saved_per_request", saved)
+    metrics.observe("manifests.tokens_saved_per_request", saved / CHARS_PER_TOKEN)
+    return project_context.model_copy(update={"manifests": manifests})
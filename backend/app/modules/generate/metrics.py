@@ -0,0 +1,173 @@
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+# Number of recent observations kept per timer for percentile estimates.
+WINDOW_SIZE = 512
+# Validation errors kept per generation record.
+MAX_RECORDED_ERRORS = 50
+
+
+@dataclass(slots=True)
+class _Summary:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    window: deque[float] = field(default_factory=lambda: deque(maxlen=WINDOW_SIZE))
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.window.append(value)
+
+    def to_dict(self) -> dict[str, float]:
+        ordered = sorted(self.window)
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 4) if self.count else 0.0,
+            "max": round(self.max, 4),
+            "p50": round(_percentile(ordered, 0.50), 4),
+            "p95": round(_percentile(ordered, 0.95), 4),
+        }
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Metrics:
+    """In-process counters and timers for the generation pipeline."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = defaultdict(int)
+        self._summaries: dict[str, _Summary] = defaultdict(_Summary)
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            self._summaries[name].add(value)
+
+    def percentile(self, name: str, q: float) -> float | None:
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None or not summary.window:
+                return None
+            return _percentile(sorted(summary.window), q)
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": dict(sorted(self._counters.items())),
+                "timings": {name: summary.to_dict() for name, summary in sorted(self._summaries.items())},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+
+metrics = Metrics()
+
+
+@dataclass(slots=True)
+class GenerationStats:
+    """Per-request figures collected while a generation runs; persisted by the analytics module."""
+
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+    attempts: int = 0
+    model_calls: int = 0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    validation_errors: list[str] = field(default_factory=list)
+    cache: str | None = None
+
+    def add_stage(self, stage: str, seconds: float) -> None:
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+
+# Mutable stats object for the current request; tasks spawned by the pipeline share it.
+generation_stats: ContextVar[GenerationStats | None] = ContextVar("generation_stats", default=None)
+
+
+@contextmanager
+def track_generation():
+    stats = GenerationStats()
+    token = generation_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        generation_stats.reset(token)
+
+
+def record_model_call(
+    tier: str,
+    stage: str,
+    latency: float,
+    prompt_tokens: int,
+    output_tokens: int,
+    ok: bool,
+    cached_tokens: int = 0,
+) -> None:
+    prefix = f"tier.{tier}.{stage}"
+    stats = generation_stats.get()
+    if stats is not None:
+        stats.model_calls += 1
+        stats.prompt_tokens += prompt_tokens
+        stats.output_tokens += output_tokens
+        stats.add_stage(stage, latency)
+    metrics.incr(f"{prefix}.calls")
+    metrics.incr(f"{prefix}.{'ok' if ok else 'error'}")
+    metrics.incr(f"{prefix}.prompt_tokens", prompt_tokens)
+    # Served from a provider context cache (explicit or implicit); billed at a discount.
+    metrics.incr(f"{prefix}.cached_tokens", cached_tokens)
+    metrics.incr(f"{prefix}.output_tokens", output_tokens)
+    metrics.observe(f"{prefix}.latency", latency)
+
+
+def record_validation(tier: str, stage: str, passed: bool, errors: list[str] | None = None) -> None:
+    prefix = f"tier.{tier}.{stage}"
+    stats = generation_stats.get()
+    if stats is not None:
+        stats.attempts += 1
+        if errors:
+            stats.validation_errors.extend(errors[: MAX_RECORDED_ERRORS - len(stats.validation_errors)])
+    metrics.incr(f"{prefix}.validations")
+    if passed:
+        metrics.incr(f"{prefix}.valid")
+
+
+def tier_report() -> dict[str, dict[str, Any]]:
+    """Per tier/stage view with success rate, used to tune cost vs latency."""
+    snapshot = metrics.snapshot()
+    report: dict[str, dict[str, Any]] = {}
+    for name, value in snapshot["counters"].items():
+        if not name.startswith("tier."):
+            continue
+        _, tier, stage, key = name.split(".", 3)
+        report.setdefault(f"{tier}.{stage}", {})[key] = value
+    for name, summary in snapshot["timings"].items():
+        if name.startswith("tier.") and name.endswith(".latency"):
+            _, tier, stage, _ = name.split(".", 3)
+            report.setdefault(f"{tier}.{stage}", {})["latency"] = summary
+    for entry in report.values():
+        entry["fresh_prompt_tokens"] = entry.get("prompt_tokens", 0) - entry.get("cached_tokens", 0)
+        validations = entry.get("validations", 0)
+        if validations:
+            entry["success_rate"] = round(entry.get("valid", 0) / validations, 4)
+    return report
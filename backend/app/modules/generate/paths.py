@@ -0,0 +1,237 @@
+import re
+from collections.abc import Iterable, Iterator
+
+from app.modules.generate.schemas import ProjectContext
+
+# `tree` connectors, in both the unicode and the --charset=ascii flavours.
+_TREE_LINE_RE = re.compile(r"^(?P<indent>(?:[│|] {3}| {4})*)(?:├──|└──|\|--|`--) (?P<name>.+)$")
+_TREE_SUMMARY_RE = re.compile(r"^\d+ director(?:y|ies)(?:, \d+ files?)?$")
+_MARKDOWN_LINE_RE = re.compile(r"^(?P<indent>\s*)[-*+] (?P<name>.+)$")
+_MARKDOWN_INDENT = 2
+_TREE_INDENT = 4
+
+FRONT_CODED_FORMAT = "paths"
+
+
+class _Node:
+    __slots__ = ("children", "is_dir")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.is_dir = False
+
+
+class PathTrie:
+    """Project paths as a trie of path segments: one structure for the path list, the rendered tree and lookups.
+
+    A node is a directory when it has children or was marked as one (trailing "/"); every other node is a file.
+    """
+
+    def __init__(self) -> None:
+        self._root = _Node()
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str]) -> "PathTrie":
+        trie = cls()
+        for path in paths:
+            trie.add(path)
+        return trie
+
+    def add(self, path: str) -> None:
+        path = path.strip().removeprefix("./")
+        is_dir = path.endswith("/")
+        parts = [part for part in path.split("/") if part and part != "."]
+        if not parts:
+            return
+        node = self._root
+        for part in parts:
+            node = node.children.setdefault(part, _Node())
+        node.is_dir = node.is_dir or is_dir
+
+    def _find(self, path: str) -> _Node | None:
+        node = self._root
+        for part in path.strip().removeprefix("./").split("/"):
+            if not part or part == ".":
+                continue
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def __bool__(self) -> bool:
+        return bool(self._root.children)
+
+    def __contains__(self, path: str) -> bool:
+        """True for a known file or directory."""
+        return self._find(path) is not None
+
+    def is_dir(self, path: str) -> bool:
+        node = self._find(path)
+        return node is not None and (node.is_dir or bool(node.children))
+
+    def _walk(self, node: _Node, prefix: str) -> Iterator[tuple[str, _Node]]:
+        for name in sorted(node.children):
+            child = node.children[name]
+            path = f"{prefix}{name}"
+            yield path, child
+            yield from self._walk(child, path + "/")
+
+    def paths(self) -> list[str]:
+        """File paths in sorted order."""
+        return [path for path, node in self._walk(self._root, "") if not node.children and not node.is_dir]
+
+    def directories(self) -> set[str]:
+        return {path for path, node in self._walk(self._root, "") if node.children or node.is_dir}
+
+    def render_tree(self, root_name: str = ".") -> str:
+        """Render like `tree` and the CLI: directories first, then files, each sorted by name.
+
+        Directories carry a trailing "/", so empty ones parse back as directories.
+        """
+        lines = [root_name]
+
+        def render(node: _Node, prefix: str) -> None:
+            dirs = sorted(name for name, child in node.children.items() if child.children or child.is_dir)
+            files = sorted(name for name, child in node.children.items() if not child.children and not child.is_dir)
+            entries = dirs + files
+            for i, name in enumerate(entries):
+                last = i == len(entries) - 1
+                suffix = "/" if i < len(dirs) else ""
+                lines.append(f"{prefix}{'└── ' if last else '├── '}{name}{suffix}")
+                render(node.children[name], prefix + ("    " if last else "│   "))
+
+        render(self._root, "")
+        return "\n".join(lines) + "\n"
+
+
+def _build(entries: list[tuple[int, str]]) -> PathTrie:
+    # A single top-level entry followed by deeper ones is the project root itself (first line of `tree`).
+    if len(entries) > 1 and entries[0][0] == 0 and all(depth > 0 for depth, _ in entries[1:]):
+        entries = [(depth - 1, name) for depth, name in entries[1:]]
+    trie = PathTrie()
+    stack: list[str] = []
+    for depth, name in entries:
+        del stack[depth:]
+        if len(stack) < depth:
+            raise ValueError(f"Entry '{name}' is nested deeper than its parent")
+        is_dir = name.endswith("/")
+        name = name.rstrip("/")
+        stack.append(name)
+        trie.add("/".join(stack) + ("/" if is_dir else ""))
+    return trie
+
+
+def parse_tree(text: str) -> PathTrie:
+    entries: list[tuple[int, str]] = []
+    for index, line in enumerate(text.splitlines()):
+        line = line.rstrip()
+        if not line or _TREE_SUMMARY_RE.match(line):
+            continue
+        match = _TREE_LINE_RE.match(line)
+        if match is None:
+            if index == 0 or not entries:
+                # Root line ("." or the directory name).
+                continue
+            raise ValueError(f"Unrecognized tree line: {line!r}")
+        name = match["name"].split(" -> ", 1)[0]
+        entries.append((len(match["indent"]) // _TREE_INDENT + 1, name))
+    return _build([(0, ".")] + entries) if entries else PathTrie()
+
+
+def parse_markdown(text: str) -> PathTrie:
+    entries: list[tuple[int, str]] = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        match = _MARKDOWN_LINE_RE.match(line.rstrip())
+        if match is None:
+            raise ValueError(f"Unrecognized markdown line: {line!r}")
+        indent = len(match["indent"].expandtabs(_MARKDOWN_INDENT))
+        entries.append((indent // _MARKDOWN_INDENT, match["name"].strip().strip("`")))
+    return _build(entries)
+
+
+def encode_paths(paths: Iterable[str]) -> str:
+    """Front-coded path list: sorted paths, each line "<chars shared with the previous path> <rest>"."""
+    lines: list[str] = []
+    previous = ""
+    for path in sorted(set(paths)):
+        shared = 0
+        limit = min(len(previous), len(path))
+        while shared < limit and previous[shared] == path[shared]:
+            shared += 1
+        lines.append(f"{shared} {path[shared:]}")
+        previous = path
+    return "\n".join(lines)
+
+
+def decode_paths(encoded: str) -> list[str]:
+    paths: list[str] = []
+    previous = ""
+    for number, line in enumerate(encoded.splitlines(), start=1):
+        if not line:
+            continue
+        shared, sep, rest = line.partition(" ")
+        if not sep or not shared.isdigit() or int(shared) > len(previous):
+            raise ValueError(f"Invalid front-coded path list at line {number}")
+        previous = previous[: int(shared)] + rest
+        paths.append(previous)
+    return paths
+
+
+def path_index(project_context: ProjectContext) -> PathTrie:
+    """Trie of context.paths for validator lookups, built once per context."""
+    cached = project_context._path_index
+    if cached is not None and cached[0] is project_context.paths:
+        return cached[1]
+    trie = PathTrie.from_paths(project_context.paths)
+    project_context._path_index = (project_context.paths, trie)
+    return trie
+
+
+def parse_structure(project_structure: str, format: str) -> PathTrie | None:
+    """Parse a tree, markdown or front-coded structure; None for formats the server does not read."""
+    if format == "tree":
+        return parse_tree(project_structure)
+    if format == "markdown":
+        return parse_markdown(project_structure)
+    if format == FRONT_CODED_FORMAT:
+        return PathTrie.from_paths(decode_paths(project_structure))
+    return None
+
+
+def resolve_structure(
+    project_structure: str,
+    format: str,
+    project_context: ProjectContext | None,
+) -> tuple[str, str, ProjectContext | None]:
+    """Fill context.paths from the structure when the client left them out.
+
+    Returns (project_structure, format, project_context) ready for generation. Tree and markdown text is
+    kept as sent; paths derived from it are marked, since it leaves out dotfiles and ignored directories.
+    A front-coded list is the full path list: it must parse and is rendered as a tree for the prompt.
+    Unknown formats and structures that do not parse are passed through unchanged.
+    """
+    if format == FRONT_CODED_FORMAT:
+        trie = PathTrie.from_paths(decode_paths(project_structure))
+        return trie.render_tree(), "tree", _with_paths(project_context, trie, derived=False)
+    if project_context is not None and project_context.paths:
+        return project_structure, format, project_context
+    try:
+        trie = parse_structure(project_structure, format)
+    except ValueError:
+        return project_structure, format, project_context
+    if trie is None:
+        return project_structure, format, project_context
+    return project_structure, format, _with_paths(project_context, trie, derived=True)
+
+
+def _with_paths(project_context: ProjectContext | None, trie: PathTrie, derived: bool) -> ProjectContext:
+    if project_context is None:
+        project_context = ProjectContext(paths=trie.paths())
+    elif not project_context.paths:
+        project_context = project_context.model_copy(update={"paths": trie.paths()})
+    else:
+        return project_context
+    project_context._paths_derived = derived
+    return project_context
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from app.core.settings import s
+from app.modules.generate.manifests import CHARS_PER_TOKEN
+from app.modules.generate.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class CachedRequest:
+    """What to send for one model call. `cached_tokens` overrides the provider's usage figure when set."""
+
+    contents: list[str]
+    config: dict[str, Any] = field(default_factory=dict)
+    cached_tokens: int | None = None
+
+
+class ContextCacheBackend(Protocol):
+    """Holds a prompt prefix for the duration of a request and tells the caller how to reference it."""
+
+    async def create(self, client: Any, model: str, prefix: str, ttl_seconds: int) -> str: ...
+
+    def request(self, handle: str, prefix: str, suffix: list[str]) -> CachedRequest: ...
+
+    async def delete(self, client: Any, handle: str) -> None: ...
+
+
+class GeminiContextCache:
+    """Explicit Gemini context cache: the prefix is uploaded once and later calls send only their suffix."""
+
+    async def create(self, client: Any, model: str, prefix: str, ttl_seconds: int) -> str:
+        cached = await client.aio.caches.create(model=model, config={"contents": [prefix], "ttl": f"{ttl_seconds}s"})
+        return cached.name
+
+    def request(self, handle: str, prefix: str, suffix: list[str]) -> CachedRequest:
+        return CachedRequest(contents=suffix, config={"cached_content": handle})
+
+    async def delete(self, client: Any, handle: str) -> None:
+        await client.aio.caches.delete(name=handle)
+
+
+class LocalContextCache:
+    """Stand-in for tests and local runs: sends the full prompt and counts the prefix as cached."""
+
+    def __init__(self) -> None:
+        self.prefixes: dict[str, str] = {}
+
+    async def create(self, client: Any, model: str, prefix: str, ttl_seconds: int) -> str:
+        handle = f"local/{uuid.uuid4().hex}"
+        self.prefixes[handle] = prefix
+        return handle
+
+    def request(self, handle: str, prefix: str, suffix: list[str]) -> CachedRequest:
+        return CachedRequest(contents=[self.prefixes[handle], *suffix], cached_tokens=len(prefix) // CHARS_PER_TOKEN)
+
+    async def delete(self, client: Any, handle: str) -> None:
+        self.prefixes.pop(handle, None)
+
+
+def build_backend(name: str) -> ContextCacheBackend | None:
+    if not name:
+        return None
+    if name == "gemini":
+        return GeminiContextCache()
+    if name == "local":
+        return LocalContextCache()
+    raise ValueError(f"Unknown prompt cache backend: {name}")
+
+
+backend = build_backend(s.prompt_cache)
+
+
+class PromptCache:
+    """The shared prompt prefix of one generation request and its cache handles, one per model."""
+
+    def __init__(self, backend: ContextCacheBackend, client: Any, prefix: str) -> None:
+        self.backend = backend
+        self.client = client
+        self.prefix = prefix
+        self._handles: dict[str, asyncio.Task[str | None]] = {}
+
+    async def _create(self, model: str) -> str | None:
+        try:
+            handle = await self.backend.create(self.client, model, self.prefix, s.prompt_cache_ttl_seconds)
+        except Exception:
+            # Caching is an optimisation: the call still works with the full prompt.
+            metrics.incr("prompt_cache.create_errors")
+            logger.warning("Failed to create prompt cache for %s", model, exc_info=True)
+            return None
+        metrics.incr("prompt_cache.created")
+        return handle
+
+    async def prepare(self, model: str, prompt: list[str]) -> CachedRequest:
+        """`prompt` is a list of segments; it uses the cache when its first segment is the shared prefix."""
+        if not prompt or prompt[0] != self.prefix:
+            metrics.incr("prompt_cache.bypassed")
+            return CachedRequest(contents=prompt)
+        task = self._handles.get(model)
+        if task is None:
+            # Concurrent candidates of the same model share one creation.
+            task = self._handles[model] = asyncio.ensure_future(self._create(model))
+        handle = await asyncio.shield(task)
+        if handle is None:
+            return CachedRequest(contents=prompt)
+        return self.backend.request(handle, self.prefix, prompt[1:])
+
+    async def close(self) -> None:
+        for task in self._handles.values():
+            if task.cancelled():
+                continue
+            handle = task.result() if task.done() else await task
+            if handle is None:
+                continue
+            try:
+                await self.backend.delete(self.client, handle)
+            except Exception:
+                # The provider drops it at the TTL anyway.
+                logger.warning("Failed to delete prompt cache %s", handle, exc_info=True)
+
+
+current_prompt_cache: ContextVar[PromptCache | None] = ContextVar("current_prompt_cache", default=None)
+
+# Keeps background deletions referenced until they finish.
+_closing: set[asyncio.Task] = set()
+
+
+@asynccontextmanager
+async def prompt_cache_scope(client: Any, prefix: str) -> AsyncIterator[PromptCache | None]:
+    """Model calls inside the block whose first prompt segment is `prefix` reference it through a context cache.
+
+    No-op when no backend is configured or the prefix is below the provider's minimum cacheable size.
+    """
+    if backend is None or len(prefix) // CHARS_PER_TOKEN < s.prompt_cache_min_tokens:
+        yield None
+        return
+    cache = PromptCache(backend, client, prefix)
+    token = current_prompt_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        current_prompt_cache.reset(token)
+        # Deleting costs a round trip the response should not wait for.
+        task = asyncio.create_task(cache.close())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
@@ -1,20 +1,228 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import time
 
-from app.modules.auth.dependencies import get_current_user_from_bearer
-from app.modules.generate.schemas import GenerateRequest, GenerateResponse
-from app.modules.generate.service import generate_docker_files
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-router = APIRouter(tags=["Generate"])
+from app.core.database import get_db
+from app.core.json_codec import ORJSONResponse, ORJSONRoute
+from app.core.settings import s
+from app.modules.analytics.history import writer as history_writer
+from app.modules.auth.dependencies import (
+    get_current_user_from_bearer,
+    get_rate_limited_user,
+    start_rate_limited_user,
+    user_key,
+)
+from app.modules.auth.services.rate_limits import rate_limiter
+from app.modules.generate.batch import stream_batch
+from app.modules.generate.budget import enforce_context_budget
+from app.modules.generate.context_store import remember_context, resolve_context_delta
+from app.modules.generate.deadline import parse_deadline, run_cancellable
+from app.modules.generate.history import record_generation, request_hash
+from app.modules.generate.incremental import regenerate_docker_files
+from app.modules.generate.metrics import metrics, tier_report
+from app.modules.generate.paths import resolve_structure
+from app.modules.generate.schemas import (
+    BatchGenerateRequest,
+    GenerateRequest,
+    GenerateResponse,
+    IncrementalGenerateRequest,
+    IncrementalGenerateResponse,
+    ProjectContext,
+    ValidateItem,
+    ValidateRequest,
+    ValidateResponse,
+    ValidateResult,
+)
+from app.modules.generate.service import (
+    PreparedGeneration,
+    pipeline_report,
+    prepare_generation,
+    run_generation,
+    validate_docker_files,
+)
+from app.modules.generate.similarity import similarity_report
+
+router = APIRouter(tags=["Generate"], default_response_class=ORJSONResponse, route_class=ORJSONRoute)
+
+
+def _request_context(body: GenerateRequest, user: dict) -> ProjectContext | None:
+    """The request's ProjectContext; a delta is resolved against the user's own context store."""
+    if body.project_context is None and body.project_context_delta is not None:
+        return resolve_context_delta(user_key(user), body.project_context_delta)
+    return body.project_context
+
+
+def _prepare_generate(body: GenerateRequest, project_context: ProjectContext | None) -> tuple[str, PreparedGeneration]:
+    """Request preprocessing that needs no auth: returns (request hash, prepared generation)."""
+    try:
+        project_structure, structure_format, project_context = resolve_structure(
+            body.project_structure, body.format or "tree", project_context
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    enforce_context_budget(project_context)
+    key = request_hash(
+        structure_format,
+        project_structure,
+        project_context.model_dump_json() if project_context is not None else "",
+    )
+    prepared = prepare_generation(
+        project_structure=project_structure,
+        format=structure_format,
+        project_context=project_context,
+        candidates=body.candidates,
+    )
+    return key, prepared
+
+
+def _timed_prepare(body: GenerateRequest) -> tuple[str, PreparedGeneration, float]:
+    started = time.perf_counter()
+    key, prepared = _prepare_generate(body, body.project_context)
+    return key, prepared, time.perf_counter() - started
+
+
+async def _overlap_auth(
+    auth: asyncio.Future[dict], body: GenerateRequest, db: AsyncSession
+) -> tuple[dict, str, PreparedGeneration]:
+    """Prepare in a worker thread while auth runs; auth errors win over preparation errors.
+
+    The generation is charged only once both have succeeded, so a request rejected by preprocessing
+    (400, 409, 413) does not use up the caller's rate limit or quota.
+    """
+    if body.project_context is None and body.project_context_delta is not None:
+        # A delta resolves against the caller's own context store, so it has to wait for the user.
+        user = await auth
+        key, prepared = await asyncio.to_thread(_prepare_generate, body, _request_context(body, user))
+        await rate_limiter.acquire(user, db)
+        return user, key, prepared
+    started = time.perf_counter()
+    auth_done: list[float] = []
+    auth.add_done_callback(lambda _: auth_done.append(time.perf_counter()))
+    preparing = asyncio.ensure_future(asyncio.to_thread(_timed_prepare, body))
+    await asyncio.wait([auth, preparing])
+    if auth.exception() is not None:
+        # Retrieve it so a failed preparation is not reported as never retrieved.
+        preparing.exception()
+    user = auth.result()
+    key, prepared, prepare_seconds = preparing.result()
+    await rate_limiter.acquire(user, db)
+    wall = time.perf_counter() - started
+    auth_seconds = auth_done[0] - started if auth_done else 0.0
+    metrics.incr("auth_overlap.requests")
+    metrics.observe("auth_overlap.auth_ms", auth_seconds * 1000)
+    metrics.observe("auth_overlap.prepare_ms", prepare_seconds * 1000)
+    metrics.observe("auth_overlap.saved_ms", max(0.0, auth_seconds + prepare_seconds - wall) * 1000)
+    return user, key, prepared
 
 
 @router.post("/generate", response_model=GenerateResponse)
 async def generate(
     body: GenerateRequest,
+    request: Request,
+    # Declared before auth so a malformed deadline is rejected before the rate limit is charged.
+    budget: float | None = Depends(parse_deadline),
+    auth: asyncio.Future[dict] = Depends(start_rate_limited_user),
+    db: AsyncSession = Depends(get_db),
+):
+    if s.generate_overlap_auth:
+        # Nothing below reaches the model before auth has succeeded.
+        user, key, prepared = await _overlap_auth(auth, body, db)
+    else:
+        # Already authenticated and charged by the dependency.
+        user = auth.result()
+        key, prepared = await asyncio.to_thread(_prepare_generate, body, _request_context(body, user))
+    if body.project_context is not None:
+        remember_context(user_key(user), body.project_context)
+    async with record_generation("generate", user, key) as recording:
+        result = await run_cancellable(request, run_generation(prepared, user_key(user)), budget)
+        recording.set_result(result.files, result.plan)
+    return GenerateResponse(files=result.files, plan=result.plan)
+
+
+@router.post("/generate/batch", summary="Generate for many projects; streams NDJSON per item")
+async def generate_batch(
+    body: BatchGenerateRequest,
+    user: dict = Depends(get_rate_limited_user),
+    db: AsyncSession = Depends(get_db),
+):
+    if len(body.items) > s.generate_batch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch is limited to {s.generate_batch_max_items} items",
+        )
+    if len(body.items) > 1:
+        # The dependency charged one generation and the per-minute bucket; the rest of the batch only
+        # counts against the daily quota.
+        await rate_limiter.acquire(user, db, cost=len(body.items) - 1, quota_only=True)
+    parallelism = min(body.parallelism or s.generate_batch_parallelism, s.generate_batch_parallelism)
+    return StreamingResponse(stream_batch(body.items, user, parallelism), media_type="application/x-ndjson")
+
+
+@router.post("/generate/incremental", response_model=IncrementalGenerateResponse)
+async def generate_incremental(
+    body: IncrementalGenerateRequest,
+    request: Request,
+    budget: float | None = Depends(parse_deadline),
+    user: dict = Depends(get_rate_limited_user),
+):
+    enforce_context_budget(body.changes, body.project_context)
+    async with record_generation("generate/incremental", user, request_hash(body.model_dump_json())) as recording:
+        files, regenerated = await run_cancellable(
+            request,
+            regenerate_docker_files(
+                files=body.files,
+                changes=body.changes,
+                plan=body.plan,
+                project_context=body.project_context,
+            ),
+            budget,
+        )
+        recording.set_result(files, body.plan)
+    return IncrementalGenerateResponse(files=files, regenerated=regenerated)
+
+
+def _validate_items(items: list[ValidateItem]) -> ValidateResponse:
+    results = []
+    for index, item in enumerate(items):
+        errors = validate_docker_files(item.files, item.project_context, item.plan)
+        results.append(ValidateResult(index=index, valid=not errors, errors=errors))
+    return ValidateResponse(valid=all(r.valid for r in results), results=results)
+
+
+@router.post("/validate", response_model=ValidateResponse, summary="Check Docker files locally, without the LLM")
+async def validate(
+    body: ValidateRequest,
     _user: dict = Depends(get_current_user_from_bearer),
 ):
-    files = generate_docker_files(
-        project_structure=body.project_structure,
-        format=body.format or "tree",
-        project_context=body.project_context,
-    )
-    return GenerateResponse(files=files)
+    if len(body.items) > s.validate_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Validation is limited to {s.validate_max_items} items per request",
+        )
+    started = time.perf_counter()
+    # CPU-bound regex work; keep the event loop free for other requests.
+    response = await asyncio.to_thread(_validate_items, body.items)
+    file_count = sum(len(item.files) for item in body.items)
+    metrics.incr("validate.requests")
+    metrics.incr("validate.files", file_count)
+    if file_count:
+        metrics.observe("validate.ms_per_file", (time.perf_counter() - started) * 1000 / file_count)
+    return response
+
+
+@router.get("/generate/metrics", summary="Generation pipeline metrics")
+async def generate_metrics(_user: dict = Depends(get_current_user_from_bearer)):
+    return {
+        "tiers": tier_report(),
+        "similarity": similarity_report(),
+        "pipeline": pipeline_report(),
+        "history": {
+            "written": history_writer.written,
+            "dropped": history_writer.dropped,
+            "write_errors": history_writer.write_errors,
+        },
+        **metrics.snapshot(),
+    }
@@ -0,0 +1,301 @@
+import json
+import math
+import posixpath
+import re
+import shlex
+from typing import Any
+
+from app.core.settings import s
+
+# Frameworks served by an async worker (uvicorn and friends): one process per CPU saturates it.
+ASYNC_FRAMEWORKS = ("fastapi", "starlette", "litestar", "quart", "sanic", "aiohttp")
+# WSGI frameworks under gunicorn sync workers: the usual (2 x CPUs) + 1 to cover blocking I/O.
+WSGI_FRAMEWORKS = ("django", "flask", "pyramid", "falcon", "bottle")
+
+_COMPOSE_KEY_RE = re.compile(r"^(?P<indent> *)(?P<key>[\"']?[\w.-]+[\"']?)\s*:(?:\s+(?P<value>.*?))?\s*$")
+_READY_CONDITIONS = ("service_healthy", "service_completed_successfully")
+
+
+def framework_workers(framework: str, cpus: float) -> int | None:
+    """Process count for a framework's server under a CPU limit; None when the runtime is not process-based."""
+    name = framework.lower()
+    cores = max(1, math.ceil(cpus))
+    if any(known in name for known in ASYNC_FRAMEWORKS):
+        return max(2, cores)
+    if any(known in name for known in WSGI_FRAMEWORKS):
+        return 2 * cores + 1
+    return None
+
+
+def apply_runtime_defaults(plan: dict[str, Any]) -> dict[str, Any]:
+    """Fill workers, limits and ulimits the model left out of a plan's services, in place."""
+    for service in plan.get("services", []):
+        if not isinstance(service, dict):
+            continue
+        cpus = service.get("cpus")
+        if not isinstance(cpus, int | float) or cpus <= 0:
+            cpus = service["cpus"] = s.generate_default_cpus
+        if not service.get("memory"):
+            service["memory"] = s.generate_default_memory
+        if not service.get("nofile"):
+            service["nofile"] = s.generate_default_nofile
+        workers = service.get("workers")
+        if not isinstance(workers, int) or workers < 1:
+            workers = framework_workers(str(service.get("framework", "")), cpus)
+            if workers is not None:
+                service["workers"] = workers
+    return plan
+
+
+def _command_tokens(command: str) -> list[str]:
+    command = command.strip()
+    if command.startswith("["):
+        try:
+            parts = json.loads(command)
+        except ValueError:
+            parts = None
+        if isinstance(parts, list):
+            command = " ".join(shlex.quote(str(part)) for part in parts)
+    try:
+        tokens = shlex.split(command)
+    except ValueError:
+        tokens = command.split()
+    # `sh -c "..."` hides the real command in one token.
+    flat: list[str] = []
+    for token in tokens:
+        flat.extend(token.split() if " " in token else [token])
+    return flat
+
+
+def _option(tokens: list[str], short: str | None, long: str) -> str | None:
+    for i, token in enumerate(tokens):
+        if token in (short, long):
+            return tokens[i + 1] if i + 1 < len(tokens) else ""
+        if token.startswith(long + "="):
+            return token.split("=", 1)[1]
+        if short and token.startswith(short) and token != short and not token.startswith("--"):
+            return token[len(short) :].lstrip("=")
+    return None
+
+
+def single_process_reason(command: str, concurrency_env: bool = False) -> str | None:
+    """Why a start command serves requests from one process or a development server; None when it does not.
+
+    `concurrency_env` means WEB_CONCURRENCY (read by gunicorn and uvicorn) or GUNICORN_CMD_ARGS is set.
+    """
+    tokens = _command_tokens(command)
+    names = {posixpath.basename(token) for token in tokens}
+    if "runserver" in tokens and any(token.endswith("manage.py") for token in tokens):
+        return "runs the Django development server (use gunicorn with -w)"
+    if "flask" in names and "run" in tokens:
+        return "runs the Flask development server (use gunicorn with -w)"
+    if "--reload" in tokens:
+        return "runs with --reload, a single development process"
+    if "gunicorn" in names:
+        workers = _option(tokens, "-w", "--workers")
+        if workers == "1" or (workers is None and not concurrency_env):
+            return "runs gunicorn with a single worker (set -w/--workers from the plan)"
+    elif "uvicorn" in names:
+        workers = _option(tokens, None, "--workers")
+        if workers == "1" or (workers is None and not concurrency_env):
+            return "runs uvicorn as a single process (set --workers from the plan)"
+    return None
+
+
+def _has_concurrency_env(text: str) -> bool:
+    return bool(re.search(r"\b(?:WEB_CONCURRENCY|GUNICORN_CMD_ARGS)\b", text))
+
+
+def _joined_lines(dockerfile: str) -> list[str]:
+    lines: list[str] = []
+    pending = ""
+    for line in dockerfile.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            continue
+        if stripped.endswith("\\"):
+            pending += stripped[:-1] + " "
+            continue
+        lines.append(pending + stripped)
+        pending = ""
+    if pending:
+        lines.append(pending)
+    return lines
+
+
+def validate_dockerfile_workers(path: str, dockerfile: str) -> list[str]:
+    """Flag a final stage whose ENTRYPOINT + CMD would serve from a single process."""
+    entrypoint = cmd = ""
+    concurrency_env = False
+    for line in _joined_lines(dockerfile):
+        match = re.match(r"(?i)^(FROM|ENTRYPOINT|CMD|ENV)\s+(.*)$", line)
+        if not match:
+            continue
+        instruction, args = match.group(1).upper(), match.group(2)
+        if instruction == "FROM":
+            # Only the last stage runs.
+            entrypoint = cmd = ""
+            concurrency_env = False
+        elif instruction == "ENTRYPOINT":
+            entrypoint = args
+        elif instruction == "CMD":
+            cmd = args
+        elif _has_concurrency_env(args):
+            concurrency_env = True
+    command = " ".join(" ".join(_command_tokens(part)) for part in (entrypoint, cmd) if part)
+    reason = single_process_reason(command, concurrency_env) if command else None
+    return [f"{path}: start command {reason}"] if reason else []
+
+
+def _blocks(lines: list[str]) -> dict[str, tuple[str, list[str]]]:
+    """Keys at the indentation of the first line: key -> (inline value, nested lines)."""
+    blocks: dict[str, tuple[str, list[str]]] = {}
+    indent: int | None = None
+    current: list[str] | None = None
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        depth = len(line) - len(line.lstrip(" "))
+        if indent is None:
+            indent = depth
+        if depth > indent:
+            if current is not None:
+                current.append(line)
+            continue
+        if depth < indent:
+            break
+        match = _COMPOSE_KEY_RE.match(line)
+        if match is None and current is not None and line.lstrip().startswith("- "):
+            # A sequence may sit at its key's own indentation.
+            current.append(line)
+            continue
+        if match is None:
+            current = None
+            continue
+        current = []
+        blocks[match["key"].strip("\"'")] = (match["value"] or "", current)
+    return blocks
+
+
+def compose_services(compose: str) -> dict[str, dict[str, tuple[str, list[str]]]]:
+    """Top-level services of a compose file with their keys; an indentation scan, not a YAML parser."""
+    top = _blocks(compose.splitlines())
+    if "services" not in top:
+        return {}
+    return {name: _blocks(lines) for name, (_, lines) in _blocks(top["services"][1]).items()}
+
+
+def _flow_list(value: str) -> list[str]:
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [item.strip().strip("\"'") for item in value[1:-1].split(",") if item.strip()]
+    return []
+
+
+def _dependencies(inline: str, lines: list[str]) -> dict[str, str | None]:
+    """depends_on entries -> their condition; None for the short syntax or a missing condition."""
+    if inline:
+        return dict.fromkeys(_flow_list(inline))
+    items = [line.strip() for line in lines if line.strip().startswith("- ")]
+    if items:
+        return {item[2:].strip().strip("\"'"): None for item in items}
+    dependencies: dict[str, str | None] = {}
+    for name, (_, nested) in _blocks(lines).items():
+        condition = _blocks(nested).get("condition")
+        dependencies[name] = condition[0].strip("\"'") if condition else None
+    return dependencies
+
+
+def _has_healthcheck(service: dict[str, tuple[str, list[str]]]) -> bool:
+    if "healthcheck" not in service:
+        return False
+    inline, lines = service["healthcheck"]
+    disabled = _blocks(lines).get("disable")
+    return not (disabled and disabled[0].lower() == "true") and bool(inline or lines)
+
+
+def _compose_command(value: tuple[str, list[str]] | None) -> str:
+    if value is None:
+        return ""
+    inline, lines = value
+    if inline.startswith("["):
+        items = _flow_list(inline)
+    elif inline:
+        return inline.strip("\"'")
+    else:
+        items = [line.strip()[2:].strip().strip("\"'") for line in lines if line.strip().startswith("- ")]
+    return " ".join(shlex.quote(item) for item in items)
+
+
+def _service_command(service: dict[str, tuple[str, list[str]]]) -> str:
+    return " ".join(part for part in map(_compose_command, (service.get("entrypoint"), service.get("command"))) if part)
+
+
+def _service_concurrency_env(service: dict[str, tuple[str, list[str]]]) -> bool:
+    environment = service.get("environment")
+    return environment is not None and _has_concurrency_env(" ".join([environment[0], *environment[1]]))
+
+
+def _build_dockerfile(service: dict[str, tuple[str, list[str]]]) -> str | None:
+    """Path of the Dockerfile a service builds, relative to the compose file; None without `build`."""
+    if "build" not in service:
+        return None
+    inline, lines = service["build"]
+    context, dockerfile = inline.strip("\"'"), "Dockerfile"
+    if not inline:
+        nested = _blocks(lines)
+        context = nested["context"][0].strip("\"'") if "context" in nested else "."
+        if "dockerfile" in nested:
+            dockerfile = nested["dockerfile"][0].strip("\"'")
+    return posixpath.normpath(posixpath.join(context or ".", dockerfile or "Dockerfile"))
+
+
+def compose_dockerfiles(path: str, compose: str) -> set[str]:
+    """Dockerfiles built by the services of a compose file, as paths relative to the project root."""
+    base = posixpath.dirname(path)
+    built = (_build_dockerfile(service) for service in compose_services(compose).values())
+    return {posixpath.normpath(posixpath.join(base, dockerfile)) for dockerfile in built if dockerfile is not None}
+
+
+def compose_managed_dockerfiles(path: str, compose: str) -> set[str]:
+    """Dockerfiles whose start is decided by the compose file: every service building one either overrides
+    its command or sets WEB_CONCURRENCY/GUNICORN_CMD_ARGS. validate_compose_runtime checks those instead."""
+    base = posixpath.dirname(path)
+    managed: dict[str, bool] = {}
+    for service in compose_services(compose).values():
+        dockerfile = _build_dockerfile(service)
+        if dockerfile is None:
+            continue
+        dockerfile = posixpath.normpath(posixpath.join(base, dockerfile))
+        covered = bool(_service_command(service)) or _service_concurrency_env(service)
+        managed[dockerfile] = managed.get(dockerfile, True) and covered
+    return {dockerfile for dockerfile, covered in managed.items() if covered}
+
+
+def validate_compose_runtime(path: str, compose: str) -> list[str]:
+    """Readiness gates on depends_on and multi-process start commands in a compose file."""
+    errors: list[str] = []
+    services = compose_services(compose)
+    for name, service in services.items():
+        depends_on = service.get("depends_on")
+        if depends_on is not None:
+            for dependency, condition in _dependencies(*depends_on).items():
+                if condition not in _READY_CONDITIONS:
+                    errors.append(
+                        f"{path}: service '{name}' depends on '{dependency}' without a readiness gate; "
+                        "use condition: service_healthy (service_completed_successfully for one-shot jobs)"
+                    )
+                elif (
+                    condition == "service_healthy"
+                    and dependency in services
+                    and not _has_healthcheck(services[dependency])
+                ):
+                    errors.append(
+                        f"{path}: service '{name}' waits for '{dependency}' to be healthy, but it has no healthcheck"
+                    )
+        command = _service_command(service)
+        if command:
+            reason = single_process_reason(command, _service_concurrency_env(service))
+            if reason:
+                errors.append(f"{path}: service '{name}' {reason}")
+    return errors
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+from typing import Any
+
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class ProjectContext(BaseModel):
@@ -8,11 +10,53 @@ class ProjectContext(BaseModel):
     entrypoints: list[str] = Field(default_factory=list)
     commands: list[str] = Field(default_factory=list)
 
+    # (paths list, PathTrie) built by paths.path_index; reused while `paths` is the same list.
+    _path_index: tuple[list[str], Any] | None = PrivateAttr(default=None)
+    # Set when `paths` were derived from a tree or markdown structure. Those leave out dotfiles and
+    # ignored directories, so COPY sources are not checked against them.
+    _paths_derived: bool = PrivateAttr(default=False)
+
+
+class ProjectContextDelta(BaseModel):
+    """ProjectContext sent as sha256 references to content the server has already seen."""
+
+    paths: list[str] | None = Field(default=None, description="Full path list; used when there is no base")
+    paths_base: str | None = Field(default=None, description="sha256 of a previously uploaded path set")
+    paths_added: list[str] = Field(default_factory=list)
+    paths_removed: list[str] = Field(default_factory=list)
+    manifests: dict[str, str] = Field(default_factory=dict, description="path -> sha256 of content")
+    snippets: dict[str, str] = Field(default_factory=dict, description="path -> sha256 of content")
+    blobs: dict[str, str] = Field(default_factory=dict, description="sha256 -> content the server may not have")
+    entrypoints: list[str] = Field(default_factory=list)
+    commands: list[str] = Field(default_factory=list)
+
 
 class GenerateRequest(BaseModel):
-    project_structure: str = Field(..., description="Project structure in tree or markdown format")
-    format: str = Field(default="tree", description="Format of structure: tree | markdown")
+    project_structure: str = Field(
+        ...,
+        description="Project structure in tree or markdown format, or a front-coded path list (format=paths)",
+    )
+    format: str = Field(default="tree", description="Format of structure: tree | markdown | paths")
     project_context: ProjectContext | None = None
+    project_context_delta: ProjectContextDelta | None = Field(
+        default=None,
+        description="Alternative to project_context: hashes plus changes; 409 lists hashes to resend",
+    )
+    candidates: int = Field(
+        default=1,
+        ge=1,
+        le=8,
+        description="Number of concurrent candidates; first valid one wins (1 = sequential)",
+    )
+
+
+class BatchGenerateRequest(BaseModel):
+    items: list[GenerateRequest] = Field(..., min_length=1)
+    parallelism: int | None = Field(
+        default=None,
+        ge=1,
+        description="Concurrent generations for this batch; capped by the server limit",
+    )
 
 
 class FileContent(BaseModel):
@@ -22,3 +66,43 @@ class FileContent(BaseModel):
 
 class GenerateResponse(BaseModel):
     files: list[FileContent]
+    plan: dict[str, Any] | None = Field(default=None, description="Execution plan; pass back to /generate/incremental")
+
+
+class ValidateItem(BaseModel):
+    files: list[FileContent] = Field(..., description="Dockerfiles and compose files to check")
+    project_context: ProjectContext | None = Field(
+        default=None,
+        description="Repo context; enables COPY source, Python version and compose env checks",
+    )
+    plan: dict[str, Any] | None = None
+
+
+class ValidateRequest(BaseModel):
+    items: list[ValidateItem] = Field(..., min_length=1)
+
+
+class ValidateResult(BaseModel):
+    index: int
+    valid: bool
+    errors: list[str]
+
+
+class ValidateResponse(BaseModel):
+    valid: bool
+    results: list[ValidateResult]
+
+
+class IncrementalGenerateRequest(BaseModel):
+    files: list[FileContent] = Field(..., description="Previously generated Docker files")
+    changes: ProjectContext = Field(..., description="Only the changed paths, manifests, snippets and entrypoints")
+    plan: dict[str, Any] | None = Field(default=None, description="Plan from the previous /generate response")
+    project_context: ProjectContext | None = Field(
+        default=None,
+        description="Optional full current context; enables COPY source checks during validation",
+    )
+
+
+class IncrementalGenerateResponse(BaseModel):
+    files: list[FileContent]
+    regenerated: list[str] = Field(default_factory=list)
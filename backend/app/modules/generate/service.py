@@ -1,18 +1,45 @@
+from __future__ import annotations
+
+import asyncio
 import json
+import posixpath
 import re
 import shlex
+import time
 from dataclasses import dataclass
-from typing import Any
+from functools import cache
+from typing import TYPE_CHECKING, Any
 
 from fastapi import HTTPException
-from google import genai
-from google.genai import errors as genai_errors
 
+from app.core.profiling import profile_stage
 from app.core.settings import s
+from app.core.tracing import span
+from app.modules.generate.budget import context_bytes, enforce_prompt_budget, utf8_len
+from app.modules.generate.deadline import has_budget_for
+from app.modules.generate.manifests import LOCKFILE_MANAGERS, summarize_lockfiles
+from app.modules.generate.metrics import generation_stats, metrics, record_model_call, record_validation
+from app.modules.generate.paths import PathTrie, path_index
+from app.modules.generate.prompt_cache import CachedRequest, current_prompt_cache, prompt_cache_scope
+from app.modules.generate.runtime import (
+    apply_runtime_defaults,
+    compose_managed_dockerfiles,
+    validate_compose_runtime,
+    validate_dockerfile_workers,
+)
 from app.modules.generate.schemas import FileContent, ProjectContext
+from app.modules.generate.similarity import SimilarMatch, lookup_similar, minhash, project_shingles
+from app.modules.generate.similarity import index as similarity_index
+from app.modules.generate.streaming import StreamingJsonObject
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import errors as genai_errors
 
-GEMINI_MODEL = "gemini-2.5-flash"
+MODEL_TIERS = ("fast", "strong")
 MAX_ATTEMPTS = 3
+CANDIDATE_MIN_TEMPERATURE = 0.1
+CANDIDATE_MAX_TEMPERATURE = 0.9
 
 PLAN_SCHEMA: dict[str, Any] = {
     "type": "object",
@@ -32,6 +59,11 @@ PLAN_SCHEMA: dict[str, Any] = {
                     "port": {"type": "integer"},
                     "needs_dockerfile": {"type": "boolean"},
                     "needs_compose": {"type": "boolean"},
+                    "workers": {"type": "integer"},
+                    "healthcheck": {"type": "string"},
+                    "cpus": {"type": "number"},
+                    "memory": {"type": "string"},
+                    "nofile": {"type": "integer"},
                 },
                 "required": [
                     "name",
@@ -68,31 +100,36 @@ FILES_SCHEMA: dict[str, Any] = {
     "required": ["files"],
 }
 
-_PLAN_PROMPT_TEMPLATE = """You are a senior DevOps assistant.
+FAST_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "plan": PLAN_SCHEMA,
+        "files": FILES_SCHEMA["properties"]["files"],
+    },
+    "required": ["plan", "files"],
+}
 
-Create a concise execution plan for Docker setup.
-Return JSON only, shaped by schema.
+# A prompt is a list of text segments, sent as separate parts of one message. Every prompt of a request
+# starts with the same prefix segment (static rules, then the project), so the provider can serve it from
+# a context cache, and it is the same string object in every prompt: the context is serialized once and
+# never copied per stage or repair round.
+Prompt = list[str]
 
-Project structure (format: {format}):
----
-{project_structure}
----
-
-Structured context:
-{context_json}
+_PROMPT_PREFIX_TEMPLATE = """You are a senior DevOps assistant.
+Return JSON only, shaped by schema.
 
 Rules for planning:
 1) Infer services from context and file paths, do not invent services that are not supported by files.
 2) Select realistic runtime command based on manifests/scripts/entrypoints.
 3) If context implies FastAPI app factory, include uvicorn command with --factory.
 4) If Python project uses uv lock workflow, prefer uv-based runtime command.
-5) Keep notes short and technical.
-"""
-
-_FILES_PROMPT_TEMPLATE = """You are a senior DevOps assistant.
+5) For each long-running service set production runtime settings: workers (server processes for the
+   framework, e.g. uvicorn --workers / gunicorn -w), healthcheck (a command that succeeds once the service
+   accepts requests), cpus and memory limits (e.g. "512M") and nofile (open files ulimit).
+6) Keep notes short and technical.
 
-Generate ONLY the Docker-related files needed to build and run this project.
-Return JSON only, shaped by schema.
+Hard rules for Docker files:
+{hard_rules}
 
 Project structure (format: {format}):
 ---
@@ -101,12 +138,25 @@ Project structure (format: {format}):
 
 Structured context:
 {context_json}
+"""
 
+_PLAN_TASK = """
+Task: create a concise execution plan for Docker setup.
+"""
+
+_FILES_TASK_TEMPLATE = """
 Execution plan:
 {plan_json}
 
-Hard rules:
-1) Use only output paths: Dockerfile, */Dockerfile, docker-compose.yaml, docker-compose.yml.
+Task: generate ONLY the Docker-related files needed to build and run this project, following the plan.
+"""
+
+_FAST_TASK = """
+Task: this is a small project. Plan the Docker setup, then generate ONLY the Docker-related files it needs.
+Return "plan" first, then "files" that follow it.
+"""
+
+FILES_HARD_RULES = """1) Use only output paths: Dockerfile, */Dockerfile, docker-compose.yaml, docker-compose.yml.
 2) All COPY/ADD sources in Dockerfiles must exist in context.paths.
 3) Never include `version:` in docker-compose.
 4) If Dockerfile uses `uv sync`, runtime command must use `uv run ...` OR explicit `.venv/bin/...` binary.
@@ -114,23 +164,43 @@ Hard rules:
 6) If plan or context indicates FastAPI factory usage, run uvicorn with --factory.
 7) Escape newlines correctly in JSON strings.
 8) Service environment variables must match project settings usage. If settings/database code uses postgres_host/postgres_user/postgres_password/postgres_db, then provide POSTGRES_* vars to app and migrations services (not only DATABASE_URL).
-"""
+9) Run web servers with the plan's workers (uvicorn --workers N, gunicorn -w N); never a development server (--reload, flask run, manage.py runserver).
+10) In compose, give every service that others depend on a healthcheck and use the long depends_on syntax with condition: service_healthy (service_completed_successfully for one-shot jobs such as migrations).
+11) In compose, set deploy.resources.limits (cpus, memory) and ulimits.nofile for long-running services from the plan."""
 
-_REPAIR_PROMPT_TEMPLATE = """Fix the previous response so that it satisfies all constraints.
-Return only JSON by schema: {{"files": [{{"path": "...", "content": "..."}}, ...]}}
+# Appended to the original files prompt, which keeps the shared prefix in front.
+_REPAIR_PROMPT_TEMPLATE = """
+The previous response failed validation.
 
-Original file-generation prompt:
+Previous model output:
 ---
-{original_prompt}
+{previous_output}
 ---
 
 Validation errors to fix:
 {errors}
 
-Previous model output:
----
-{previous_output}
----
+Task: fix the previous response so that it satisfies all constraints.
+Return only JSON by schema: {{"files": [{{"path": "...", "content": "..."}}, ...]}}
+"""
+
+_COMPACT_REPAIR_PROMPT_TEMPLATE = """You are a senior DevOps assistant.
+
+Some generated Docker files failed validation. Return JSON only, shaped by schema,
+containing ONLY the files listed below, each rewritten in full with the errors fixed.
+Other generated files are already valid and are kept as-is.
+
+Project summary:
+{summary}
+
+Hard rules:
+{hard_rules}
+
+Validation errors to fix:
+{errors}
+
+Files to fix:
+{files_json}
 """
 
 
@@ -140,6 +210,19 @@ class ValidationOutcome:
     errors: list[str]
 
 
+@dataclass(slots=True)
+class StreamedFiles:
+    files: list[FileContent]
+    # Set when the stream was abandoned: errors no later file could have fixed.
+    fatal_errors: list[str]
+
+
+@dataclass(slots=True)
+class GenerationResult:
+    files: list[FileContent]
+    plan: dict[str, Any]
+
+
 class GeminiAuthError(Exception):
     """Fatal Gemini auth/permission error. Must not be retried."""
 
@@ -155,32 +238,200 @@ def _extract_json(text: str) -> dict[str, Any]:
     return data
 
 
-def _call_gemini_json(
+def _model_for_tier(tier: str) -> str:
+    if tier not in MODEL_TIERS:
+        # A configuration error: the same call would fail again, so it must not be retried.
+        raise HTTPException(
+            status_code=503,
+            detail=f"Unknown model tier configured: {tier}",
+        )
+    return s.gemini_strong_model if tier == "strong" else s.gemini_fast_model
+
+
+def _usage_tokens(response: Any) -> tuple[int, int, int]:
+    """(prompt, output, cached) tokens; the prompt count includes the cached ones."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0, 0, 0
+    return (
+        usage.prompt_token_count or 0,
+        usage.candidates_token_count or 0,
+        getattr(usage, "cached_content_token_count", None) or 0,
+    )
+
+
+def _prompt_bytes(prompt: Prompt) -> int:
+    # Avoids encoding (and so copying) the whole prompt just to measure it.
+    return sum(len(part) if part.isascii() else len(part.encode()) for part in prompt)
+
+
+async def _prepare_request(model: str, prompt: Prompt) -> CachedRequest:
+    prompt_cache = current_prompt_cache.get()
+    if prompt_cache is None:
+        return CachedRequest(contents=prompt)
+    return await prompt_cache.prepare(model, prompt)
+
+
+def _generation_config(temperature: float, response_schema: dict[str, Any], request: CachedRequest) -> dict[str, Any]:
+    return {
+        "temperature": temperature,
+        "response_mime_type": "application/json",
+        "response_json_schema": response_schema,
+        **request.config,
+    }
+
+
+async def _call_gemini_json(
     client: genai.Client,
-    prompt: str,
+    prompt: Prompt,
     response_schema: dict[str, Any],
     temperature: float = 0.1,
+    tier: str = "fast",
+    stage: str = "files",
 ) -> dict[str, Any]:
-    try:
-        response = client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=prompt,
-            config={
-                "temperature": temperature,
-                "response_mime_type": "application/json",
-                "response_json_schema": response_schema,
-            },
-        )
-    except genai_errors.ClientError as exc:
-        if exc.code in {401, 403}:
-            raise GeminiAuthError(_format_gemini_auth_error(exc)) from exc
-        raise
-    raw = response.text
+    from google.genai import errors as genai_errors
+
+    model = _model_for_tier(tier)
+    started = time.perf_counter()
+    request = await _prepare_request(model, prompt)
+    with span(
+        "gemini.call",
+        model=model,
+        tier=tier,
+        stage=stage,
+        temperature=temperature,
+        prompt_bytes=_prompt_bytes(prompt),
+    ) as call_span:
+        try:
+            with profile_stage(f"gemini.{stage}"):
+                response = await client.aio.models.generate_content(
+                    model=model,
+                    contents=request.contents,
+                    config=_generation_config(temperature, response_schema, request),
+                )
+        except genai_errors.ClientError as exc:
+            record_model_call(tier, stage, time.perf_counter() - started, 0, 0, ok=False)
+            if exc.code in {401, 403}:
+                raise GeminiAuthError(_format_gemini_auth_error(exc)) from exc
+            raise
+        except Exception:
+            record_model_call(tier, stage, time.perf_counter() - started, 0, 0, ok=False)
+            raise
+        prompt_tokens, output_tokens, cached_tokens = _usage_tokens(response)
+        if request.cached_tokens is not None:
+            cached_tokens = request.cached_tokens
+        raw = response.text
+        call_span.set_attribute("prompt_tokens", prompt_tokens)
+        call_span.set_attribute("cached_tokens", cached_tokens)
+        call_span.set_attribute("output_tokens", output_tokens)
+        call_span.set_attribute("response_bytes", len(raw.encode()) if raw else 0)
+    record_model_call(
+        tier,
+        stage,
+        time.perf_counter() - started,
+        prompt_tokens,
+        output_tokens,
+        ok=bool(raw),
+        cached_tokens=cached_tokens,
+    )
     if not raw:
         raise ValueError("Gemini returned empty response")
     return _extract_json(raw)
 
 
+async def _stream_gemini_files(
+    client: genai.Client,
+    prompt: Prompt,
+    project_context: ProjectContext | None,
+    tier: str = "fast",
+    stage: str = "files",
+) -> StreamedFiles:
+    """Streamed files call: each files[] item is parsed as soon as it closes.
+
+    An item with an error no later file can settle (see _fatal_file_errors) dooms the whole response, so
+    the stream is abandoned there. Everything else, compose-dependent checks included, is left to the
+    caller's validation of the full set.
+    """
+    from google.genai import errors as genai_errors
+
+    model = _model_for_tier(tier)
+    started = time.perf_counter()
+    request = await _prepare_request(model, prompt)
+    parser = StreamingJsonObject("files")
+    files: list[FileContent] = []
+    fatal_errors: list[str] = []
+    project_paths = _copy_source_paths(project_context)
+    min_python = _extract_min_python(project_context.manifests if project_context else {})
+    prompt_tokens = output_tokens = cached_tokens = response_bytes = 0
+    with span(
+        "gemini.call",
+        model=model,
+        tier=tier,
+        stage=stage,
+        temperature=0.1,
+        prompt_bytes=_prompt_bytes(prompt),
+        streamed=True,
+    ) as call_span:
+        try:
+            with profile_stage(f"gemini.{stage}"):
+                stream = await client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=request.contents,
+                    config=_generation_config(0.1, FILES_SCHEMA, request),
+                )
+                try:
+                    async for chunk in stream:
+                        if getattr(chunk, "usage_metadata", None) is not None:
+                            prompt_tokens, output_tokens, cached_tokens = _usage_tokens(chunk)
+                        text = chunk.text or ""
+                        response_bytes += len(text.encode())
+                        for item in _parse_files({"files": parser.feed(text)}):
+                            if not files:
+                                metrics.observe("stream.first_file_seconds", time.perf_counter() - started)
+                            files.append(item)
+                            path = item.path.strip()
+                            fatal_errors = _fatal_file_errors(path, item.content, project_paths, min_python)
+                            if fatal_errors:
+                                break
+                        if fatal_errors:
+                            break
+                finally:
+                    await stream.aclose()
+        except genai_errors.ClientError as exc:
+            record_model_call(tier, stage, time.perf_counter() - started, 0, 0, ok=False)
+            if exc.code in {401, 403}:
+                raise GeminiAuthError(_format_gemini_auth_error(exc)) from exc
+            raise
+        except Exception:
+            record_model_call(tier, stage, time.perf_counter() - started, 0, 0, ok=False)
+            raise
+        if request.cached_tokens is not None:
+            cached_tokens = request.cached_tokens
+        call_span.set_attribute("prompt_tokens", prompt_tokens)
+        call_span.set_attribute("cached_tokens", cached_tokens)
+        call_span.set_attribute("output_tokens", output_tokens)
+        call_span.set_attribute("response_bytes", response_bytes)
+        call_span.set_attribute("aborted", bool(fatal_errors))
+    record_model_call(
+        tier,
+        stage,
+        time.perf_counter() - started,
+        prompt_tokens,
+        output_tokens,
+        ok=bool(response_bytes),
+        cached_tokens=cached_tokens,
+    )
+    if fatal_errors:
+        metrics.incr("stream.aborted")
+        return StreamedFiles(files=files, fatal_errors=fatal_errors)
+    if not response_bytes:
+        raise ValueError("Gemini returned empty response")
+    parser.close()
+    if not parser.stream_seen:
+        raise ValueError("Gemini response missing 'files' array")
+    return StreamedFiles(files=files, fatal_errors=[])
+
+
 def _format_gemini_auth_error(exc: genai_errors.ClientError) -> str:
     raw = str(exc)
     if "reported as leaked" in raw:
@@ -191,6 +442,11 @@ def _format_gemini_auth_error(exc: genai_errors.ClientError) -> str:
 
 
 def _context_to_json(project_context: ProjectContext | None) -> str:
+    with profile_stage("context_json"):
+        return _serialize_context(project_context)
+
+
+def _serialize_context(project_context: ProjectContext | None) -> str:
     if project_context is None:
         return json.dumps(
             {"paths": [], "manifests": {}, "entrypoints": [], "commands": []},
@@ -200,6 +456,12 @@ def _context_to_json(project_context: ProjectContext | None) -> str:
     return project_context.model_dump_json(indent=2, exclude_none=True)
 
 
+def prompt_context(project_context: ProjectContext | None) -> ProjectContext | None:
+    if not s.generate_summarize_lockfiles:
+        return project_context
+    return summarize_lockfiles(project_context)
+
+
 def _parse_files(data: dict[str, Any]) -> list[FileContent]:
     files = data.get("files")
     if not isinstance(files, list):
@@ -227,40 +489,82 @@ def _validate(
     files: list[FileContent],
     project_context: ProjectContext | None,
     plan: dict[str, Any] | None = None,
+) -> ValidationOutcome:
+    with profile_stage("validate"), span("validate", files=len(files)) as validate_span:
+        outcome = _run_validators(files, project_context, plan)
+        validate_span.set_attribute("error_count", len(outcome.errors))
+        return outcome
+
+
+def _run_validators(
+    files: list[FileContent],
+    project_context: ProjectContext | None,
+    plan: dict[str, Any] | None,
 ) -> ValidationOutcome:
     errors: list[str] = []
-    project_paths = set(project_context.paths) if project_context else set()
+    project_paths = _copy_source_paths(project_context)
     expect_factory = _has_factory_signal(project_context, plan)
     min_python = _extract_min_python(project_context.manifests if project_context else {})
+    # Dockerfiles started by compose with its own command or concurrency settings: their CMD does not run.
+    compose_managed: set[str] = set()
+    for file in files:
+        if file.path.strip().lower() in {"docker-compose.yaml", "docker-compose.yml"}:
+            compose_managed |= compose_managed_dockerfiles(file.path.strip(), file.content)
     for file in files:
         path = file.path.strip()
+        content = file.content
+        errors.extend(_fatal_file_errors(path, content, project_paths, min_python))
         if not _is_allowed_output_path(path):
-            errors.append(f"Unsupported output path: {path}")
             continue
         lower_path = path.lower()
-        content = file.content
         if lower_path in {"docker-compose.yaml", "docker-compose.yml"} and re.search(r"(?im)^\s*version\s*:", content):
             errors.append(f"{path}: remove obsolete 'version' from compose file")
         if lower_path in {"docker-compose.yaml", "docker-compose.yml"}:
             errors.extend(_validate_compose_env_contract(path, content, project_context))
+            errors.extend(validate_compose_runtime(path, content))
         if path == "Dockerfile" or path.endswith("/Dockerfile"):
             if "uv sync" in content and not _has_uv_runtime(content):
                 errors.append(f"{path}: uses 'uv sync' but runtime command is not 'uv run ...' or '.venv/bin/...'")
             if expect_factory and "uvicorn" in content and "--factory" not in content:
                 errors.append(f"{path}: expected FastAPI factory run with '--factory'")
-            if min_python is not None:
-                base = _extract_python_base_version(content)
-                if base is not None and base < min_python:
-                    errors.append(
-                        f"{path}: python base image {base[0]}.{base[1]} is lower than requires-python >= {min_python[0]}.{min_python[1]}"
-                    )
-            if project_paths:
-                errors.extend(_validate_copy_sources(path, content, project_paths))
+            if path not in compose_managed:
+                errors.extend(validate_dockerfile_workers(path, content))
     if not files:
         errors.append("Model returned empty files list")
     return ValidationOutcome(files=files, errors=errors)
 
 
+def _copy_source_paths(project_context: ProjectContext | None) -> PathTrie:
+    """Paths COPY sources are checked against: empty, so nothing is checked, unless the client listed them."""
+    if project_context is None or project_context._paths_derived:
+        return PathTrie()
+    return path_index(project_context)
+
+
+def _fatal_file_errors(
+    path: str,
+    content: str,
+    project_paths: PathTrie,
+    min_python: tuple[int, int] | None,
+) -> list[str]:
+    """Errors no other file of the response can settle: the output path, the Python base image against
+    requires-python and COPY sources. Checks that a compose file can override are left to _run_validators."""
+    if not _is_allowed_output_path(path):
+        return [f"Unsupported output path: {path}"]
+    errors: list[str] = []
+    if path == "Dockerfile" or path.endswith("/Dockerfile"):
+        if min_python is not None:
+            base = _extract_python_base_version(content)
+            if base is not None and base < min_python:
+                errors.append(
+                    f"{path}: python base image {base[0]}.{base[1]} is lower than "
+                    f"requires-python >= {min_python[0]}.{min_python[1]}"
+                )
+        if project_paths:
+            errors.extend(_validate_copy_sources(path, content, project_paths))
+    return errors
+
+
 def _is_allowed_output_path(path: str) -> bool:
     if not path or path.startswith("/") or ".." in path.split("/"):
         return False
@@ -299,7 +603,7 @@ def _extract_python_base_version(dockerfile: str) -> tuple[int, int] | None:
     return None
 
 
-def _validate_copy_sources(path: str, dockerfile: str, project_paths: set[str]) -> list[str]:
+def _validate_copy_sources(path: str, dockerfile: str, project_paths: PathTrie) -> list[str]:
     errors: list[str] = []
     for line in dockerfile.splitlines():
         stripped = line.strip()
@@ -320,9 +624,6 @@ def _validate_copy_sources(path: str, dockerfile: str, project_paths: set[str])
                 continue
             if normalized in project_paths:
                 continue
-            dir_prefix = normalized.rstrip("/") + "/"
-            if any(p.startswith(dir_prefix) for p in project_paths):
-                continue
             errors.append(f"{path}: COPY/ADD source '{source}' not found in project context")
     return errors
 
@@ -380,32 +681,271 @@ def _project_uses_postgres_settings(project_context: ProjectContext) -> bool:
     return all(key in merged for key in ("postgres_host", "postgres_user", "postgres_password", "postgres_db"))
 
 
-def _build_repair_prompt(original_prompt: str, previous_output: str, errors: list[str]) -> str:
-    error_lines = "\n".join(f"- {err}" for err in errors)
-    return _REPAIR_PROMPT_TEMPLATE.format(
-        original_prompt=original_prompt,
-        errors=error_lines,
-        previous_output=previous_output,
-    )
+def _apply_local_fixes(files: list[FileContent]) -> list[FileContent]:
+    fixed: list[FileContent] = []
+    for file in files:
+        path = file.path.strip()
+        content = file.content
+        if path.lower() in {"docker-compose.yaml", "docker-compose.yml"}:
+            content = re.sub(r"(?m)^version\s*:.*(?:\n|$)", "", content)
+        fixed.append(FileContent(path=path, content=content))
+    return fixed
 
 
-def _generate_plan(
+def _validate_with_local_fixes(
+    files: list[FileContent],
+    project_context: ProjectContext | None,
+    plan: dict[str, Any] | None,
+) -> ValidationOutcome:
+    outcome = _validate(files, project_context, plan=plan)
+    if outcome.errors:
+        # Cheap deterministic fixes first; escalate to the repair tier only if they are not enough.
+        outcome = _validate(_apply_local_fixes(files), project_context, plan=plan)
+    return outcome
+
+
+def _candidate_temperatures(count: int) -> list[float]:
+    if count <= 1:
+        return [CANDIDATE_MIN_TEMPERATURE]
+    step = (CANDIDATE_MAX_TEMPERATURE - CANDIDATE_MIN_TEMPERATURE) / (count - 1)
+    return [round(CANDIDATE_MIN_TEMPERATURE + i * step, 2) for i in range(count)]
+
+
+async def _sample_candidates(
     client: genai.Client,
-    project_structure: str,
-    format: str,
-    context_json: str,
-) -> dict[str, Any]:
-    prompt = _PLAN_PROMPT_TEMPLATE.format(
+    prompt: Prompt,
+    count: int,
+    project_context: ProjectContext | None,
+    plan: dict[str, Any],
+) -> tuple[list[FileContent] | None, list[FileContent], list[str]]:
+    """Request `count` candidates concurrently; the first one passing validation wins.
+
+    Returns (files, closest_files, errors). When no candidate passes, files is None and
+    the files/errors of the closest candidate are returned for the repair round.
+    """
+    tier = s.gemini_files_tier
+
+    async def sample(temperature: float) -> dict[str, Any]:
+        return await _call_gemini_json(
+            client=client,
+            prompt=prompt,
+            response_schema=FILES_SCHEMA,
+            temperature=temperature,
+            tier=tier,
+            stage="files",
+        )
+
+    tasks = [asyncio.create_task(sample(t)) for t in _candidate_temperatures(count)]
+    metrics.incr("candidates.requested", len(tasks))
+    best_files: list[FileContent] = []
+    best_errors: list[str] = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                data = await next_done
+                files = _parse_files(data)
+            except (GeminiAuthError, HTTPException):
+                raise
+            except Exception as exc:
+                metrics.incr("candidates.failed")
+                if not best_errors:
+                    best_errors = [f"Generation error: {exc!s}"]
+                continue
+            outcome = _validate_with_local_fixes(files, project_context, plan)
+            record_validation(tier, "files", passed=not outcome.errors, errors=outcome.errors)
+            if not outcome.errors:
+                metrics.incr("candidates.won")
+                return outcome.files, [], []
+            if not best_files or len(outcome.errors) < len(best_errors):
+                best_files = outcome.files
+                best_errors = outcome.errors
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            metrics.incr("candidates.cancelled", len(pending))
+            await asyncio.gather(*pending, return_exceptions=True)
+    return None, best_files, best_errors
+
+
+def files_to_json(files: list[FileContent]) -> str:
+    return json.dumps({"files": [f.model_dump() for f in files]}, ensure_ascii=False, indent=2)
+
+
+def _failing_paths(files: list[FileContent], errors: list[str]) -> set[str] | None:
+    """Paths the errors point to, or None if some error is not tied to an existing file."""
+    known = {f.path.strip() for f in files}
+    failing: set[str] = set()
+    for err in errors:
+        path, sep, _ = err.partition(": ")
+        if not sep or path not in known:
+            return None
+        failing.add(path)
+    return failing or None
+
+
+def _errors_for_paths(files: list[FileContent], errors: list[str], paths: set[str]) -> list[str]:
+    """Errors in `paths` plus those not tied to an existing file; errors in the other files are dropped."""
+    known = {f.path.strip() for f in files}
+    kept = []
+    for err in errors:
+        path, sep, _ = err.partition(": ")
+        if not sep or path not in known or path in paths:
+            kept.append(err)
+    return kept
+
+
+def repair_summary(plan: dict[str, Any], project_context: ProjectContext | None) -> str:
+    lines = [f"Stack: {plan.get('stack', '')}"]
+    for service in plan.get("services", []):
+        if not isinstance(service, dict):
+            continue
+        line = f"- {service.get('name')} at '{service.get('path')}'"
+        stack = "/".join(str(service[key]) for key in ("language", "framework") if service.get(key))
+        if stack:
+            line += f": {stack}"
+        if service.get("runtime_command"):
+            line += f", run `{service['runtime_command']}`"
+        if service.get("port"):
+            line += f", port {service['port']}"
+        if service.get("workers"):
+            line += f", {service['workers']} workers"
+        if service.get("healthcheck"):
+            line += f", healthcheck `{service['healthcheck']}`"
+        limits = [f"{key} {service[key]}" for key in ("cpus", "memory", "nofile") if service.get(key)]
+        if limits:
+            line += ", limits: " + " ".join(limits)
+        lines.append(line)
+    if project_context is not None:
+        min_python = _extract_min_python(project_context.manifests)
+        if min_python is not None:
+            lines.append(f"requires-python >= {min_python[0]}.{min_python[1]}")
+        if project_context.manifests:
+            lines.append("Manifests: " + ", ".join(sorted(project_context.manifests)))
+        top_level = sorted({p.split("/", 1)[0] + ("/" if "/" in p else "") for p in project_context.paths})
+        if top_level:
+            lines.append("Top-level paths (COPY sources must exist): " + ", ".join(top_level))
+    return "\n".join(lines)
+
+
+def _merge_patched_files(files: list[FileContent], patched: list[FileContent]) -> list[FileContent]:
+    by_path = {f.path.strip(): f for f in files}
+    for file in patched:
+        by_path[file.path.strip()] = file
+    return list(by_path.values())
+
+
+def _build_next_repair_prompt(
+    base_prompt: Prompt,
+    files: list[FileContent],
+    errors: list[str],
+    plan: dict[str, Any],
+    project_context: ProjectContext | None,
+    round_no: int,
+) -> tuple[Prompt, bool]:
+    """Build the next repair prompt. Returns (prompt, is_patch): patch prompts cover only failing files."""
+    with span("repair_prompt", attempt=round_no, error_count=len(errors)) as repair_span:
+        prompt, is_patch = _compose_repair_prompt(base_prompt, files, errors, plan, project_context, round_no)
+        repair_span.set_attribute("compact", is_patch)
+        repair_span.set_attribute("prompt_bytes", _prompt_bytes(prompt))
+        return prompt, is_patch
+
+
+def _compose_repair_prompt(
+    base_prompt: Prompt,
+    files: list[FileContent],
+    errors: list[str],
+    plan: dict[str, Any],
+    project_context: ProjectContext | None,
+    round_no: int,
+) -> tuple[Prompt, bool]:
+    previous_output = files_to_json(files)
+    failing = _failing_paths(files, errors) if s.generate_compact_repair else None
+    if failing is None:
+        prompt = _build_repair_prompt(base_prompt, previous_output, errors)
+        metrics.observe(f"repair.round{round_no}.prompt_chars", sum(map(len, prompt)))
+        return prompt, False
+
+    error_lines = "\n".join(f"- {err}" for err in errors)
+    prompt = _COMPACT_REPAIR_PROMPT_TEMPLATE.format(
+        summary=repair_summary(plan, project_context),
+        hard_rules=FILES_HARD_RULES,
+        errors=error_lines,
+        files_json=files_to_json([f for f in files if f.path.strip() in failing]),
+    )
+    full_chars = len(_REPAIR_PROMPT_TEMPLATE) + sum(map(len, base_prompt)) + len(previous_output) + len(error_lines)
+    metrics.incr("repair.compact")
+    metrics.observe(f"repair.round{round_no}.prompt_chars", len(prompt))
+    metrics.observe(f"repair.round{round_no}.prompt_reduction", 1 - len(prompt) / full_chars)
+    return [prompt], True
+
+
+def _build_repair_prompt(original_prompt: Prompt, previous_output: str, errors: list[str]) -> Prompt:
+    with span("build_repair_prompt", error_count=len(errors)) as repair_span:
+        error_lines = "\n".join(f"- {err}" for err in errors)
+        prompt = [
+            *original_prompt,
+            _REPAIR_PROMPT_TEMPLATE.format(errors=error_lines, previous_output=previous_output),
+        ]
+        repair_span.set_attribute("prompt_bytes", _prompt_bytes(prompt))
+        return prompt
+
+
+def _prompt_prefix(project_structure: str, format: str, context_json: str) -> str:
+    return _PROMPT_PREFIX_TEMPLATE.format(
+        hard_rules=FILES_HARD_RULES,
         format=format,
         project_structure=project_structure,
         context_json=context_json,
     )
-    return _call_gemini_json(
-        client=client,
-        prompt=prompt,
-        response_schema=PLAN_SCHEMA,
-        temperature=0.1,
-    )
+
+
+def _files_prompt(prefix: str, plan: dict[str, Any]) -> Prompt:
+    return [prefix, _FILES_TASK_TEMPLATE.format(plan_json=json.dumps(plan, ensure_ascii=False, indent=2))]
+
+
+async def _generate_plan(client: genai.Client, prefix: str) -> dict[str, Any]:
+    prompt = [prefix, _PLAN_TASK]
+    with span("plan", prompt_bytes=_prompt_bytes(prompt)) as plan_span:
+        plan = await _call_gemini_json(
+            client=client,
+            prompt=prompt,
+            response_schema=PLAN_SCHEMA,
+            temperature=0.1,
+            tier=s.gemini_plan_tier,
+            stage="plan",
+        )
+        plan_span.set_attribute("stack", plan.get("stack"))
+        plan_span.set_attribute("services", len(plan.get("services") or []))
+        return plan
+
+
+def _manifest_paths(project_context: ProjectContext) -> list[str]:
+    # Lockfiles travel with their manifest and do not add a service.
+    return [path for path in project_context.manifests if posixpath.basename(path) not in LOCKFILE_MANAGERS]
+
+
+def _pipeline_mode(project_context: ProjectContext | None, candidates: int) -> tuple[str, str]:
+    """Pick "fast" (plan and files in one call) or "two_stage"; the second value is the reason."""
+    if not s.generate_fast_mode_enabled:
+        return "two_stage", "disabled"
+    if project_context is None:
+        return "two_stage", "no_context"
+    if candidates > 1:
+        return "two_stage", "candidates"
+    manifests = _manifest_paths(project_context)
+    if len(manifests) > s.generate_fast_mode_max_manifests:
+        return "two_stage", "manifests"
+    # Every directory holding a manifest is a potential service.
+    services = {posixpath.dirname(path.strip().removeprefix("./")) for path in manifests}
+    if len(services) > s.generate_fast_mode_max_services:
+        return "two_stage", "services"
+    if len(project_context.entrypoints) > s.generate_fast_mode_max_services:
+        return "two_stage", "entrypoints"
+    if len(project_context.paths) > s.generate_fast_mode_max_paths:
+        return "two_stage", "paths"
+    return "fast", "simple"
 
 
 def _is_valid_plan(data: dict[str, Any]) -> bool:
@@ -413,85 +953,437 @@ def _is_valid_plan(data: dict[str, Any]) -> bool:
     return isinstance(services, list) and all(isinstance(item, dict) for item in services)
 
 
-def generate_docker_files(
-    project_structure: str,
-    format: str,
-    project_context: ProjectContext | None = None,
-) -> list[FileContent]:
+@cache
+def _client_for_key(api_key: str) -> genai.Client:
+    # google.genai takes about half a second to import: keep it off the app import path
+    # and share one client (and its connection pool) across requests.
+    from google import genai
+
+    return genai.Client(api_key=api_key)
+
+
+def get_client() -> genai.Client:
     if not s.gemini_api_key or s.gemini_api_key == "GEMINI_API_KEY":
         raise HTTPException(
             status_code=503,
             detail="Gemini API key is not configured",
         )
+    return _client_for_key(s.gemini_api_key)
+
+
+def warm_up_client() -> None:
+    """Import google.genai and create the shared client before the first request needs it."""
+    get_client()
+
+
+def validate_docker_files(
+    files: list[FileContent],
+    project_context: ProjectContext | None,
+    plan: dict[str, Any] | None = None,
+) -> list[str]:
+    """Run every local check without calling the model; returns the validation errors."""
+    return _validate(files, project_context, plan=plan).errors
+
+
+def warm_up_validators() -> None:
+    """Run the validators once on a small sample so their regexes are compiled before the first request."""
+    context = ProjectContext(
+        paths=["pyproject.toml", "app/main.py", "app/core/settings.py"],
+        manifests={"pyproject.toml": '[project]\nrequires-python = ">=3.12"\n'},
+        snippets={"app/core/settings.py": "postgres_host: str = 'db'"},
+    )
+    files = [
+        FileContent(
+            path="Dockerfile",
+            content='FROM python:3.12-slim\nCOPY pyproject.toml ./\nRUN uv sync\nCMD ["uv", "run", "app"]\n',
+        ),
+        FileContent(path="docker-compose.yaml", content="version: '3'\nservices:\n  app:\n    build: .\n"),
+    ]
+    _validate_with_local_fixes(files, context, {"stack": "python", "services": []})
+
+
+async def run_files_attempts(
+    client: genai.Client,
+    base_prompt: Prompt,
+    plan: dict[str, Any],
+    project_context: ProjectContext | None,
+    prompt: Prompt | None = None,
+    previous_files: list[FileContent] | None = None,
+    is_patch: bool = False,
+    errors: list[str] | None = None,
+    first_attempt: int = 1,
+    stage: str = "files",
+    target_paths: set[str] | None = None,
+) -> list[FileContent]:
+    """Generate/repair loop: call the model, validate, build the next repair prompt.
+
+    With is_patch=True the model response is merged into previous_files instead of replacing them.
+    With target_paths every response is merged, files outside target_paths are dropped from it, and only
+    errors in target files (or not tied to a file) count; the other files still reach the validators, so
+    cross-file checks against them keep working.
+    """
+    prompt = prompt or base_prompt
+    previous_files = previous_files or []
+    errors = errors or []
+    tier = s.gemini_repair_tier if stage == "repair" else s.gemini_files_tier
+
+    for attempt in range(first_attempt, MAX_ATTEMPTS + 1):
+        if errors and not has_budget_for(tier, stage):
+            metrics.incr("deadline.skipped_attempts")
+            raise HTTPException(
+                status_code=504,
+                detail=f"Generation deadline too close for another attempt: {'; '.join(errors)}",
+            )
+        with span("files.attempt", attempt=attempt, stage=stage, tier=tier, patch=is_patch) as attempt_span:
+            streamed = None
+            try:
+                if s.generate_stream_files:
+                    streamed = await _stream_gemini_files(client, prompt, project_context, tier=tier, stage=stage)
+                    files = streamed.files
+                else:
+                    data = await _call_gemini_json(
+                        client=client,
+                        prompt=prompt,
+                        response_schema=FILES_SCHEMA,
+                        temperature=0.1,
+                        tier=tier,
+                        stage=stage,
+                    )
+                    files = _parse_files(data)
+            except GeminiAuthError as exc:
+                raise HTTPException(
+                    status_code=502,
+                    detail=str(exc),
+                ) from exc
+            except HTTPException:
+                raise
+            except Exception as exc:
+                errors = [f"Generation error: {exc!s}"]
+                attempt_span.set_attribute("error_count", len(errors))
+                prompt = _build_repair_prompt(base_prompt, "{}", errors)
+                is_patch = False
+                stage, tier = "repair", s.gemini_repair_tier
+                continue
+
+            if target_paths is not None:
+                # Only the targets may change; everything else is returned as it was.
+                files = _merge_patched_files(previous_files, [f for f in files if f.path.strip() in target_paths])
+            elif is_patch:
+                files = _merge_patched_files(previous_files, files)
+            if streamed is not None and streamed.fatal_errors:
+                errors = streamed.fatal_errors
+                record_validation(tier, stage, passed=False, errors=errors)
+                attempt_span.set_attribute("error_count", len(errors))
+                attempt_span.set_attribute("aborted", True)
+                previous_files = files
+                if is_patch or target_paths is not None:
+                    # Files the cut-short patch never reached keep their previous content.
+                    prompt, is_patch = _build_next_repair_prompt(
+                        base_prompt, previous_files, errors, plan, project_context, attempt
+                    )
+                else:
+                    # The output was cut short, so a patch of the failing files would lose the files never
+                    # received: ask for the full set again.
+                    prompt = _build_repair_prompt(base_prompt, files_to_json(files), errors)
+                stage, tier = "repair", s.gemini_repair_tier
+                continue
+            outcome = _validate_with_local_fixes(files, project_context, plan)
+            if target_paths is not None:
+                outcome.errors = _errors_for_paths(outcome.files, outcome.errors, target_paths)
+            record_validation(tier, stage, passed=not outcome.errors, errors=outcome.errors)
+            attempt_span.set_attribute("error_count", len(outcome.errors))
+            if not outcome.errors:
+                return outcome.files
+
+            errors = outcome.errors
+            previous_files = outcome.files
+            prompt, is_patch = _build_next_repair_prompt(
+                base_prompt, previous_files, errors, plan, project_context, attempt
+            )
+            stage, tier = "repair", s.gemini_repair_tier
+
+    raise HTTPException(
+        status_code=502,
+        detail=f"Gemini produced invalid docker config after {MAX_ATTEMPTS} attempts: {'; '.join(errors)}",
+    )
 
-    client = genai.Client(api_key=s.gemini_api_key)
-    context_json = _context_to_json(project_context)
 
+async def _generate_fast(client: genai.Client, prefix: str, project_context: ProjectContext) -> GenerationResult | None:
+    """One model call for plan and files; repairs reuse the regular loop.
+
+    Returns None when the response has no usable plan, so the caller can fall back to two stages.
+    """
+    prompt = [prefix, _FAST_TASK]
+    tier = s.gemini_files_tier
     try:
-        plan = _generate_plan(
+        data = await _call_gemini_json(
             client=client,
-            project_structure=project_structure,
-            format=format,
-            context_json=context_json,
+            prompt=prompt,
+            response_schema=FAST_SCHEMA,
+            temperature=0.1,
+            tier=tier,
+            stage="fast",
         )
+        plan = data.get("plan")
+        files = _parse_files(data)
     except GeminiAuthError as exc:
         raise HTTPException(
             status_code=502,
             detail=str(exc),
         ) from exc
-    except Exception as exc:
+    except HTTPException:
+        raise
+    except Exception:
+        return None
+    if not isinstance(plan, dict) or not _is_valid_plan(plan):
+        return None
+    apply_runtime_defaults(plan)
+
+    outcome = _validate_with_local_fixes(files, project_context, plan)
+    record_validation(tier, "fast", passed=not outcome.errors, errors=outcome.errors)
+    if not outcome.errors:
+        return GenerationResult(files=outcome.files, plan=plan)
+
+    # Repairs start from the regular files prompt with the inline plan filled in.
+    base_prompt = _files_prompt(prefix, plan)
+    prompt, is_patch = _build_next_repair_prompt(base_prompt, outcome.files, outcome.errors, plan, project_context, 1)
+    files = await run_files_attempts(
+        client,
+        base_prompt,
+        plan,
+        project_context,
+        prompt=prompt,
+        previous_files=outcome.files,
+        is_patch=is_patch,
+        errors=outcome.errors,
+        first_attempt=2,
+        stage="repair",
+    )
+    return GenerationResult(files=files, plan=plan)
+
+
+def pipeline_report() -> dict[str, Any]:
+    """Fast vs two-stage decisions and the median latency of each, to judge the heuristic."""
+    fast = metrics.percentile("pipeline.fast.seconds", 0.5)
+    two_stage = metrics.percentile("pipeline.two_stage.seconds", 0.5)
+    return {
+        "fast": metrics.counter("pipeline.fast"),
+        "two_stage": metrics.counter("pipeline.two_stage"),
+        "fast_fallbacks": metrics.counter("pipeline.fast_fallback"),
+        "fast_p50_seconds": fast,
+        "two_stage_p50_seconds": two_stage,
+        "estimated_saving_seconds": round(two_stage - fast, 4) if fast is not None and two_stage is not None else None,
+        # /generate with generate_overlap_auth: latency hidden by authenticating while preparing (cache misses).
+        "auth_overlap_requests": metrics.counter("auth_overlap.requests"),
+        "auth_overlap_saved_p50_ms": metrics.percentile("auth_overlap.saved_ms", 0.5),
+    }
+
+
+def _plan_fits(plan: dict[str, Any], project_context: ProjectContext) -> bool:
+    """A borrowed plan is usable only if every service directory exists in this project."""
+    project_paths = path_index(project_context)
+    for service in plan.get("services", []):
+        service_dir = str(service.get("path", "")).strip().removeprefix("./").strip("/")
+        if service_dir not in {"", "."} and not project_paths.is_dir(service_dir):
+            return False
+    return True
+
+
+def _mark_cache_hit(kind: str) -> None:
+    stats = generation_stats.get()
+    if stats is not None:
+        stats.cache = kind
+
+
+async def _generate_files(
+    client: genai.Client,
+    base_prompt: Prompt,
+    plan: dict[str, Any],
+    project_context: ProjectContext | None,
+    candidates: int,
+) -> list[FileContent]:
+    candidates = min(candidates, s.generate_max_candidates)
+    if candidates <= 1:
+        return await run_files_attempts(client, base_prompt, plan, project_context)
+
+    try:
+        files, closest_files, errors = await _sample_candidates(
+            client=client,
+            prompt=base_prompt,
+            count=candidates,
+            project_context=project_context,
+            plan=plan,
+        )
+    except GeminiAuthError as exc:
         raise HTTPException(
             status_code=502,
-            detail=f"Gemini plan generation failed: {exc!s}",
+            detail=str(exc),
         ) from exc
+    if files is not None:
+        return files
+    if closest_files:
+        prompt, is_patch = _build_next_repair_prompt(base_prompt, closest_files, errors, plan, project_context, 1)
+    else:
+        prompt, is_patch = _build_repair_prompt(base_prompt, "{}", errors), False
+    return await run_files_attempts(
+        client,
+        base_prompt,
+        plan,
+        project_context,
+        prompt=prompt,
+        previous_files=closest_files,
+        is_patch=is_patch,
+        errors=errors,
+        first_attempt=2,
+        stage="repair",
+    )
 
-    if not _is_valid_plan(plan):
-        raise HTTPException(
-            status_code=502,
-            detail="Gemini returned invalid plan structure",
+
+@dataclass(slots=True)
+class PreparedGeneration:
+    """Everything computed before the first model call.
+
+    Preparing makes no network calls, charges nothing and does not depend on the caller, so it may run
+    before the request is authenticated. The similarity lookup is scoped to the user and happens later.
+    """
+
+    project_context: ProjectContext | None
+    candidates: int
+    prefix: str = ""
+    signature: tuple[int, ...] = ()
+
+
+def prepare_generation(
+    project_structure: str,
+    format: str,
+    project_context: ProjectContext | None = None,
+    candidates: int = 1,
+) -> PreparedGeneration:
+    """CPU-only part of a generation: context serialization, prompt assembly and the similarity signature."""
+    summarized = prompt_context(project_context)
+    fixed_bytes = utf8_len(_PROMPT_PREFIX_TEMPLATE) + utf8_len(project_structure)
+    if summarized is not None:
+        # The context's own bytes are a lower bound for its JSON: reject before serializing it.
+        enforce_prompt_budget(fixed_bytes + context_bytes(summarized), estimated=True)
+    context_json = _context_to_json(summarized)
+    enforce_prompt_budget(fixed_bytes + utf8_len(context_json))
+    prepared = PreparedGeneration(project_context=project_context, candidates=candidates)
+    if project_context is not None and s.similarity_cache_enabled:
+        with profile_stage("similarity"):
+            prepared.signature = minhash(project_shingles(project_context))
+    prepared.prefix = _prompt_prefix(project_structure, format, context_json)
+    # From here on the prefix is the only copy of the serialized context.
+    del context_json
+    return prepared
+
+
+def _reuse_similar(prepared: PreparedGeneration, owner: str) -> tuple[SimilarMatch | None, GenerationResult | None]:
+    """The owner's nearest validated project, and its files when they pass validation against this one."""
+    with profile_stage("similarity"):
+        match = lookup_similar(owner, prepared.signature)
+    if match is None or match.score < s.similarity_result_threshold:
+        return match, None
+    # Near-identical project: the cached files only need to pass validation against the new paths.
+    outcome = _validate_with_local_fixes(match.files, prepared.project_context, match.plan)
+    if outcome.errors:
+        metrics.incr("similarity.result_rejected")
+        return match, None
+    metrics.incr("similarity.result_hits")
+    _mark_cache_hit("result")
+    return match, GenerationResult(files=outcome.files, plan=match.plan)
+
+
+async def run_generation(prepared: PreparedGeneration, owner: str | None = None) -> GenerationResult:
+    """Model calls for a prepared generation; the caller must have authenticated the request.
+
+    `owner` (the user id) scopes the similarity cache; without one the cache is neither read nor filled.
+    """
+    match = None
+    if owner is not None and prepared.signature:
+        match, cached = _reuse_similar(prepared, owner)
+        if cached is not None:
+            return cached
+    client = get_client()
+    async with prompt_cache_scope(client, prepared.prefix):
+        return await _run_pipeline(
+            client,
+            prepared.prefix,
+            prepared.project_context,
+            prepared.candidates,
+            match,
+            (owner, prepared.signature) if owner is not None else None,
         )
 
-    plan_json = json.dumps(plan, ensure_ascii=False, indent=2)
-    base_prompt = _FILES_PROMPT_TEMPLATE.format(
-        format=format,
-        project_structure=project_structure,
-        context_json=context_json,
-        plan_json=plan_json,
-    )
-    prompt = base_prompt
-    errors: list[str] = []
 
-    for _ in range(MAX_ATTEMPTS):
+async def generate_docker_files(
+    project_structure: str,
+    format: str,
+    project_context: ProjectContext | None = None,
+    candidates: int = 1,
+    owner: str | None = None,
+) -> GenerationResult:
+    prepared = prepare_generation(project_structure, format, project_context, candidates)
+    return await run_generation(prepared, owner)
+
+
+async def _run_pipeline(
+    client: genai.Client,
+    prefix: str,
+    project_context: ProjectContext | None,
+    candidates: int,
+    match: SimilarMatch | None,
+    cache_key: tuple[str, tuple[int, ...]] | None,
+) -> GenerationResult:
+    started = time.perf_counter()
+    mode = None
+    if match is not None and _plan_fits(match.plan, project_context):
+        metrics.incr("similarity.plan_hits")
+        _mark_cache_hit("plan")
+        plan = match.plan
+    else:
+        if match is not None:
+            metrics.incr("similarity.plan_rejected")
+        mode, reason = _pipeline_mode(project_context, candidates)
+        metrics.incr(f"pipeline.{mode}")
+        metrics.incr(f"pipeline.{mode}.{reason}")
+        if mode == "fast":
+            with span("fast_mode") as fast_span:
+                result = await _generate_fast(client, prefix, project_context)
+                fast_span.set_attribute("fallback", result is None)
+            if result is not None:
+                metrics.observe("pipeline.fast.seconds", time.perf_counter() - started)
+                if cache_key is not None:
+                    similarity_index.add(*cache_key, result.plan, result.files)
+                return result
+            metrics.incr("pipeline.fast_fallback")
+            mode = "fast_fallback"
         try:
-            data = _call_gemini_json(
-                client=client,
-                prompt=prompt,
-                response_schema=FILES_SCHEMA,
-                temperature=0.1,
-            )
-            files = _parse_files(data)
+            plan = await _generate_plan(client=client, prefix=prefix)
         except GeminiAuthError as exc:
             raise HTTPException(
                 status_code=502,
                 detail=str(exc),
             ) from exc
+        except HTTPException:
+            raise
         except Exception as exc:
-            errors = [f"Generation error: {exc!s}"]
-            prompt = _build_repair_prompt(base_prompt, "{}", errors)
-            continue
-
-        outcome = _validate(files, project_context, plan=plan)
-        if not outcome.errors:
-            return outcome.files
+            raise HTTPException(
+                status_code=502,
+                detail=f"Gemini plan generation failed: {exc!s}",
+            ) from exc
 
-        errors = outcome.errors
-        prompt = _build_repair_prompt(
-            base_prompt,
-            json.dumps(data, ensure_ascii=False, indent=2),
-            errors,
-        )
+        if not _is_valid_plan(plan):
+            raise HTTPException(
+                status_code=502,
+                detail="Gemini returned invalid plan structure",
+            )
 
-    raise HTTPException(
-        status_code=502,
-        detail=f"Gemini produced invalid docker config after {MAX_ATTEMPTS} attempts: {'; '.join(errors)}",
-    )
+    apply_runtime_defaults(plan)
+    base_prompt = _files_prompt(prefix, plan)
+    files = await _generate_files(client, base_prompt, plan, project_context, candidates)
+    if mode is not None:
+        metrics.observe(f"pipeline.{mode}.seconds", time.perf_counter() - started)
+    # Only validated results reach this point, so they are safe to offer to the owner's similar projects.
+    if cache_key is not None:
+        similarity_index.add(*cache_key, plan, files)
+    return GenerationResult(files=files, plan=plan)
@@ -0,0 +1,177 @@
+import copy
+import hashlib
+import posixpath
+import random
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.settings import s
+from app.modules.generate.manifests import LOCKFILE_MANAGERS
+from app.modules.generate.metrics import metrics
+from app.modules.generate.schemas import FileContent, ProjectContext
+
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SKELETON_DEPTH = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)  # fixed seed: signatures must be comparable across restarts of the same build
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+@dataclass(slots=True)
+class SimilarMatch:
+    score: float
+    plan: dict[str, Any]
+    files: list[FileContent]
+
+
+def _normalize_line(line: str) -> str:
+    # Whitespace and case only: versions pick base images and build steps, so they stay.
+    return " ".join(line.strip().lower().split())
+
+
+def _content_shingles(prefix: str, name: str, content: str) -> set[str]:
+    shingles: set[str] = set()
+    for line in content.splitlines():
+        line = _normalize_line(line)
+        if len(line) > 2:
+            shingles.add(f"{prefix}:{name}:{line}")
+    return shingles
+
+
+def project_shingles(project_context: ProjectContext) -> set[str]:
+    """Features that decide the Docker layout: manifests and snippets (versions included), entrypoints,
+    commands and the directory skeleton."""
+    shingles: set[str] = set()
+    for path, content in project_context.manifests.items():
+        name = posixpath.basename(path)
+        shingles.add(f"manifest:{path}")
+        if name in LOCKFILE_MANAGERS:
+            # Lockfiles only mirror the manifest; their size would drown every other feature.
+            continue
+        shingles |= _content_shingles("m", name, content)
+    shingles.update(f"entry:{entry.strip().lower()}" for entry in project_context.entrypoints)
+    shingles.update(f"cmd:{_normalize_line(command)}" for command in project_context.commands)
+    for path, content in project_context.snippets.items():
+        shingles.add(f"snippet:{path}")
+        shingles |= _content_shingles("s", path, content)
+    for path in project_context.paths:
+        parts = path.strip().removeprefix("./").split("/")[:-1][:SKELETON_DEPTH]
+        for depth in range(1, len(parts) + 1):
+            shingles.add("dir:" + "/".join(parts[:depth]))
+    return shingles
+
+
+def minhash(shingles: set[str]) -> tuple[int, ...]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for shingle in shingles
+    ]
+    if not hashes:
+        return ()
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def estimate_similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    if not left or not right:
+        return 0.0
+    return sum(1 for a, b in zip(left, right) if a == b) / NUM_PERM
+
+
+def _bands(signature: tuple[int, ...]) -> list[tuple[int, tuple[int, ...]]]:
+    return [(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]) for band in range(LSH_BANDS)]
+
+
+class SimilarityIndex:
+    """MinHash/LSH index of projects whose generated files passed validation, bounded by entry count.
+
+    Entries are partitioned by owner (the user id): a lookup only ever sees its owner's projects. Plans are
+    copied in and out, so callers may modify what they get.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._lock = threading.Lock()
+        # (owner, signature) -> (plan, files), least recently used first.
+        self._entries: OrderedDict[tuple[str, tuple[int, ...]], tuple[dict[str, Any], list[FileContent]]] = (
+            OrderedDict()
+        )
+        self._buckets: dict[tuple[str, int, tuple[int, ...]], set[tuple[int, ...]]] = {}
+        self.max_entries = max_entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, owner: str, signature: tuple[int, ...], plan: dict[str, Any], files: list[FileContent]) -> None:
+        if not signature or self.max_entries <= 0:
+            return
+        entry = (copy.deepcopy(plan), list(files))
+        with self._lock:
+            if (owner, signature) in self._entries:
+                self._entries.move_to_end((owner, signature))
+            else:
+                for band, rows in _bands(signature):
+                    self._buckets.setdefault((owner, band, rows), set()).add(signature)
+            self._entries[(owner, signature)] = entry
+            while len(self._entries) > self.max_entries:
+                (evicted_owner, evicted), _ = self._entries.popitem(last=False)
+                self._drop_buckets(evicted_owner, evicted)
+
+    def _drop_buckets(self, owner: str, signature: tuple[int, ...]) -> None:
+        for band, rows in _bands(signature):
+            bucket = self._buckets.get((owner, band, rows))
+            if bucket is not None:
+                bucket.discard(signature)
+                if not bucket:
+                    del self._buckets[(owner, band, rows)]
+
+    def nearest(self, owner: str, signature: tuple[int, ...]) -> SimilarMatch | None:
+        if not signature:
+            return None
+        with self._lock:
+            candidates: set[tuple[int, ...]] = set()
+            for band, rows in _bands(signature):
+                candidates.update(self._buckets.get((owner, band, rows), ()))
+            best = max(candidates, key=lambda other: estimate_similarity(signature, other), default=None)
+            if best is None:
+                return None
+            self._entries.move_to_end((owner, best))
+            plan, files = self._entries[(owner, best)]
+        return SimilarMatch(score=estimate_similarity(signature, best), plan=copy.deepcopy(plan), files=list(files))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+
+index = SimilarityIndex(max_entries=s.similarity_cache_max_entries)
+
+
+def lookup_similar(owner: str, signature: tuple[int, ...]) -> SimilarMatch | None:
+    """Nearest validated project of the same owner at or above the plan-reuse threshold; records score and
+    hit/miss metrics."""
+    metrics.incr("similarity.lookups")
+    match = index.nearest(owner, signature)
+    if match is not None:
+        metrics.observe("similarity.best_score", match.score)
+    if match is None or match.score < s.similarity_plan_threshold:
+        metrics.incr("similarity.misses")
+        return None
+    return match
+
+
+def similarity_report() -> dict[str, Any]:
+    lookups = metrics.counter("similarity.lookups")
+    result_hits = metrics.counter("similarity.result_hits")
+    plan_hits = metrics.counter("similarity.plan_hits")
+    return {
+        "entries": len(index),
+        "plan_threshold": s.similarity_plan_threshold,
+        "result_threshold": s.similarity_result_threshold,
+        "result_hit_rate": round(result_hits / lookups, 4) if lookups else 0.0,
+        "plan_hit_rate": round(plan_hits / lookups, 4) if lookups else 0.0,
+    }
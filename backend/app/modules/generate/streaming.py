@@ -0,0 +1,117 @@
+import json
+from typing import Any
+
+_WHITESPACE = " \t\r\n"
+
+
+class StreamingJsonObject:
+    """Incremental parser for a single JSON object that arrives in chunks.
+
+    Top-level members are decoded as soon as their value closes. Items of the array under `stream_key`
+    are decoded and returned one by one instead of being collected, so only the value currently being
+    received is buffered. Each character is scanned once: a token spanning chunks is kept as the list of
+    its pieces and joined once, when it closes.
+    """
+
+    def __init__(self, stream_key: str) -> None:
+        self.stream_key = stream_key
+        self.members: dict[str, Any] = {}
+        self.done = False
+        self.stream_seen = False
+        self._parts: list[str] = []  # pieces of the token in progress from earlier chunks
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._expect = "key"  # position inside the top-level object: key, colon, value or comma
+        self._key: str | None = None
+        self._in_stream_array = False
+        self._mark: int | None = None  # start of the token being captured, in the current chunk
+        self._kind: str | None = None  # key, string, scalar or container
+        self._value_depth = 0
+
+    def feed(self, chunk: str) -> list[Any]:
+        """Consume the next chunk; returns the stream_key items completed by it."""
+        items: list[Any] = []
+        buf = chunk
+        for i in range(len(buf)):
+            if self.done:
+                break
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._kind == "key":
+                        self._key = json.loads(self._token(buf, i + 1))
+                        self._mark = self._kind = None
+                        self._expect = "colon"
+                    elif self._kind == "string":
+                        self._complete(self._token(buf, i + 1), items)
+                continue
+            if self._kind == "scalar" and (c in ",}]" or c in _WHITESPACE):
+                self._complete(self._token(buf, i), items)
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+            if c in _WHITESPACE:
+                continue
+            at_value = self._mark is None and (
+                (self._depth == 1 and self._expect == "value") or (self._depth == 2 and self._in_stream_array)
+            )
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect == "key":
+                    self._mark, self._kind = i, "key"
+                elif at_value:
+                    self._mark, self._kind, self._value_depth = i, "string", self._depth
+            elif c in "{[":
+                if at_value and self._depth == 1 and c == "[" and self._key == self.stream_key:
+                    self._in_stream_array = self.stream_seen = True
+                elif at_value:
+                    self._mark, self._kind, self._value_depth = i, "container", self._depth
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._kind == "container" and self._depth == self._value_depth:
+                    self._complete(self._token(buf, i + 1), items)
+                elif self._in_stream_array and self._depth == 1:
+                    self._in_stream_array = False
+                    self._expect = "comma"
+                elif self._depth == 0:
+                    self.done = True
+            elif self._depth == 1 and c == ":" and self._expect == "colon":
+                self._expect = "value"
+            elif self._depth == 1 and c == ",":
+                self._expect = "key"
+            elif at_value and c not in ",:":
+                self._mark, self._kind, self._value_depth = i, "scalar", self._depth
+        if self._mark is not None:
+            # Keep only the token in progress; it continues at the start of the next chunk.
+            self._parts.append(buf[self._mark :])
+            self._mark = 0
+        return items
+
+    def _token(self, buf: str, end: int) -> str:
+        """Text of the token in progress, ending at `end` in the current chunk."""
+        text = "".join(self._parts) + buf[self._mark : end] if self._parts else buf[self._mark : end]
+        self._parts.clear()
+        return text
+
+    def _complete(self, text: str, items: list[Any]) -> None:
+        value = json.loads(text)
+        if self._in_stream_array and self._value_depth == 2:
+            items.append(value)
+        else:
+            self.members[self._key] = value
+            self._expect = "comma"
+        self._mark = self._kind = None
+
+    def close(self) -> None:
+        if not self.done:
+            raise ValueError("Model output ended before the JSON object was complete")
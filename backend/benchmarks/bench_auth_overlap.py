@@ -0,0 +1,74 @@
+"""Latency hidden by overlapping auth with /generate preprocessing, on the cache-miss path.
+
+Auth is simulated as a CLI-token lookup taking AUTH_MS (two queries plus the rate-limit check against
+Postgres); preprocessing is the real thing: context delta resolution, structure parsing, hashing,
+serialization and prompt assembly. Serial runs auth first, as the plain dependency does; overlapped runs
+the router's generate_overlap_auth path. Model calls are not part of either.
+
+Run from backend/: uv run python -m benchmarks.bench_auth_overlap
+"""
+
+import asyncio
+import statistics
+import time
+
+from app.core.settings import s
+from app.modules.generate.router import _overlap_auth, _prepare_generate
+from app.modules.generate.schemas import GenerateRequest, ProjectContext
+
+ROUNDS = 30
+AUTH_MS = (2.0, 5.0, 15.0)
+SIZES = (200, 3000, 20000)
+
+
+def build_request(paths: int) -> GenerateRequest:
+    files = [f"svc{i % 7}/app/module_{i}.py" for i in range(paths)] + ["svc0/pyproject.toml"]
+    context = ProjectContext(
+        paths=files,
+        manifests={"svc0/pyproject.toml": '[project]\nname = "svc0"\nrequires-python = ">=3.12"\n'},
+        snippets={f"svc{i}/app/settings.py": "database_url: str = 'sqlite://'\n" * 40 for i in range(7)},
+        entrypoints=["svc0/app/main.py"],
+        commands=["uv run uvicorn app.main:main --factory"],
+    )
+    return GenerateRequest(project_structure="\n".join(files), format="tree", project_context=context)
+
+
+async def _auth(seconds: float) -> dict:
+    await asyncio.sleep(seconds)
+    return {"id": "00000000-0000-0000-0000-000000000000", "sub": "bench@example.com"}
+
+
+async def _serial(body: GenerateRequest, auth_seconds: float) -> None:
+    await _auth(auth_seconds)
+    _prepare_generate(body, body.project_context)
+
+
+async def _overlapped(body: GenerateRequest, auth_seconds: float) -> None:
+    await _overlap_auth(asyncio.ensure_future(_auth(auth_seconds)), body, db=None)
+
+
+async def _median_ms(run, body: GenerateRequest, auth_seconds: float) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        await run(body, auth_seconds)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def main() -> None:
+    # Every round must take the cache-miss path; the rate-limit check is part of the simulated auth time.
+    s.similarity_cache_enabled = False
+    s.rate_limit_enabled = False
+    print(f"{'paths':>6} {'auth ms':>8} {'serial ms':>10} {'overlap ms':>11} {'saved ms':>9}")
+    for paths in SIZES:
+        body = build_request(paths)
+        _prepare_generate(body, body.project_context)  # warm-up
+        for auth_ms in AUTH_MS:
+            serial = await _median_ms(_serial, body, auth_ms / 1000)
+            overlapped = await _median_ms(_overlapped, body, auth_ms / 1000)
+            print(f"{paths:>6} {auth_ms:>8.1f} {serial:>10.2f} {overlapped:>11.2f} {serial - overlapped:>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""Wire size and parse time of a large /generate request, with and without compression and orjson.
+
+Run from backend/: uv run python -m benchmarks.bench_compression
+"""
+
+import gzip
+import json
+import random
+import time
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app.core.compression import _decompress, zstd
+from app.modules.generate.schemas import GenerateRequest, GenerateResponse
+
+ROUNDS = 20
+
+
+def _package_lock(packages: int) -> str:
+    rng = random.Random(1)
+    deps = {
+        f"node_modules/pkg-{i}": {
+            "version": f"{rng.randint(0, 9)}.{rng.randint(0, 20)}.{rng.randint(0, 50)}",
+            "resolved": f"https://registry.npmjs.org/pkg-{i}/-/pkg-{i}.tgz",
+            "integrity": f"sha512-{rng.getrandbits(256):064x}",
+            "dependencies": {f"pkg-{rng.randint(0, packages)}": "^1.0.0" for _ in range(3)},
+        }
+        for i in range(packages)
+    }
+    return json.dumps({"name": "demo", "lockfileVersion": 3, "packages": deps}, indent=2)
+
+
+def _poetry_lock(packages: int) -> str:
+    blocks = [
+        f'[[package]]\nname = "lib{i}"\nversion = "1.{i}.0"\ndescription = "Library {i}"\n'
+        f'python-versions = ">=3.9"\nfiles = [\n    {{file = "lib{i}-1.{i}.0.tar.gz", hash = "sha256:{i:064x}"}},\n]\n'
+        for i in range(packages)
+    ]
+    return "\n".join(blocks)
+
+
+def build_request() -> bytes:
+    paths = [f"services/svc{i % 12}/src/module_{i}.py" for i in range(4000)]
+    body = {
+        "project_structure": "\n".join(paths),
+        "format": "tree",
+        "project_context": {
+            "paths": paths,
+            "manifests": {
+                "web/package-lock.json": _package_lock(900),
+                "api/poetry.lock": _poetry_lock(700),
+                "api/pyproject.toml": '[project]\nname = "api"\nrequires-python = ">=3.12"\n',
+            },
+            "snippets": {"api/app/core/settings.py": "postgres_host = 'db'\n" * 40},
+            "entrypoints": ["api/app/main.py", "web/src/index.ts"],
+            "commands": ["uvicorn app.main:main --factory", "node dist/index.js"],
+        },
+    }
+    return json.dumps(body).encode()
+
+
+def _timed(fn) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    raw = build_request()
+    gzipped = gzip.compress(raw, compresslevel=6)
+    print(f"request bytes on the wire: raw={len(raw):,} gzip={len(gzipped):,} ({len(gzipped) / len(raw):.1%})", end="")
+    zstded = zstd.compress(raw, level=3) if zstd is not None else None
+    print(f" zstd={len(zstded):,} ({len(zstded) / len(raw):.1%})" if zstded else " zstd=unavailable")
+
+    def parse(encoding: str, body: bytes) -> GenerateRequest:
+        return GenerateRequest.model_validate(orjson.loads(_decompress(encoding, body, 1 << 30)))
+
+    rows = [
+        ("json.loads + model_validate", lambda: GenerateRequest.model_validate(json.loads(raw))),
+        ("orjson.loads + model_validate", lambda: GenerateRequest.model_validate(orjson.loads(raw))),
+        ("gzip decode + orjson + validate", lambda: parse("gzip", gzipped)),
+    ]
+    if zstded:
+        rows.append(("zstd decode + orjson + validate", lambda: parse("zstd", zstded)))
+    print("\nrequest parse (best of %d, ms)" % ROUNDS)
+    for name, fn in rows:
+        print(f"  {name:<34} {_timed(fn):8.2f}")
+
+    services = [f"svc{i}" for i in range(12)]
+    dockerfile = "FROM python:3.14-slim\nRUN pip install uv\n" * 30
+    response = GenerateResponse(
+        files=[{"path": f"{name}/Dockerfile", "content": dockerfile} for name in services],
+        plan={"stack": "python", "services": [{"name": name, "path": name} for name in services], "notes": []},
+    )
+    encoded = jsonable_encoder(response)
+    print("\nresponse render (best of %d, ms)" % ROUNDS)
+    renderers = [
+        ("json.dumps(jsonable_encoder(...))", lambda: json.dumps(jsonable_encoder(response)).encode()),
+        ("orjson.dumps(jsonable_encoder(...))", lambda: orjson.dumps(jsonable_encoder(response))),
+        ("orjson.dumps (pre-encoded)", lambda: orjson.dumps(encoded)),
+    ]
+    for name, fn in renderers:
+        print(f"  {name:<34} {_timed(fn):8.3f}")
+    body = orjson.dumps(encoded)
+    print(f"\nresponse bytes: raw={len(body):,} gzip={len(gzip.compress(body)):,}", end="")
+    print(f" zstd={len(zstd.compress(body, level=3)):,}" if zstd is not None else "")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Memory soak of the generation pipeline: thousands of large requests against a fake model client.
+
+Every request runs plan, a streamed files call that fails validation and a repair, with a monorepo-sized
+context. After a warm-up the traced heap must stay flat; the per-request peak is the extra memory one
+request holds at once. Exits non-zero when the heap grows by more than MAX_GROWTH_BYTES.
+
+Run from backend/: uv run python -m benchmarks.soak_memory
+"""
+
+import asyncio
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from types import SimpleNamespace
+
+from app.core.settings import s
+from app.modules.generate import service
+from app.modules.generate.schemas import ProjectContext
+
+REQUESTS = 3000
+WARMUP = 300
+CONCURRENCY = 8
+SNAPSHOT_EVERY = 500
+VARIANTS = 16
+MAX_GROWTH_BYTES = 2 * 1024 * 1024
+
+_PLAN = {"stack": "python", "services": [{"name": "api", "path": "api"}], "notes": []}
+_GOOD_FILES = {
+    "files": [
+        {
+            "path": "api/Dockerfile",
+            "content": (
+                "FROM python:3.12-slim\nWORKDIR /app\nCOPY api/pyproject.toml ./\nCOPY api/app ./app\n"
+                'CMD ["python", "-m", "app"]\n'
+            ),
+        }
+    ]
+}
+_BAD_FILES = {
+    "files": [{"path": "api/Dockerfile", "content": "FROM python:3.12-slim\nCOPY missing ./\n"}, *_GOOD_FILES["files"]]
+}
+
+
+class _FakeModels:
+    """Answers like Gemini: the first files call of each prompt fails validation, the repair passes."""
+
+    async def generate_content(self, model: str, contents: list[str], config: dict) -> SimpleNamespace:
+        return SimpleNamespace(text=json.dumps(_PLAN), usage_metadata=None)
+
+    async def generate_content_stream(self, model: str, contents: list[str], config: dict):
+        repair = len(contents) > 2
+        body = json.dumps(_GOOD_FILES if repair else _BAD_FILES)
+
+        async def chunks():
+            for start in range(0, len(body), 64):
+                yield SimpleNamespace(text=body[start : start + 64], usage_metadata=None)
+
+        return chunks()
+
+
+def build_context(variant: int) -> ProjectContext:
+    rng = random.Random(variant)
+    paths = [f"api/app/module_{variant}_{i}.py" for i in range(3000)] + ["api/pyproject.toml", "api/app/__main__.py"]
+    lock = "\n".join(
+        f'[[package]]\nname = "lib{i}"\nversion = "1.{rng.randint(0, 50)}.0"\n'
+        f'files = [{{hash = "sha256:{rng.getrandbits(256):064x}"}}]\n'
+        for i in range(800)
+    )
+    return ProjectContext(
+        paths=paths,
+        manifests={"api/pyproject.toml": '[project]\nname = "api"\nrequires-python = ">=3.12"\n', "api/uv.lock": lock},
+        snippets={"api/app/settings.py": "database_url: str = 'sqlite://'\n" * 50},
+        entrypoints=["api/app/__main__.py"],
+        commands=["python -m app"],
+    )
+
+
+async def _run(contexts: list[ProjectContext], count: int, offset: int) -> None:
+    for start in range(0, count, CONCURRENCY):
+        await asyncio.gather(
+            *(
+                service.generate_docker_files(
+                    project_structure="\n".join(contexts[(offset + i) % VARIANTS].paths),
+                    format="tree",
+                    project_context=contexts[(offset + i) % VARIANTS],
+                )
+                for i in range(start, min(start + CONCURRENCY, count))
+            )
+        )
+
+
+def _traced() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def main() -> int:
+    # Every request must run the whole pipeline instead of being served from the similarity cache.
+    s.similarity_cache_enabled = False
+    s.generate_fast_mode_enabled = False
+    client = SimpleNamespace(aio=SimpleNamespace(models=_FakeModels()))
+    service.get_client = lambda: client
+    contexts = [build_context(variant) for variant in range(VARIANTS)]
+    context_bytes = len(contexts[0].model_dump_json())
+
+    tracemalloc.start()
+    await _run(contexts, WARMUP, 0)
+    baseline = _traced()
+    baseline_snapshot = tracemalloc.take_snapshot()
+    print(
+        f"context: {context_bytes / 1024:,.0f} KiB serialized; "
+        f"baseline heap after warm-up {baseline / 1024:,.0f} KiB"
+    )
+
+    done = 0
+    while done < REQUESTS:
+        tracemalloc.reset_peak()
+        await _run(contexts, SNAPSHOT_EVERY, done)
+        done += SNAPSHOT_EVERY
+        current = _traced()
+        peak = tracemalloc.get_traced_memory()[1]
+        print(
+            f"  {done:>6} requests  heap {current / 1024:>9,.0f} KiB  growth {(current - baseline) / 1024:>+8,.0f} KiB"
+            f"  peak per request {(peak - baseline) / CONCURRENCY / 1024:>7,.0f} KiB"
+        )
+
+    growth = _traced() - baseline
+    if growth > MAX_GROWTH_BYTES:
+        print(f"FAIL: heap grew by {growth / 1024:,.0f} KiB; top allocation sites:")
+        for stat in tracemalloc.take_snapshot().compare_to(baseline_snapshot, "lineno")[:10]:
+            print(f"  {stat}")
+        return 1
+    print(f"OK: heap growth {growth / 1024:,.0f} KiB over {REQUESTS} requests")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -16,6 +16,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 from app.core.base_model import Base
+from app.modules.analytics import models as analytics_models
 from app.modules.auth import models
 
 target_metadata = Base.metadata
@@ -0,0 +1,27 @@
+"""Add cli_tokens.last_used_at and (user_id, created_at) index
+
+Revision ID: f5a6b7c8d9e0
+Revises: e4f5a6b7c8d9
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f5a6b7c8d9e0"
+down_revision: Union[str, Sequence[str], None] = "e4f5a6b7c8d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("cli_tokens", sa.Column("last_used_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_cli_tokens_user_id_created_at", "cli_tokens", ["user_id", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cli_tokens_user_id_created_at", table_name="cli_tokens")
+    op.drop_column("cli_tokens", "last_used_at")
@@ -0,0 +1,53 @@
+"""Add generations table
+
+Revision ID: d3e4f5a6b7c8
+Revises: c2d3e4f5a6b7
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "d3e4f5a6b7c8"
+down_revision: Union[str, Sequence[str], None] = "c2d3e4f5a6b7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "generations",
+        sa.Column("user_id", sa.Uuid(), nullable=True),
+        sa.Column("endpoint", sa.String(), nullable=False),
+        sa.Column("request_hash", sa.String(length=64), nullable=False),
+        sa.Column("stack", sa.String(), nullable=True),
+        sa.Column("status_code", sa.Integer(), nullable=False),
+        sa.Column("cache", sa.String(), nullable=True),
+        sa.Column("total_ms", sa.Float(), nullable=False),
+        sa.Column("stage_ms", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("model_calls", sa.Integer(), nullable=False),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False),
+        sa.Column("output_tokens", sa.Integer(), nullable=False),
+        sa.Column("validation_errors", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("output_hashes", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_generations_request_hash"), "generations", ["request_hash"], unique=False)
+    op.create_index("ix_generations_created_at", "generations", ["created_at"], unique=False)
+    op.create_index("ix_generations_user_id_created_at", "generations", ["user_id", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_generations_user_id_created_at", table_name="generations")
+    op.drop_index("ix_generations_created_at", table_name="generations")
+    op.drop_index(op.f("ix_generations_request_hash"), table_name="generations")
+    op.drop_table("generations")
@@ -0,0 +1,36 @@
+import pytest
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakeResult:
+    """Empty query result: enough for the code paths that only iterate rows."""
+
+    def tuples(self):
+        return self
+
+    def all(self):
+        return []
+
+
+class FakeSession:
+    """AsyncSession stand-in: records executed statements and commits, returns empty results."""
+
+    def __init__(self) -> None:
+        self.executed: list = []
+        self.commits = 0
+
+    async def execute(self, statement, *args, **kwargs):
+        self.executed.append(statement)
+        return FakeResult()
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+@pytest.fixture
+def fake_db() -> FakeSession:
+    return FakeSession()
@@ -0,0 +1,102 @@
+import importlib
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import get_db
+from app.core.security import create_access_token
+from app.core.settings import s
+from app.main import main
+from app.modules.auth import dependencies
+from app.modules.auth.services import cli_tokens
+from app.modules.auth.services.rate_limits import RateLimiter
+
+generate_router = importlib.import_module("app.modules.generate.router")
+
+CLI_TOKEN = "wt_" + "a" * 43
+BODY = {"project_structure": "app/main.py", "format": "tree", "project_context": {"paths": ["app/main.py"]}}
+# A front-coded path list that does not parse: preprocessing rejects it with 400.
+BAD_BODY = {**BODY, "format": "paths", "project_structure": "x"}
+
+
+@pytest.fixture
+def limiter(monkeypatch) -> RateLimiter:
+    limiter = RateLimiter()
+    monkeypatch.setattr(s, "generate_overlap_auth", True)
+    monkeypatch.setattr(s, "rate_limit_enabled", True)
+    monkeypatch.setattr(s, "history_enabled", False)
+    monkeypatch.setattr(dependencies, "rate_limiter", limiter)
+    monkeypatch.setattr(generate_router, "rate_limiter", limiter)
+    return limiter
+
+
+@pytest.fixture
+def prepared(monkeypatch) -> list[dict]:
+    calls = []
+    prepare = generate_router._prepare_generate
+
+    def spy(body, project_context):
+        calls.append(body)
+        return prepare(body, project_context)
+
+    monkeypatch.setattr(generate_router, "_prepare_generate", spy)
+    return calls
+
+
+@pytest.fixture
+def client(fake_db) -> TestClient:
+    app = main()
+    app.dependency_overrides[get_db] = lambda: fake_db
+    return TestClient(app)
+
+
+def _resolve_as(user_id: uuid.UUID | None):
+    async def resolve(token, db):
+        if user_id is None:
+            return None
+        return SimpleNamespace(id=user_id, email="dev@example.com", is_active=True), SimpleNamespace(id=uuid.uuid4())
+
+    return resolve
+
+
+def test_unknown_cli_token_wins_over_preprocessing_error(client, limiter, prepared, monkeypatch):
+    monkeypatch.setattr(cli_tokens, "resolve_cli_token", _resolve_as(None))
+    response = client.post("/generate", json=BAD_BODY, headers={"Authorization": f"Bearer {CLI_TOKEN}"})
+    assert response.status_code == 401
+    assert not limiter._pending
+
+
+@pytest.mark.parametrize("token", ["not-a-jwt", "wt_short"])
+def test_invalid_tokens_get_no_preprocessing(client, limiter, prepared, token):
+    response = client.post("/generate", json=BODY, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+    assert prepared == []
+    assert not limiter._pending
+
+
+def test_preprocessing_failure_is_not_charged(client, limiter, prepared, monkeypatch):
+    monkeypatch.setattr(cli_tokens, "resolve_cli_token", _resolve_as(uuid.uuid4()))
+    response = client.post("/generate", json=BAD_BODY, headers={"Authorization": f"Bearer {CLI_TOKEN}"})
+    assert response.status_code == 400
+    assert len(prepared) == 1
+    assert not limiter._pending
+
+
+def test_jwt_preprocessing_failure_is_not_charged(client, limiter, prepared):
+    token = create_access_token({"sub": "dev@example.com", "id": str(uuid.uuid4())})
+    response = client.post("/generate", json=BAD_BODY, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400
+    assert not limiter._pending
+
+
+@pytest.mark.parametrize("overlap", [True, False])
+def test_malformed_deadline_is_not_charged(client, limiter, prepared, monkeypatch, overlap):
+    monkeypatch.setattr(s, "generate_overlap_auth", overlap)
+    monkeypatch.setattr(cli_tokens, "resolve_cli_token", _resolve_as(uuid.uuid4()))
+    headers = {"Authorization": f"Bearer {CLI_TOKEN}", "X-Deadline-Ms": "soon"}
+    response = client.post("/generate", json=BODY, headers=headers)
+    assert response.status_code == 400
+    assert prepared == []
+    assert not limiter._pending
@@ -0,0 +1,59 @@
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from app.core.settings import s
+from app.modules.generate import batch, context_store
+from app.modules.generate.context_store import ContextStore
+from app.modules.generate.schemas import GenerateRequest, ProjectContext
+
+USER = {"id": "00000000-0000-0000-0000-000000000001", "sub": "alice@example.com"}
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch) -> ContextStore:
+    monkeypatch.setattr(s, "history_enabled", False)
+    fresh = ContextStore(max_bytes=1024 * 1024)
+    monkeypatch.setattr(context_store, "store", fresh)
+    return fresh
+
+
+def _item(name: str) -> GenerateRequest:
+    context = ProjectContext(paths=[f"{name}/main.py"], manifests={f"{name}/pyproject.toml": "[project]\n"})
+    return GenerateRequest(project_structure=f"{name}/main.py", project_context=context)
+
+
+async def _collect(items: list[GenerateRequest]) -> list[dict]:
+    lines = [orjson.loads(line) async for line in batch.stream_batch(items, USER, parallelism=2)]
+    return sorted(lines[:-1], key=lambda line: line["index"]) + lines[-1:]
+
+
+@pytest.mark.anyio
+async def test_failures_keep_http_status_and_hide_internal_errors(monkeypatch):
+    async def generate(**kwargs):
+        if kwargs["project_context"].paths[0].startswith("limited"):
+            raise HTTPException(status_code=429, detail="Daily quota exceeded")
+        raise RuntimeError("connection to postgres://root:qwerty@db failed")
+
+    monkeypatch.setattr(batch, "generate_docker_files", generate)
+    lines = await _collect([_item("limited"), _item("broken")])
+    assert lines[0] == {"index": 0, "status": 429, "detail": "Daily quota exceeded"}
+    assert lines[1] == {"index": 1, "status": 500, "detail": "Generation failed"}
+    assert lines[2]["failed"] == 2
+
+
+def _reject_oversized(project_context: ProjectContext) -> None:
+    if any(path.startswith("oversized") for path in project_context.paths):
+        raise HTTPException(status_code=413, detail="too large")
+
+
+@pytest.mark.anyio
+async def test_only_items_that_ran_are_remembered(store, monkeypatch):
+    async def generate(**kwargs):
+        raise HTTPException(status_code=502, detail="model error")
+
+    monkeypatch.setattr(batch, "generate_docker_files", generate)
+    monkeypatch.setattr(batch, "enforce_context_budget", _reject_oversized)
+    await _collect([_item("ran"), _item("oversized")])
+    assert store.get(batch.user_key(USER), context_store.content_hash("ran/main.py")) is not None
+    assert store.get(batch.user_key(USER), context_store.content_hash("oversized/main.py")) is None
@@ -0,0 +1,39 @@
+import pytest
+from fastapi import HTTPException
+
+from app.modules.generate import service
+from app.modules.generate.budget import context_bytes, enforce_context_budget, enforce_prompt_budget, utf8_len
+from app.modules.generate.schemas import ProjectContext
+
+
+def test_sizes_are_utf8_bytes():
+    assert utf8_len("app/main.py") == 11
+    assert utf8_len("настройки") == 18
+    context = ProjectContext(paths=["a.py"], snippets={"б.py": "ё"}, commands=["run"])
+    assert context_bytes(context) == 4 + 5 + 2 + 3
+
+
+def test_context_budget_counts_bytes_not_characters(monkeypatch):
+    monkeypatch.setattr(service.s, "generate_max_context_bytes", 10)
+    enforce_context_budget(ProjectContext(paths=["a" * 10]))
+    with pytest.raises(HTTPException) as exc:
+        enforce_context_budget(ProjectContext(paths=["я" * 6]))
+    assert exc.value.status_code == 413
+
+
+def test_estimated_prompt_size_is_reported_as_a_lower_bound(monkeypatch):
+    monkeypatch.setattr(service.s, "generate_max_prompt_bytes", 100)
+    enforce_prompt_budget(100)
+    with pytest.raises(HTTPException) as exc:
+        enforce_prompt_budget(101, estimated=True)
+    assert exc.value.status_code == 413 and "at least 101 bytes" in exc.value.detail
+
+
+def test_oversized_context_is_rejected_before_serialization(monkeypatch):
+    monkeypatch.setattr(service.s, "generate_max_prompt_bytes", 64 * 1024)
+    serialized = []
+    monkeypatch.setattr(service, "_context_to_json", lambda context: serialized.append(context) or "{}")
+    context = ProjectContext(snippets={"app/settings.py": "ж" * 40_000})
+    with pytest.raises(HTTPException) as exc:
+        service.prepare_generation("app/settings.py", "paths", context)
+    assert exc.value.status_code == 413 and not serialized
@@ -0,0 +1,60 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.modules.generate import service
+
+PLAN = {"stack": "python", "services": [{"name": "app", "path": "."}]}
+VALID = [{"path": "Dockerfile", "content": 'FROM python:3.12-slim\nCMD ["python", "-m", "app"]\n'}]
+ONE_ERROR = [{"path": "/etc/Dockerfile", "content": "FROM python:3.12-slim\n"}]
+TWO_ERRORS = [*ONE_ERROR, {"path": "/etc/compose.yml", "content": "services: {}\n"}]
+
+
+def _client(answers: dict[float, tuple[float, list[dict] | Exception]], cancelled: list[float]) -> SimpleNamespace:
+    """Answers by sampling temperature: (delay in seconds, files or an exception to raise)."""
+
+    async def generate_content(model, contents, config):
+        temperature = config["temperature"]
+        delay, answer = answers[temperature]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(temperature)
+            raise
+        if isinstance(answer, Exception):
+            raise answer
+        return SimpleNamespace(text=json.dumps({"files": answer}), usage_metadata=None)
+
+    return SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+
+
+async def _sample(answers: dict, cancelled: list[float]) -> tuple:
+    client = _client(answers, cancelled)
+    return await service._sample_candidates(client, ["prompt"], len(answers), None, PLAN)
+
+
+def test_candidate_temperatures_spread_over_the_range():
+    assert service._candidate_temperatures(1) == [0.1]
+    assert service._candidate_temperatures(3) == [0.1, 0.5, 0.9]
+
+
+@pytest.mark.anyio
+async def test_first_valid_candidate_wins_and_the_rest_are_cancelled():
+    cancelled: list[float] = []
+    answers = {0.1: (0.0, ONE_ERROR), 0.5: (0.01, VALID), 0.9: (5.0, VALID)}
+    files, closest, errors = await _sample(answers, cancelled)
+    assert [f.path for f in files] == ["Dockerfile"]
+    assert (closest, errors) == ([], [])
+    assert cancelled == [0.9]
+
+
+@pytest.mark.anyio
+async def test_closest_candidate_is_kept_for_the_repair_round():
+    cancelled: list[float] = []
+    answers = {0.1: (0.0, TWO_ERRORS), 0.5: (0.01, RuntimeError("boom")), 0.9: (0.02, ONE_ERROR)}
+    files, closest, errors = await _sample(answers, cancelled)
+    assert files is None
+    assert [f.path for f in closest] == ["/etc/Dockerfile"] and len(errors) == 1
+    assert cancelled == []
@@ -0,0 +1,63 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.modules.auth.models import CLIToken, User
+from app.modules.auth.services.cli_tokens import list_cli_tokens
+
+USER_ID = uuid.uuid4()
+
+
+class _SyncSession:
+    """AsyncSession facade over an in-memory SQLite session, so keyset filters run against real rows."""
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    async def execute(self, statement, *args, **kwargs):
+        return self.session.execute(statement, *args, **kwargs)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    User.metadata.create_all(engine, tables=[User.__table__, CLIToken.__table__])
+    with Session(engine) as session:
+        session.add(User(id=USER_ID, email="dev@example.com", hashed_password="x"))
+        start = datetime(2026, 1, 1)
+        # Two tokens share a created_at across the first page boundary, so the cursor has to fall back on the id.
+        minutes = [0, 1, 2, 2, 3]
+        for index, created_at in enumerate(start + timedelta(minutes=m) for m in minutes):
+            session.add(CLIToken(user_id=USER_ID, token_hash=f"hash-{index}", name=f"t{index}", created_at=created_at))
+        session.add(CLIToken(user_id=uuid.uuid4(), token_hash="other", created_at=start))
+        session.commit()
+        yield _SyncSession(session)
+
+
+def _newest_first(tokens: list[CLIToken]) -> list[CLIToken]:
+    return sorted(tokens, key=lambda t: (t.created_at, t.id), reverse=True)
+
+
+@pytest.mark.anyio
+async def test_keyset_pages_cover_every_token_once(db):
+    everything, cursor = await list_cli_tokens(USER_ID, db, None)
+    assert cursor is None and len(everything) == 5
+    assert everything == _newest_first(everything)
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = await list_cli_tokens(USER_ID, db, 2, cursor)
+        pages.append([t.name for t in page])
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [name for page in pages for name in page] == [t.name for t in everything]
+
+
+@pytest.mark.anyio
+async def test_last_full_page_has_no_cursor(db):
+    page, cursor = await list_cli_tokens(USER_ID, db, 5)
+    assert len(page) == 5 and cursor is None
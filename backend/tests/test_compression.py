@@ -0,0 +1,120 @@
+import gzip
+
+import pytest
+
+from app.core.compression import (
+    RequestDecompressionMiddleware,
+    ResponseCompressionMiddleware,
+    _BodyTooLarge,
+    _decompress,
+    _pick_encoding,
+)
+
+
+def test_concatenated_gzip_members_are_all_decoded():
+    data = gzip.compress(b'{"a": ') + gzip.compress(b"1}")
+    assert _decompress("gzip", data, 1024) == b'{"a": 1}'
+
+
+def test_decoded_size_limit_spans_members():
+    data = gzip.compress(b"x" * 600) + gzip.compress(b"y" * 600)
+    assert len(_decompress("gzip", data, 1200)) == 1200
+    with pytest.raises(_BodyTooLarge):
+        _decompress("gzip", data, 1000)
+
+
+@pytest.mark.parametrize("data", [gzip.compress(b"{}") + b"junk", gzip.compress(b"{}")[:-4], b"not gzip"])
+def test_corrupt_gzip_is_a_value_error(data):
+    with pytest.raises(ValueError):
+        _decompress("gzip", data, 1024)
+
+
+def test_pick_encoding_skips_refused_and_unsupported():
+    assert _pick_encoding("gzip;q=0, br") is None
+    assert _pick_encoding("br, gzip") == "gzip"
+
+
+class _App:
+    def __init__(self) -> None:
+        self.bodies: list[tuple[bytes, dict]] = []
+
+    async def __call__(self, scope, receive, send) -> None:
+        message = await receive()
+        self.bodies.append((message["body"], dict(scope["headers"])))
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"a" * 2048})
+
+
+def _scope(headers: dict[str, str]) -> dict:
+    raw = [(key.encode(), value.encode()) for key, value in headers.items()]
+    return {"type": "http", "method": "POST", "path": "/", "headers": raw}
+
+
+async def _call(app, headers: dict[str, str], messages: list[dict]) -> list[dict]:
+    incoming = iter(messages)
+    sent: list[dict] = []
+
+    async def receive() -> dict:
+        return next(incoming)
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    await app(_scope(headers), receive, send)
+    return sent
+
+
+@pytest.mark.anyio
+async def test_gzip_request_reaches_the_app_decoded():
+    inner = _App()
+    middleware = RequestDecompressionMiddleware(inner, max_body_bytes=1024, max_decompressed_bytes=1024)
+    body = gzip.compress(b'{"project_structure": "."}')
+    chunks = [
+        {"type": "http.request", "body": body[:10], "more_body": True},
+        {"type": "http.request", "body": body[10:], "more_body": False},
+    ]
+    sent = await _call(middleware, {"content-encoding": "gzip"}, chunks)
+    assert sent[0]["status"] == 200
+    decoded, headers = inner.bodies[0]
+    assert decoded == b'{"project_structure": "."}'
+    assert b"content-encoding" not in headers and headers[b"content-length"] == str(len(decoded)).encode()
+
+
+@pytest.mark.anyio
+async def test_disconnect_mid_body_is_not_answered():
+    inner = _App()
+    middleware = RequestDecompressionMiddleware(inner, max_body_bytes=1024, max_decompressed_bytes=1024)
+    messages = [{"type": "http.request", "body": b"\x1f\x8b", "more_body": True}, {"type": "http.disconnect"}]
+    assert await _call(middleware, {"content-encoding": "gzip"}, messages) == []
+    assert inner.bodies == []
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("headers", "body", "status"),
+    [
+        ({"content-length": "4096"}, b"", 413),
+        ({"content-encoding": "br"}, b"", 415),
+        ({"content-encoding": "gzip"}, gzip.compress(b"x" * 4096), 413),
+        ({"content-encoding": "gzip"}, b"not gzip", 400),
+    ],
+)
+async def test_rejected_request_bodies(headers, body, status):
+    inner = _App()
+    middleware = RequestDecompressionMiddleware(inner, max_body_bytes=1024, max_decompressed_bytes=1024)
+    sent = await _call(middleware, headers, [{"type": "http.request", "body": body, "more_body": False}])
+    assert sent[0]["status"] == status and inner.bodies == []
+
+
+@pytest.mark.anyio
+async def test_large_responses_are_compressed():
+    middleware = ResponseCompressionMiddleware(_App(), minimum_size=1024)
+    request = [{"type": "http.request", "body": b"", "more_body": False}]
+    start, body = await _call(middleware, {"accept-encoding": "gzip"}, request)
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip" and headers[b"vary"] == b"Accept-Encoding"
+    assert gzip.decompress(body["body"]) == b"a" * 2048
+
+    small = ResponseCompressionMiddleware(_App(), minimum_size=4096)
+    start, body = await _call(small, {"accept-encoding": "gzip"}, request)
+    assert b"content-encoding" not in dict(start["headers"]) and body["body"] == b"a" * 2048
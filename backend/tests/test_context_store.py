@@ -0,0 +1,70 @@
+import pytest
+from fastapi import HTTPException
+
+from app.modules.generate import context_store
+from app.modules.generate.context_store import ContextStore, content_hash, remember_context, resolve_context_delta
+from app.modules.generate.schemas import ProjectContext, ProjectContextDelta
+
+PYPROJECT = '[project]\nname = "api"\n'
+CONTEXT = ProjectContext(
+    paths=["pyproject.toml", "app/main.py"],
+    manifests={"pyproject.toml": PYPROJECT},
+    snippets={"app/main.py": "app = FastAPI()\n"},
+)
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch) -> ContextStore:
+    fresh = ContextStore(max_bytes=1024)
+    monkeypatch.setattr(context_store, "store", fresh)
+    return fresh
+
+
+def _delta(**fields) -> ProjectContextDelta:
+    return ProjectContextDelta(
+        paths_base=content_hash("\n".join(sorted(CONTEXT.paths))),
+        manifests={"pyproject.toml": content_hash(PYPROJECT)},
+        **fields,
+    )
+
+
+def test_delta_resolves_against_a_remembered_context():
+    remember_context("alice", CONTEXT)
+    resolved = resolve_context_delta("alice", _delta(paths_added=["app/api.py"], paths_removed=["app/main.py"]))
+    assert resolved.paths == ["app/api.py", "pyproject.toml"]
+    assert resolved.manifests == {"pyproject.toml": PYPROJECT}
+
+
+def test_other_owners_hashes_are_missing():
+    remember_context("alice", CONTEXT)
+    with pytest.raises(HTTPException) as exc:
+        resolve_context_delta("bob", _delta())
+    assert exc.value.status_code == 409
+    assert sorted(exc.value.detail["missing"]) == sorted([content_hash(PYPROJECT), _delta().paths_base])
+
+
+def test_blobs_are_stored_for_their_uploader_only():
+    delta = ProjectContextDelta(
+        paths=["pyproject.toml"],
+        manifests={"pyproject.toml": content_hash(PYPROJECT)},
+        blobs={content_hash(PYPROJECT): PYPROJECT},
+    )
+    assert resolve_context_delta("alice", delta).manifests == {"pyproject.toml": PYPROJECT}
+    assert context_store.store.get("alice", content_hash(PYPROJECT)) == PYPROJECT
+    assert context_store.store.get("bob", content_hash(PYPROJECT)) is None
+
+
+def test_blob_with_wrong_hash_is_rejected():
+    delta = ProjectContextDelta(paths=[], blobs={content_hash("a"): "b"})
+    with pytest.raises(HTTPException) as exc:
+        resolve_context_delta("alice", delta)
+    assert exc.value.status_code == 400
+
+
+def test_store_evicts_least_recently_used(store):
+    first = store.put("alice", "a" * 600)
+    second = store.put("alice", "b" * 300)
+    store.get("alice", first)
+    store.put("alice", "c" * 300)
+    assert store.get("alice", second) is None
+    assert store.get("alice", first) == "a" * 600
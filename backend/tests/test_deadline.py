@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.modules.generate import history
+from app.modules.generate.deadline import CLIENT_CLOSED_REQUEST, parse_deadline, remaining, run_cancellable
+from app.modules.generate.history import record_generation
+
+
+def _request(headers: dict[str, str] | None = None, disconnect_after: float | None = None) -> SimpleNamespace:
+    async def receive() -> dict:
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    return SimpleNamespace(headers=headers or {}, receive=receive)
+
+
+@pytest.fixture
+def rows(monkeypatch) -> list[dict]:
+    added: list[dict] = []
+    monkeypatch.setattr(history.s, "history_enabled", True)
+    monkeypatch.setattr(history, "writer", SimpleNamespace(add=added.append))
+    return added
+
+
+def test_parse_deadline():
+    assert parse_deadline(_request()) is None
+    assert parse_deadline(_request({"x-deadline-ms": "1500"})) == 1.5
+    for raw in ("0", "-5", "soon"):
+        with pytest.raises(HTTPException) as exc:
+            parse_deadline(_request({"x-deadline-ms": raw}))
+        assert exc.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_work_sees_its_deadline():
+    async def work() -> float | None:
+        return remaining()
+
+    left = await run_cancellable(_request(), work(), 5.0)
+    assert 4.0 < left <= 5.0
+    assert await run_cancellable(_request(), work(), None) is None
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("client_request", "budget", "status"), [(_request(), 0.01, 504), (_request(None, 0.01), None, 499)]
+)
+async def test_slow_work_is_cancelled(client_request, budget, status):
+    cancelled = asyncio.Event()
+
+    async def work() -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(HTTPException) as exc:
+        await run_cancellable(client_request, work(), budget)
+    assert exc.value.status_code == status and cancelled.is_set()
+
+
+@pytest.mark.anyio
+async def test_cancelled_generation_is_recorded_and_reraised(rows):
+    async def handler() -> None:
+        async with record_generation("generate", {"id": "not-a-uuid"}, "key"):
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(handler())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert [row["status_code"] for row in rows] == [CLIENT_CLOSED_REQUEST]
+
+
+@pytest.mark.anyio
+async def test_http_errors_are_recorded_with_their_status(rows):
+    with pytest.raises(HTTPException):
+        async with record_generation("generate", {}, "key"):
+            raise HTTPException(status_code=504)
+    assert rows[0]["status_code"] == 504 and rows[0]["user_id"] is None
@@ -0,0 +1,65 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.modules.generate import service
+from app.modules.generate.schemas import ProjectContext
+
+PLAN = {"stack": "python", "services": [{"name": "app", "path": "."}]}
+FILES = [{"path": "Dockerfile", "content": 'FROM python:3.12-slim\nCMD ["python", "-m", "app"]\n'}]
+SIMPLE = ProjectContext(paths=["app/__main__.py", "pyproject.toml"], manifests={"pyproject.toml": "[project]\n"})
+
+
+def _client(schemas: list, responses: list[dict]) -> SimpleNamespace:
+    async def generate_content(model, contents, config):
+        schemas.append(config["response_json_schema"])
+        return SimpleNamespace(text=json.dumps(responses[len(schemas) - 1]), usage_metadata=None)
+
+    return SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+
+
+@pytest.fixture(autouse=True)
+def pipeline(monkeypatch) -> None:
+    monkeypatch.setattr(service.s, "generate_fast_mode_enabled", True)
+    monkeypatch.setattr(service.s, "generate_stream_files", False)
+    monkeypatch.setattr(service.s, "similarity_cache_enabled", False)
+
+
+def _generate(client: SimpleNamespace, monkeypatch, context: ProjectContext = SIMPLE):
+    monkeypatch.setattr(service, "get_client", lambda: client)
+    return asyncio.run(service.generate_docker_files("\n".join(context.paths), "tree", context))
+
+
+@pytest.mark.parametrize(
+    ("context", "candidates", "expected"),
+    [
+        (None, 1, ("two_stage", "no_context")),
+        (SIMPLE, 1, ("fast", "simple")),
+        (SIMPLE, 3, ("two_stage", "candidates")),
+        (
+            ProjectContext(manifests={"api/pyproject.toml": "", "web/package.json": ""}),
+            1,
+            ("two_stage", "services"),
+        ),
+        (ProjectContext(paths=[f"f{i}.py" for i in range(500)]), 1, ("two_stage", "paths")),
+    ],
+)
+def test_pipeline_mode(context, candidates, expected):
+    assert service._pipeline_mode(context, candidates) == expected
+
+
+def test_simple_projects_take_one_call(monkeypatch):
+    schemas: list = []
+    result = _generate(_client(schemas, [{"plan": PLAN, "files": FILES}]), monkeypatch)
+    assert schemas == [service.FAST_SCHEMA]
+    assert [f.path for f in result.files] == ["Dockerfile"] and result.plan["stack"] == "python"
+
+
+def test_missing_plan_falls_back_to_two_stages(monkeypatch):
+    schemas: list = []
+    result = _generate(_client(schemas, [{"files": FILES}, PLAN, {"files": FILES}]), monkeypatch)
+    assert schemas[0] == service.FAST_SCHEMA and len(schemas) == 3
+    assert service.FAST_SCHEMA not in schemas[1:]
+    assert [f.path for f in result.files] == ["Dockerfile"]
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.modules.generate import incremental, service
+from app.modules.generate.incremental import _declaring_compose_files, regenerate_docker_files
+from app.modules.generate.schemas import FileContent, ProjectContext
+
+API_DOCKERFILE = 'FROM python:3.12-slim\nWORKDIR /app\nCMD ["python", "-m", "api"]\n'
+# Fails the worker check; it belongs to a service the change does not touch.
+WEB_DOCKERFILE = 'FROM python:3.12-slim\nCMD ["uvicorn", "app.main:app", "--host", "0.0.0.0"]\n'
+
+
+def _fake_client(calls: list, files: list[dict]) -> SimpleNamespace:
+    async def generate_content(model, contents, config):
+        calls.append(contents)
+        return SimpleNamespace(text=json.dumps({"files": files}), usage_metadata=None)
+
+    return SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+
+
+def test_untouched_invalid_files_do_not_trigger_repairs(monkeypatch):
+    monkeypatch.setattr(service.s, "generate_stream_files", False)
+    calls: list = []
+    updated = API_DOCKERFILE.replace("3.12", "3.13")
+    client = _fake_client(calls, [{"path": "api/Dockerfile", "content": updated}])
+    monkeypatch.setattr(incremental, "get_client", lambda: client)
+    files = [
+        FileContent(path="api/Dockerfile", content=API_DOCKERFILE),
+        FileContent(path="web/Dockerfile", content=WEB_DOCKERFILE),
+    ]
+    changes = ProjectContext(manifests={"api/pyproject.toml": '[project]\nrequires-python = ">=3.13"\n'})
+
+    result, regenerated = asyncio.run(regenerate_docker_files(files, changes))
+
+    assert regenerated == ["api/Dockerfile"]
+    assert len(calls) == 1
+    assert {f.path: f.content for f in result}["web/Dockerfile"] == WEB_DOCKERFILE
+
+
+def test_files_outside_the_targets_are_returned_as_is(monkeypatch):
+    monkeypatch.setattr(service.s, "generate_stream_files", False)
+    calls: list = []
+    updated = API_DOCKERFILE.replace("3.12", "3.13")
+    rewritten = [
+        {"path": "api/Dockerfile", "content": updated},
+        {"path": "web/Dockerfile", "content": "FROM scratch\n"},
+    ]
+    monkeypatch.setattr(incremental, "get_client", lambda: _fake_client(calls, rewritten))
+    files = [
+        FileContent(path="api/Dockerfile", content=API_DOCKERFILE),
+        FileContent(path="web/Dockerfile", content=WEB_DOCKERFILE),
+    ]
+    changes = ProjectContext(manifests={"api/pyproject.toml": "[project]\n"})
+
+    result, regenerated = asyncio.run(regenerate_docker_files(files, changes))
+
+    assert regenerated == ["api/Dockerfile"]
+    assert {f.path: f.content for f in result} == {"api/Dockerfile": updated, "web/Dockerfile": WEB_DOCKERFILE}
+
+
+def test_compose_files_declaring_an_affected_service_are_targets(monkeypatch):
+    monkeypatch.setattr(service.s, "generate_stream_files", False)
+    calls: list = []
+    monkeypatch.setattr(incremental, "get_client", lambda: _fake_client(calls, []))
+    compose = "services:\n  api:\n    build: ./api\n    ports:\n      - '8000:8000'\n"
+    files = [
+        FileContent(path="docker-compose.yml", content=compose),
+        FileContent(path="api/Dockerfile", content=API_DOCKERFILE),
+    ]
+    changes = ProjectContext(entrypoints=["api/main.py"])
+
+    asyncio.run(regenerate_docker_files(files, changes))
+
+    prompt = calls[0][0]
+    assert '"path": "docker-compose.yml"' in prompt and '"path": "api/Dockerfile"' in prompt
+
+
+def test_compose_declares_services_by_build_or_by_name():
+    plan = {"services": [{"name": "api", "path": "api"}, {"name": "web", "path": "web"}]}
+    files = [
+        FileContent(path="docker-compose.yml", content="services:\n  backend:\n    build: ./api\n"),
+        FileContent(path="docker-compose.yaml", content="services:\n  web:\n    image: web\n"),
+    ]
+    assert _declaring_compose_files(files, {"api/Dockerfile"}, plan) == {"docker-compose.yml"}
+    assert _declaring_compose_files(files, {"web/Dockerfile"}, plan) == {"docker-compose.yaml"}
@@ -0,0 +1,94 @@
+import json
+
+from app.modules.generate.manifests import summarize_lockfiles, summarize_manifest
+from app.modules.generate.schemas import ProjectContext
+
+POETRY_LOCK = """[[package]]
+name = "numpy"
+version = "2.1.0"
+python-versions = ">=3.10"
+
+[[package]]
+name = "flask"
+version = "3.0.3"
+python-versions = ">=3.8"
+
+[metadata]
+lock-version = "2.0"
+python-versions = "^3.12"
+content-hash = "abc"
+"""
+
+UV_LOCK = """version = 1
+revision = 3
+requires-python = ">=3.13"
+
+[[package]]
+name = "asyncpg"
+version = "0.31.0"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "fastapi"
+version = "0.128.0"
+source = { registry = "https://pypi.org/simple" }
+requires-python = ">=3.8"
+"""
+
+
+def _summary(path: str, content: str) -> dict:
+    return json.loads(summarize_manifest(path, content))
+
+
+def test_poetry_python_comes_from_metadata():
+    summary = _summary("poetry.lock", POETRY_LOCK)
+    assert summary["python"] == "^3.12"
+    assert summary["packages"] == 2
+    assert summary["native"] == ["numpy"]
+
+
+def test_uv_python_comes_from_top_level_requires_python():
+    summary = _summary("backend/uv.lock", UV_LOCK)
+    assert summary["package_manager"] == "uv"
+    assert summary["python"] == ">=3.13"
+    assert summary["native"] == ["asyncpg"]
+
+
+def test_truncated_toml_lock_is_scanned():
+    summary = _summary("poetry.lock", POETRY_LOCK + "[[package")
+    assert summary["truncated"] is True
+    assert summary["python"] == "^3.12"
+    truncated_uv = _summary("uv.lock", UV_LOCK.replace('requires-python = ">=3.13"\n', "") + "[[package")
+    assert "python" not in truncated_uv
+
+
+def test_package_lock_summary():
+    content = json.dumps(
+        {
+            "lockfileVersion": 3,
+            "packages": {
+                "": {"engines": {"node": ">=20"}},
+                "node_modules/express": {},
+                "node_modules/sharp": {},
+                "node_modules/esbuild": {"hasInstallScript": True},
+            },
+        }
+    )
+    summary = _summary("package-lock.json", content)
+    assert summary["engines"] == {"node": ">=20"}
+    assert summary["packages"] == 3
+    assert summary["native"] == ["esbuild", "sharp"]
+
+
+def test_non_lockfiles_are_left_alone():
+    assert summarize_manifest("pyproject.toml", "[project]\n") is None
+
+
+def test_summarize_lockfiles_only_replaces_when_smaller():
+    big_lock = UV_LOCK + "".join(f'\n[[package]]\nname = "lib{i}"\nversion = "1.0"\n' for i in range(50))
+    context = ProjectContext(manifests={"uv.lock": big_lock, "poetry.lock": "x", "pyproject.toml": "[project]\n"})
+    summarized = summarize_lockfiles(context)
+    assert json.loads(summarized.manifests["uv.lock"])["packages"] == 52
+    assert summarized.manifests["poetry.lock"] == "x"
+    assert summarized.manifests["pyproject.toml"] == "[project]\n"
+    assert context.manifests["uv.lock"] == big_lock
@@ -0,0 +1,100 @@
+import pytest
+
+from app.modules.generate.paths import (
+    PathTrie,
+    decode_paths,
+    encode_paths,
+    parse_markdown,
+    parse_tree,
+    resolve_structure,
+)
+from app.modules.generate.schemas import FileContent, ProjectContext
+from app.modules.generate.service import validate_docker_files
+
+TREE = """myproject
+├── app
+│   ├── core
+│   │   └── settings.py
+│   └── main.py
+├── static -> ../assets
+└── pyproject.toml
+
+2 directories, 4 files
+"""
+
+
+def test_tree_round_trip():
+    trie = parse_tree(TREE)
+    assert trie.paths() == ["app/core/settings.py", "app/main.py", "pyproject.toml", "static"]
+    assert trie.is_dir("app/core") and not trie.is_dir("app/main.py")
+    assert "app/core/settings.py" in trie and "app/missing.py" not in trie
+    assert parse_tree(trie.render_tree()).paths() == trie.paths()
+
+
+def test_ascii_tree_and_markdown_match():
+    ascii_tree = ".\n|-- app\n|   `-- main.py\n`-- pyproject.toml\n"
+    markdown = "- app/\n  - main.py\n- pyproject.toml\n"
+    assert parse_tree(ascii_tree).paths() == parse_markdown(markdown).paths() == ["app/main.py", "pyproject.toml"]
+
+
+def test_markdown_rejects_orphaned_nesting():
+    with pytest.raises(ValueError):
+        parse_markdown("- app/\n      - main.py\n")
+
+
+def test_single_top_level_entry_is_the_project_root():
+    assert parse_markdown("- myproject/\n  - main.py\n").paths() == ["main.py"]
+
+
+def test_trailing_slash_marks_empty_directories():
+    trie = PathTrie.from_paths(["./app/", "app/main.py", "logs/"])
+    assert trie.directories() == {"app", "logs"}
+    assert trie.paths() == ["app/main.py"]
+
+
+def test_front_coding_round_trip():
+    paths = ["app/main.py", "app/core/settings.py", "app/core/db.py", "README.md", "app/main.py"]
+    encoded = encode_paths(paths)
+    assert encoded.splitlines()[:3] == ["0 README.md", "0 app/core/db.py", "9 settings.py"]
+    assert decode_paths(encoded) == sorted(set(paths))
+
+
+@pytest.mark.parametrize("encoded", ["x app", "5 app", "app"])
+def test_front_coding_rejects_malformed_lines(encoded):
+    with pytest.raises(ValueError):
+        decode_paths(encoded)
+
+
+def test_resolve_structure_keeps_the_tree_and_marks_derived_paths():
+    markdown = "- app/\n  - main.py\n- logs/\n- pyproject.toml\n"
+    structure, format, context = resolve_structure(markdown, "markdown", None)
+    assert (structure, format) == (markdown, "markdown")
+    assert context.paths == ["app/main.py", "pyproject.toml"]
+    assert context._paths_derived
+    given = ProjectContext(paths=["other.py"])
+    assert resolve_structure(TREE, "tree", given) == (TREE, "tree", given)
+
+
+def test_front_coded_lists_are_explicit_paths():
+    encoded = encode_paths([".python-version", "app/main.py", "logs/"])
+    structure, format, context = resolve_structure(encoded, "paths", None)
+    assert format == "tree"
+    assert structure == ".\n├── app/\n│   └── main.py\n├── logs/\n└── .python-version\n"
+    assert context.paths == [".python-version", "app/main.py"] and not context._paths_derived
+    assert parse_tree(structure).directories() == {"app", "logs"}
+
+
+def test_copy_sources_are_only_checked_against_listed_paths():
+    dockerfile = FileContent(path="Dockerfile", content="FROM python:3.12-slim\nCOPY .python-version app ./\n")
+    derived = resolve_structure("- app/\n  - main.py\n- pyproject.toml\n", "markdown", None)[2]
+    assert validate_docker_files([dockerfile], derived) == []
+    listed = resolve_structure(encode_paths(["app/main.py", "pyproject.toml"]), "paths", None)[2]
+    assert validate_docker_files([dockerfile], listed) == [
+        "Dockerfile: COPY/ADD source '.python-version' not found in project context"
+    ]
+
+
+def test_resolve_structure_passes_unparsed_formats_through():
+    assert resolve_structure("not a tree\n  at all", "json", None) == ("not a tree\n  at all", "json", None)
+    with pytest.raises(ValueError):
+        resolve_structure("bogus", "paths", None)
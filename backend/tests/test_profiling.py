@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from app.core.profiling import ProfileStore, ProfilingMiddleware, current_profile, profile_stage
+
+
+async def _app(scope, receive, send) -> None:
+    with profile_stage("route"):
+        time.sleep(0.02)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def _call(middleware, headers: dict[str, str]) -> list[dict]:
+    sent: list[dict] = []
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    raw = [(key.encode(), value.encode()) for key, value in headers.items()]
+    await middleware({"type": "http", "method": "GET", "path": "/x", "headers": raw}, receive, send)
+    return sent
+
+
+def _middleware(store: ProfileStore, token: str = "secret") -> ProfilingMiddleware:
+    return ProfilingMiddleware(_app, token=token, store=store, sample_interval=0.001)
+
+
+@pytest.mark.anyio
+async def test_request_with_the_token_is_profiled(tmp_path):
+    store = ProfileStore(str(tmp_path), max_count=10)
+    start, _ = await _call(_middleware(store), {"x-profile-token": "secret"})
+    profile_id = dict(start["headers"])[b"x-profile-id"].decode()
+    report = store.load(profile_id)
+    assert report["status_code"] == 200 and report["path"] == "/x"
+    assert report["stages"]["route"]["count"] == 1 and report["stages"]["route"]["total_ms"] >= 20
+    assert report["samples"] > 0
+    assert current_profile.get() is None
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(("token", "headers"), [("secret", {}), ("secret", {"x-profile-token": "guess"}), ("", {})])
+async def test_other_requests_pass_through(tmp_path, token, headers):
+    store = ProfileStore(str(tmp_path), max_count=10)
+    start, _ = await _call(_middleware(store, token), headers)
+    assert start["headers"] == [] and list(tmp_path.iterdir()) == []
+
+
+def test_store_keeps_the_newest_and_rejects_bad_ids(tmp_path):
+    store = ProfileStore(str(tmp_path), max_count=2)
+    ids = [f"{i:032x}" for i in range(3)]
+    for profile_id in ids:
+        store.save({"id": profile_id})
+        time.sleep(0.01)
+    assert store.load(ids[0]) is None and store.load(ids[2]) == {"id": ids[2]}
+    assert store.load("../settings") is None
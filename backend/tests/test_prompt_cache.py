@@ -0,0 +1,95 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.modules.generate import prompt_cache, service
+from app.modules.generate.prompt_cache import CachedRequest, LocalContextCache, PromptCache, prompt_cache_scope
+from app.modules.generate.schemas import ProjectContext
+
+PLAN = {"stack": "python", "services": [{"name": "api", "path": "api"}, {"name": "web", "path": "web"}]}
+API = {"path": "api/Dockerfile", "content": 'FROM python:3.12-slim\nCMD ["python", "-m", "api"]\n'}
+WEB = {"path": "web/Dockerfile", "content": 'FROM python:3.12-slim\nCMD ["python", "-m", "web"]\n'}
+SINGLE_WORKER = {**WEB, "content": 'FROM python:3.12-slim\nCMD ["uvicorn", "web.main:app", "--host", "0.0.0.0"]\n'}
+
+
+class _Backend:
+    """Gemini-style backend double: counts uploads and deletions, optionally failing the upload."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.created: list[str] = []
+        self.deleted: list[str] = []
+
+    async def create(self, client, model, prefix, ttl_seconds) -> str:
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("quota")
+        self.created.append(model)
+        return f"caches/{model}"
+
+    def request(self, handle, prefix, suffix) -> CachedRequest:
+        return CachedRequest(contents=suffix, config={"cached_content": handle})
+
+    async def delete(self, client, handle) -> None:
+        self.deleted.append(handle)
+
+
+def test_every_stage_starts_with_the_shared_prefix(monkeypatch):
+    monkeypatch.setattr(service.s, "generate_fast_mode_enabled", False)
+    monkeypatch.setattr(service.s, "generate_stream_files", False)
+    monkeypatch.setattr(service.s, "generate_compact_repair", False)
+    monkeypatch.setattr(service.s, "similarity_cache_enabled", False)
+    responses = [PLAN, {"files": [API, SINGLE_WORKER]}, {"files": [API, WEB]}]
+    calls: list = []
+
+    async def generate_content(model, contents, config):
+        calls.append(contents)
+        return SimpleNamespace(text=json.dumps(responses[len(calls) - 1]), usage_metadata=None)
+
+    client = SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+    monkeypatch.setattr(service, "get_client", lambda: client)
+    context = ProjectContext(paths=["api/app.py", "web/app.py"])
+    asyncio.run(service.generate_docker_files("api/app.py\nweb/app.py", "tree", context))
+
+    assert len(calls) == 3
+    prefix = calls[0][0]
+    assert "api/app.py" in prefix
+    assert all(len(call) > 1 and call[0] == prefix for call in calls)
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_share_one_cache_per_model():
+    backend = _Backend()
+    cache = PromptCache(backend, client=None, prefix="PREFIX")
+    requests = await asyncio.gather(*(cache.prepare("fast", ["PREFIX", f"task {i}"]) for i in range(3)))
+    strong = await cache.prepare("strong", ["PREFIX", "repair"])
+    assert backend.created == ["fast", "strong"]
+    assert [r.contents for r in requests] == [["task 0"], ["task 1"], ["task 2"]]
+    assert strong.config == {"cached_content": "caches/strong"}
+    assert (await cache.prepare("fast", ["other", "task"])).contents == ["other", "task"]
+    await cache.close()
+    assert backend.deleted == ["caches/fast", "caches/strong"]
+
+
+@pytest.mark.anyio
+async def test_failed_cache_creation_sends_the_full_prompt():
+    backend = _Backend(fail=True)
+    cache = PromptCache(backend, client=None, prefix="PREFIX")
+    request = await cache.prepare("fast", ["PREFIX", "task"])
+    assert request.contents == ["PREFIX", "task"] and request.config == {}
+    await cache.close()
+    assert backend.deleted == []
+
+
+@pytest.mark.anyio
+async def test_scope_skips_short_prefixes_and_counts_local_hits(monkeypatch):
+    monkeypatch.setattr(prompt_cache, "backend", LocalContextCache())
+    monkeypatch.setattr(prompt_cache.s, "prompt_cache_min_tokens", 100)
+    async with prompt_cache_scope(None, "short") as cache:
+        assert cache is None
+    prefix = "x" * 4000
+    async with prompt_cache_scope(None, prefix) as cache:
+        request = await cache.prepare("fast", [prefix, "task"])
+    assert request.contents == [prefix, "task"] and request.cached_tokens > 0
@@ -0,0 +1,84 @@
+import importlib
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.settings import s
+from app.modules.auth.services import rate_limits
+from app.modules.auth.services.rate_limits import RateLimiter
+from app.modules.generate.schemas import BatchGenerateRequest, GenerateRequest
+
+DAY = date(2026, 1, 1)
+# The package re-exports its APIRouter as `router`, shadowing the module.
+generate_router = importlib.import_module("app.modules.generate.router")
+
+USER = {"id": "user-1", "sub": "user@example.com", "token_id": "token-1"}
+
+
+@pytest.fixture
+def limiter(monkeypatch) -> RateLimiter:
+    monkeypatch.setattr(s, "rate_limit_enabled", True)
+    monkeypatch.setattr(s, "rate_limit_burst", 10)
+    monkeypatch.setattr(s, "rate_limit_per_minute", 20.0)
+    monkeypatch.setattr(s, "daily_quota_per_user", 1000)
+    monkeypatch.setattr(s, "daily_quota_per_token", 500)
+    return RateLimiter()
+
+
+def test_bucket_allows_burst_then_429(limiter):
+    limits = limiter.limits_for(USER)
+    for _ in range(10):
+        limiter.consume(limits, DAY, 1)
+    with pytest.raises(HTTPException) as exc:
+        limiter.consume(limits, DAY, 1)
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) >= 1
+
+
+def test_daily_quota_counts_pending(limiter, monkeypatch):
+    monkeypatch.setattr(s, "daily_quota_per_token", 3)
+    limits = limiter.limits_for(USER)
+    limiter.consume(limits, DAY, 3, quota_only=True)
+    with pytest.raises(HTTPException) as exc:
+        limiter.consume(limits, DAY, 1)
+    assert exc.value.status_code == 429
+    assert "quota of 3" in exc.value.detail
+
+
+def test_quota_only_leaves_bucket_untouched(limiter):
+    limits = limiter.limits_for(USER)
+    limiter.consume(limits, DAY, 100, quota_only=True)
+    for _ in range(10):
+        limiter.consume(limits, DAY, 1)
+    assert limiter._pending[("token:token-1", DAY)] == 110
+
+
+def test_limits_include_cli_token():
+    assert RateLimiter.limits_for({"id": "u"}) == [("user:u", s.daily_quota_per_user)]
+    assert [key for key, _ in RateLimiter.limits_for(USER)] == ["user:user-1", "token:token-1"]
+
+
+def _batch(size: int) -> BatchGenerateRequest:
+    return BatchGenerateRequest(items=[GenerateRequest(project_structure=f"app{i}/main.py") for i in range(size)])
+
+
+@pytest.mark.anyio
+async def test_batch_of_50_is_accepted(limiter, fake_db, monkeypatch):
+    monkeypatch.setattr(generate_router, "rate_limiter", limiter)
+    # What get_rate_limited_user charges before the endpoint runs.
+    await limiter.acquire(USER, fake_db)
+    response = await generate_router.generate_batch(_batch(50), user=USER, db=fake_db)
+    assert response.media_type == "application/x-ndjson"
+    assert limiter._pending[("user:user-1", rate_limits._today())] == 50
+
+
+@pytest.mark.anyio
+async def test_batch_over_daily_quota_is_rejected(limiter, fake_db, monkeypatch):
+    monkeypatch.setattr(generate_router, "rate_limiter", limiter)
+    monkeypatch.setattr(s, "daily_quota_per_user", 20)
+    await limiter.acquire(USER, fake_db)
+    with pytest.raises(HTTPException) as exc:
+        await generate_router.generate_batch(_batch(50), user=USER, db=fake_db)
+    assert exc.value.status_code == 429
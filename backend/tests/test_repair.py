@@ -0,0 +1,49 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.modules.generate import service
+from app.modules.generate.schemas import FileContent
+
+PLAN = {"stack": "python", "services": [{"name": "api", "path": "api"}, {"name": "web", "path": "web"}]}
+API = {"path": "api/Dockerfile", "content": 'FROM python:3.12-slim\nCMD ["python", "-m", "api"]\n'}
+WEB = {"path": "web/Dockerfile", "content": 'FROM python:3.12-slim\nCMD ["python", "-m", "web"]\n'}
+# Fails the worker check, so the repair round is about this file only.
+SINGLE_WORKER = {**WEB, "content": 'FROM python:3.12-slim\nCMD ["uvicorn", "web.main:app", "--host", "0.0.0.0"]\n'}
+
+
+def _client(calls: list, responses: list[list[dict]]) -> SimpleNamespace:
+    async def generate_content(model, contents, config):
+        calls.append(contents)
+        return SimpleNamespace(text=json.dumps({"files": responses[len(calls) - 1]}), usage_metadata=None)
+
+    return SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+
+
+def test_repair_round_sends_only_the_failing_files(monkeypatch):
+    monkeypatch.setattr(service.s, "generate_stream_files", False)
+    monkeypatch.setattr(service.s, "generate_compact_repair", True)
+    calls: list = []
+    client = _client(calls, [[API, SINGLE_WORKER], [WEB]])
+
+    files = asyncio.run(service.run_files_attempts(client, ["BASE PROMPT"], PLAN, None))
+
+    (repair,) = calls[1]
+    assert "BASE PROMPT" not in repair
+    assert '"path": "web/Dockerfile"' in repair and '"path": "api/Dockerfile"' not in repair
+    assert {f.path: f.content for f in files} == {"api/Dockerfile": API["content"], "web/Dockerfile": WEB["content"]}
+
+
+def test_errors_outside_known_files_fall_back_to_the_full_prompt(monkeypatch):
+    monkeypatch.setattr(service.s, "generate_compact_repair", True)
+    files = [FileContent(**API)]
+    prompt, is_patch = service._build_next_repair_prompt(
+        ["BASE PROMPT"], files, ["Missing Dockerfile for service 'web'"], PLAN, None, 1
+    )
+    assert not is_patch
+    assert prompt[0] == "BASE PROMPT" and '"path": "api/Dockerfile"' in prompt[-1]
+
+
+def test_merge_patched_files_replaces_by_path():
+    merged = service._merge_patched_files([FileContent(**API), FileContent(**SINGLE_WORKER)], [FileContent(**WEB)])
+    assert {f.path: f.content for f in merged} == {"api/Dockerfile": API["content"], "web/Dockerfile": WEB["content"]}
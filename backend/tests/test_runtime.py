@@ -0,0 +1,72 @@
+from app.modules.generate.runtime import (
+    compose_managed_dockerfiles,
+    framework_workers,
+    single_process_reason,
+    validate_compose_runtime,
+    validate_dockerfile_workers,
+)
+from app.modules.generate.schemas import FileContent
+from app.modules.generate.service import _run_validators
+
+SINGLE_PROCESS_DOCKERFILE = 'FROM python:3.12-slim\nCMD ["uvicorn", "app.main:app", "--host", "0.0.0.0"]\n'
+
+COMPOSE = """services:
+  api:
+    build:
+      context: ./api
+    command: gunicorn app.main:app -k uvicorn.workers.UvicornWorker -w 4
+  worker:
+    build: ./worker
+    environment:
+      WEB_CONCURRENCY: "4"
+  web:
+    build: ./web
+"""
+
+
+def test_framework_workers():
+    assert framework_workers("FastAPI", 1) == 2
+    assert framework_workers("django", 2) == 5
+    assert framework_workers("express", 2) is None
+
+
+def test_single_process_reason():
+    assert single_process_reason("uvicorn app.main:app") is not None
+    assert single_process_reason("uvicorn app.main:app --workers 4") is None
+    assert single_process_reason("gunicorn app:app", concurrency_env=True) is None
+    assert "development server" in single_process_reason("python manage.py runserver")
+
+
+def test_dockerfile_worker_check_uses_the_final_stage():
+    dockerfile = (
+        'FROM python:3.12 AS build\nCMD ["uvicorn", "app:app"]\n'
+        'FROM python:3.12-slim\nCMD ["gunicorn", "-w", "4", "app:app"]\n'
+    )
+    assert validate_dockerfile_workers("Dockerfile", dockerfile) == []
+    assert validate_dockerfile_workers("Dockerfile", SINGLE_PROCESS_DOCKERFILE)
+
+
+def test_compose_managed_dockerfiles():
+    assert compose_managed_dockerfiles("docker-compose.yml", COMPOSE) == {"api/Dockerfile", "worker/Dockerfile"}
+
+
+def test_dockerfile_shared_with_an_unmanaged_service_is_still_checked():
+    compose = "services:\n  api:\n    build: .\n    command: uvicorn app:app --workers 2\n  admin:\n    build: .\n"
+    assert compose_managed_dockerfiles("docker-compose.yml", compose) == set()
+
+
+def test_compose_depends_on_needs_readiness_gate():
+    compose = "services:\n  api:\n    image: api\n    depends_on:\n      - db\n  db:\n    image: postgres\n"
+    errors = validate_compose_runtime("docker-compose.yml", compose)
+    assert len(errors) == 1 and "readiness gate" in errors[0]
+
+
+def test_validators_skip_dockerfiles_started_by_compose():
+    files = [
+        FileContent(path="docker-compose.yml", content=COMPOSE),
+        FileContent(path="api/Dockerfile", content=SINGLE_PROCESS_DOCKERFILE),
+        FileContent(path="worker/Dockerfile", content=SINGLE_PROCESS_DOCKERFILE),
+        FileContent(path="web/Dockerfile", content=SINGLE_PROCESS_DOCKERFILE),
+    ]
+    errors = _run_validators(files, None, None).errors
+    assert errors == ["web/Dockerfile: start command runs uvicorn as a single process (set --workers from the plan)"]
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.core.database import get_db
+from app.core.security import RevocationList, VerifiedTokenCache, create_access_token, token_digest, verify_access_token
+from app.main import main
+from app.modules.auth.services import revocations as revocations_service
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def cache(monkeypatch) -> VerifiedTokenCache:
+    fresh = VerifiedTokenCache(max_entries=16)
+    monkeypatch.setattr(security, "verified_tokens", fresh)
+    revocations = RevocationList()
+    monkeypatch.setattr(security, "revocations", revocations)
+    monkeypatch.setattr(revocations_service, "revocations", revocations)
+    return fresh
+
+
+def _token() -> str:
+    return create_access_token({"sub": "dev@example.com", "id": USER_ID})
+
+
+def test_cache_entries_expire_at_the_token_exp(monkeypatch):
+    clock = [99.0]
+    monkeypatch.setattr(security, "time", SimpleNamespace(time=lambda: clock[0]))
+    cache = VerifiedTokenCache(max_entries=16)
+    cache.put("digest", {"sub": "dev@example.com", "exp": 100})
+    cache.put("no-exp", {"sub": "dev@example.com"})
+    assert cache.get("digest") is not None
+    clock[0] = 100.0
+    assert cache.get("digest") is None
+    assert cache.get("no-exp") is None and len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = VerifiedTokenCache(max_entries=2)
+    for digest in ("a", "b"):
+        cache.put(digest, {"exp": 2**40})
+    cache.get("a")
+    cache.put("c", {"exp": 2**40})
+    assert cache.get("b") is None and cache.get("a") is not None
+
+
+def test_cached_token_is_rejected_once_revoked(cache):
+    token = _token()
+    assert verify_access_token(token)["id"] == USER_ID
+    assert len(cache) == 1
+    security.revocations.revoke_token(token_digest(token))
+    with pytest.raises(HTTPException) as exc:
+        verify_access_token(token)
+    assert exc.value.status_code == 401
+    # A reload that has not seen the database write yet keeps the local revocation.
+    security.revocations.replace(set(), set())
+    with pytest.raises(HTTPException):
+        verify_access_token(token)
+
+
+def test_inactive_users_are_rejected_after_a_reload(cache):
+    token = _token()
+    verify_access_token(token)
+    security.revocations.replace(set(), {USER_ID})
+    with pytest.raises(HTTPException):
+        verify_access_token(token)
+
+
+def test_logout_writes_the_token_digest_to_revoked_tokens(cache, fake_db):
+    app = main()
+    app.dependency_overrides[get_db] = lambda: fake_db
+    token = _token()
+    response = TestClient(app).post("/auth/logout", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    (statement,) = fake_db.executed
+    assert statement.table.name == "revoked_tokens"
+    assert statement.compile().params["token_digest"] == token_digest(token)
+    assert fake_db.commits == 1
+    assert token_digest(token) in security.revocations.digests
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from app.modules.generate import service, similarity
+from app.modules.generate.runtime import apply_runtime_defaults
+from app.modules.generate.schemas import FileContent, ProjectContext
+from app.modules.generate.similarity import SimilarityIndex, estimate_similarity, minhash, project_shingles
+
+PYPROJECT = '[project]\nname = "api"\nrequires-python = ">=3.12"\ndependencies = ["fastapi>=0.110", "uvicorn>=0.30"]\n'
+PLAN = {"stack": "python", "services": [{"name": "api", "path": ".", "framework": "fastapi"}]}
+FILES = [
+    FileContent(
+        path="Dockerfile",
+        content='FROM python:3.12-slim\nCMD ["uvicorn", "app.main:create_app", "--factory", "--workers", "2"]\n',
+    )
+]
+
+
+def _context(**overrides) -> ProjectContext:
+    fields = {
+        "paths": ["pyproject.toml", "app/main.py", "app/api/routes.py"] + [f"app/m{i}.py" for i in range(20)],
+        "manifests": {"pyproject.toml": PYPROJECT},
+        "snippets": {"app/settings.py": "database_url: str = 'postgresql://db/app'\n"},
+        "entrypoints": ["app/main.py"],
+        "commands": ["uvicorn app.main:app"],
+    }
+    return ProjectContext(**{**fields, **overrides})
+
+
+def _signature(context: ProjectContext) -> tuple[int, ...]:
+    return minhash(project_shingles(context))
+
+
+def test_identical_contexts_match_exactly():
+    assert estimate_similarity(_signature(_context()), _signature(_context())) == 1.0
+
+
+def test_unrelated_stacks_do_not_match():
+    node = ProjectContext(
+        paths=["src/index.js", "package.json"], manifests={"package.json": '{"dependencies":{"express":"4"}}'}
+    )
+    assert estimate_similarity(_signature(_context()), _signature(node)) < 0.3
+
+
+def test_versions_and_snippets_change_the_signature():
+    shingles = project_shingles(_context())
+    bumped = project_shingles(_context(manifests={"pyproject.toml": PYPROJECT.replace(">=3.12", ">=3.13")}))
+    assert shingles != bumped
+    other_snippet = project_shingles(_context(snippets={"app/settings.py": "database_url: str = 'sqlite://'\n"}))
+    assert shingles != other_snippet
+
+
+def test_lookups_are_scoped_to_the_owner():
+    index = SimilarityIndex(max_entries=8)
+    signature = _signature(_context())
+    index.add("alice", signature, PLAN, FILES)
+    assert index.nearest("bob", signature) is None
+    match = index.nearest("alice", signature)
+    assert match is not None and match.score == 1.0
+
+
+def test_returned_plans_are_copies():
+    index = SimilarityIndex(max_entries=8)
+    signature = _signature(_context())
+    plan = {"stack": "python", "services": [{"name": "api", "path": ".", "framework": "fastapi"}]}
+    index.add("alice", signature, plan, FILES)
+    plan["services"].clear()
+    match = index.nearest("alice", signature)
+    apply_runtime_defaults(match.plan)
+    assert match.plan["services"][0]["workers"] >= 2
+    assert "workers" not in index.nearest("alice", signature).plan["services"][0]
+
+
+def test_eviction_is_bounded_across_owners():
+    index = SimilarityIndex(max_entries=2)
+    signatures = [_signature(_context(commands=[f"uvicorn app.main:app --port {8000 + i}"])) for i in range(3)]
+    for owner, signature in zip(("a", "b", "c"), signatures):
+        index.add(owner, signature, PLAN, FILES)
+    assert len(index) == 2
+    assert index.nearest("a", signatures[0]) is None
+
+
+def test_generation_reuses_only_the_owners_results(monkeypatch):
+    index = SimilarityIndex(max_entries=8)
+    monkeypatch.setattr(similarity, "index", index)
+    monkeypatch.setattr(service, "similarity_index", index)
+    monkeypatch.setattr(service.s, "similarity_cache_enabled", True)
+    context = _context()
+    prepared = service.prepare_generation("app/main.py", "tree", context)
+    index.add("alice", prepared.signature, PLAN, FILES)
+
+    calls = []
+
+    def _no_model():
+        calls.append(True)
+        raise RuntimeError("model called")
+
+    monkeypatch.setattr(service, "get_client", _no_model)
+    result = asyncio.run(service.run_generation(prepared, "alice"))
+    assert result.files[0].path == "Dockerfile" and not calls
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.run_generation(prepared, "bob"))
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.run_generation(prepared))
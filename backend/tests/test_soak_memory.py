@@ -0,0 +1,58 @@
+import asyncio
+import gc
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+
+from app.modules.generate import service
+from benchmarks.soak_memory import _FakeModels, build_context
+
+VARIANTS = 4
+WARMUP = 16
+REQUESTS = 48
+CONCURRENCY = 8
+# A bounded cut of benchmarks/soak_memory.py: enough rounds that a per-request leak of a context-sized
+# object (hundreds of KiB) would blow well past the ceiling.
+MAX_GROWTH_BYTES = 1024 * 1024
+
+
+async def _run(contexts, count: int) -> None:
+    for start in range(0, count, CONCURRENCY):
+        batch = [contexts[(start + i) % VARIANTS] for i in range(min(CONCURRENCY, count - start))]
+        await asyncio.gather(
+            *(
+                service.generate_docker_files(
+                    project_structure="\n".join(context.paths), format="tree", project_context=context
+                )
+                for context in batch
+            )
+        )
+
+
+def _traced() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+@pytest.mark.slow
+def test_generation_heap_stays_flat(monkeypatch):
+    monkeypatch.setattr(service.s, "similarity_cache_enabled", False)
+    monkeypatch.setattr(service.s, "generate_fast_mode_enabled", False)
+    monkeypatch.setattr(service.s, "generate_stream_files", True)
+    client = SimpleNamespace(aio=SimpleNamespace(models=_FakeModels()))
+    monkeypatch.setattr(service, "get_client", lambda: client)
+    contexts = [build_context(variant) for variant in range(VARIANTS)]
+
+    async def soak() -> int:
+        await _run(contexts, WARMUP)
+        baseline = _traced()
+        await _run(contexts, REQUESTS)
+        return _traced() - baseline
+
+    tracemalloc.start()
+    try:
+        growth = asyncio.run(soak())
+    finally:
+        tracemalloc.stop()
+    assert growth < MAX_GROWTH_BYTES
@@ -0,0 +1,62 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.startup import StartupTimings
+from app.main import main
+from app.modules.generate import service
+
+HEAVY_MODULES = ("google.genai", "passlib", "argon2", "jose", "uvicorn")
+
+
+def test_app_import_leaves_heavy_modules_unloaded():
+    # A fresh interpreter: the test session itself has imported most of these already.
+    script = f"import sys, app.main; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    backend = Path(__file__).resolve().parents[1]
+    result = subprocess.run([sys.executable, "-c", script], cwd=backend, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_failed_warm_up_steps_are_recorded_not_raised():
+    timings = StartupTimings()
+
+    async def broken() -> None:
+        raise RuntimeError("no database")
+
+    async def warm_up() -> None:
+        await asyncio.gather(timings.measure("db_pool", broken()), timings.measure("jwt", asyncio.sleep(0)))
+
+    asyncio.run(warm_up())
+    assert set(timings.phases) == {"db_pool", "jwt"}
+    assert timings.errors == {"db_pool": "RuntimeError: no database"}
+
+
+def test_gemini_client_is_shared_and_warmed_up(monkeypatch):
+    monkeypatch.setattr(service.s, "gemini_api_key", "test-key")
+    service._client_for_key.cache_clear()
+    try:
+        service.warm_up_client()
+        assert service._client_for_key.cache_info().currsize == 1
+        assert service.get_client() is service.get_client()
+    finally:
+        service._client_for_key.cache_clear()
+
+
+def test_warm_up_without_an_api_key_reports_503(monkeypatch):
+    monkeypatch.setattr(service.s, "gemini_api_key", "")
+    with pytest.raises(HTTPException) as exc:
+        service.warm_up_client()
+    assert exc.value.status_code == 503
+
+
+def test_health_reports_readiness_after_the_lifespan(monkeypatch):
+    monkeypatch.setattr(service.s, "warmup_enabled", False)
+    with TestClient(main()) as client:
+        startup = client.get("/health").json()["startup"]
+    assert startup["ready"] is True
+    assert {"imports", "create_app"} <= set(startup["phases_ms"])
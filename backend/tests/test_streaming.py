@@ -0,0 +1,122 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.modules.generate import service
+from app.modules.generate.schemas import ProjectContext
+from app.modules.generate.streaming import StreamingJsonObject
+
+FILES = [
+    {"path": "Dockerfile", "content": 'FROM python:3.12-slim\nCMD ["uvicorn", "app:app"]\n'},
+    {"path": "docker-compose.yml", "content": "services:\n  app: {build: .}\n"},
+]
+
+
+def _feed(text: str, size: int) -> tuple[StreamingJsonObject, list]:
+    parser = StreamingJsonObject("files")
+    items = []
+    for start in range(0, len(text), size):
+        items += parser.feed(text[start : start + size])
+    return parser, items
+
+
+@pytest.mark.parametrize("size", [1, 3, 17, 10_000])
+def test_items_and_members_at_any_chunk_size(size):
+    document = {"plan": {"services": [{"name": "api"}]}, "files": FILES, "count": 2, "note": "a \"quoted\" }"}
+    parser, items = _feed(json.dumps(document, indent=2), size)
+    parser.close()
+    assert items == FILES
+    assert parser.members == {"plan": document["plan"], "count": 2, "note": document["note"]}
+    assert parser.stream_seen
+
+
+def test_items_are_returned_as_soon_as_they_close():
+    parser = StreamingJsonObject("files")
+    text = json.dumps({"files": FILES})
+    first_end = text.index("}") + 1
+    assert parser.feed(text[:first_end]) == [FILES[0]]
+    assert parser.feed(text[first_end:]) == [FILES[1]]
+
+
+def test_leading_text_is_skipped():
+    parser, items = _feed("```json\n" + json.dumps({"files": FILES}) + "\n```", 5)
+    parser.close()
+    assert items == FILES
+
+
+def test_only_the_token_in_progress_is_kept():
+    parser = StreamingJsonObject("files")
+    text = json.dumps({"files": [{"path": "Dockerfile", "content": "x" * 10_000}]})
+    for start in range(0, len(text) - 2, 7):
+        parser.feed(text[start : start + 7])
+        assert sum(map(len, parser._parts)) <= 10_100
+    assert not parser._parts or parser._mark == 0
+
+
+def test_close_rejects_incomplete_output():
+    parser = StreamingJsonObject("files")
+    parser.feed('{"files": [{"path": "Dockerfile"}')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_missing_stream_key_is_reported():
+    parser, items = _feed(json.dumps({"plan": {}}), 4)
+    parser.close()
+    assert items == [] and not parser.stream_seen
+
+
+class _Stream:
+    """Model stream stand-in that counts the chunks read."""
+
+    def __init__(self, chunks: list[str]) -> None:
+        self.chunks = chunks
+        self.read = 0
+        self.closed = False
+
+    def __aiter__(self) -> "_Stream":
+        return self
+
+    async def __anext__(self) -> SimpleNamespace:
+        if self.read == len(self.chunks):
+            raise StopAsyncIteration
+        self.read += 1
+        return SimpleNamespace(text=self.chunks[self.read - 1], usage_metadata=None)
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def _client(stream: _Stream) -> SimpleNamespace:
+    async def generate_content_stream(model, contents, config):
+        return stream
+
+    return SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content_stream=generate_content_stream)))
+
+
+def _chunks(files: list[dict]) -> list[str]:
+    """One chunk per file, then the closing brackets."""
+    items = [json.dumps(file) for file in files]
+    return ['{"files": [' + items[0], *(", " + item for item in items[1:]), "]}"]
+
+
+@pytest.mark.anyio
+async def test_stream_is_abandoned_on_an_error_no_later_file_can_fix():
+    files = [{"path": "api/Dockerfile", "content": "FROM python:3.11-slim\n"}, *FILES]
+    stream = _Stream(_chunks(files))
+    context = ProjectContext(manifests={"pyproject.toml": '[project]\nrequires-python = ">=3.12"\n'})
+    streamed = await service._stream_gemini_files(_client(stream), ["prompt"], context)
+    assert streamed.fatal_errors == ["api/Dockerfile: python base image 3.11 is lower than requires-python >= 3.12"]
+    assert [f.path for f in streamed.files] == ["api/Dockerfile"]
+    assert stream.read == 1 and stream.closed
+
+
+@pytest.mark.anyio
+async def test_compose_dependent_errors_do_not_abandon_the_stream():
+    # A single-process uvicorn CMD may still be settled by a compose command later in the response.
+    stream = _Stream(_chunks(FILES))
+    streamed = await service._stream_gemini_files(_client(stream), ["prompt"], None)
+    assert streamed.fatal_errors == []
+    assert [f.path for f in streamed.files] == ["Dockerfile", "docker-compose.yml"]
+    assert stream.read == len(stream.chunks)
@@ -0,0 +1,67 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.core.settings import Settings
+from app.modules.generate import service
+from app.modules.generate.metrics import tier_report, track_generation
+
+PLAN = {"stack": "python", "services": [{"name": "app", "path": "."}]}
+VALID = {"path": "Dockerfile", "content": 'FROM python:3.12-slim\nCMD ["python", "-m", "app"]\n'}
+INVALID = {"path": "/etc/Dockerfile", "content": "FROM python:3.12-slim\n"}
+
+
+def _client(models: list[str], responses: list[list[dict]]) -> SimpleNamespace:
+    async def generate_content(model, contents, config):
+        models.append(model)
+        return SimpleNamespace(text=json.dumps({"files": responses[len(models) - 1]}), usage_metadata=None)
+
+    return SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+
+
+@pytest.fixture(autouse=True)
+def tiers(monkeypatch) -> None:
+    monkeypatch.setattr(service.s, "generate_stream_files", False)
+    monkeypatch.setattr(service.s, "gemini_fast_model", "fast-model")
+    monkeypatch.setattr(service.s, "gemini_strong_model", "strong-model")
+    monkeypatch.setattr(service.s, "gemini_files_tier", "fast")
+    monkeypatch.setattr(service.s, "gemini_repair_tier", "strong")
+
+
+async def _generate(client: SimpleNamespace) -> tuple:
+    with track_generation() as stats:
+        files = await service.run_files_attempts(client, ["prompt"], PLAN, None)
+    return files, stats
+
+
+def test_valid_first_attempt_stays_on_the_fast_tier():
+    models: list[str] = []
+    files, stats = asyncio.run(_generate(_client(models, [[VALID]])))
+    assert models == ["fast-model"]
+    assert [f.path for f in files] == ["Dockerfile"] and stats.attempts == 1
+
+
+def test_validation_failure_escalates_to_the_strong_tier():
+    models: list[str] = []
+    files, stats = asyncio.run(_generate(_client(models, [[INVALID], [VALID]])))
+    assert models == ["fast-model", "strong-model"]
+    assert [f.path for f in files] == ["Dockerfile"] and stats.attempts == 2
+    report = tier_report()
+    assert report["fast.files"]["calls"] >= 1 and report["strong.repair"]["calls"] >= 1
+
+
+def test_unknown_tier_fails_without_retrying(monkeypatch):
+    monkeypatch.setattr(service.s, "gemini_files_tier", "medium")
+    models: list[str] = []
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(_generate(_client(models, [[VALID]])))
+    assert exc.value.status_code == 503 and models == []
+
+
+def test_settings_reject_unknown_tiers():
+    with pytest.raises(ValidationError):
+        Settings(gemini_repair_tier="medium")
@@ -0,0 +1,66 @@
+import logging
+import threading
+
+from app.core.tracing import Tracer
+
+
+class _RecordingExporter:
+    def __init__(self) -> None:
+        self.traces: list[dict] = []
+        self.threads: set[str] = set()
+
+    def export(self, trace: dict) -> None:
+        self.threads.add(threading.current_thread().name)
+        self.traces.append(trace)
+
+
+class _FailingExporter:
+    def export(self, trace: dict) -> None:
+        raise OSError("disk full")
+
+
+def test_traces_are_exported_off_the_calling_thread():
+    exporter = _RecordingExporter()
+    tracer = Tracer(exporter)
+    with tracer.span("http.request", path="/generate"):
+        with tracer.span("auth"):
+            pass
+    tracer.shutdown()
+    assert [span["name"] for span in exporter.traces[0]["spans"]] == ["http.request", "auth"]
+    assert exporter.threads == {"trace-exporter"}
+    assert tracer.exported == 1
+
+
+def test_export_failures_are_logged_and_counted(caplog):
+    tracer = Tracer(_FailingExporter())
+    with caplog.at_level(logging.WARNING, logger="app.core.tracing"):
+        for _ in range(2):
+            with tracer.span("http.request"):
+                pass
+        tracer.shutdown()
+    assert tracer.export_errors == 2
+    assert "Trace export failed" in caplog.text
+
+
+def test_full_queue_drops_traces():
+    gate = threading.Event()
+
+    class _BlockedExporter:
+        def export(self, trace: dict) -> None:
+            gate.wait()
+
+    tracer = Tracer(_BlockedExporter(), max_pending=1)
+    for _ in range(5):
+        with tracer.span("http.request"):
+            pass
+    gate.set()
+    tracer.shutdown()
+    assert tracer.dropped >= 3
+    assert tracer.exported + tracer.dropped == 5
+
+
+def test_disabled_tracer_returns_noop_spans():
+    tracer = Tracer(None)
+    with tracer.span("anything") as span:
+        span.set_attribute("key", "value")
+    tracer.shutdown()
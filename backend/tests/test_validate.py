@@ -0,0 +1,50 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.core.settings import s
+from app.main import main
+from app.modules.generate import service
+
+VALID = {"path": "Dockerfile", "content": 'FROM python:3.12-slim\nCMD ["python", "-m", "app"]\n'}
+MISSING_COPY = {"path": "Dockerfile", "content": "FROM python:3.12-slim\nCOPY missing.txt ./\n"}
+
+
+@pytest.fixture
+def client(monkeypatch) -> TestClient:
+    def no_model():
+        raise AssertionError("/validate must not reach the model")
+
+    monkeypatch.setattr(service, "get_client", no_model)
+    return TestClient(main())
+
+
+def _headers() -> dict[str, str]:
+    token = create_access_token({"sub": "dev@example.com", "id": str(uuid.uuid4())})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_batch_reports_each_item(client):
+    items = [
+        {"files": [VALID]},
+        {"files": [MISSING_COPY], "project_context": {"paths": ["app/main.py"]}},
+    ]
+    response = client.post("/validate", json={"items": items}, headers=_headers())
+    assert response.status_code == 200
+    body = response.json()
+    assert body["valid"] is False
+    assert [(r["index"], r["valid"]) for r in body["results"]] == [(0, True), (1, False)]
+    assert body["results"][1]["errors"] == ["Dockerfile: COPY/ADD source 'missing.txt' not found in project context"]
+
+
+def test_requires_a_bearer_token(client):
+    assert client.post("/validate", json={"items": [{"files": [VALID]}]}).status_code == 401
+
+
+def test_item_count_is_limited(client, monkeypatch):
+    monkeypatch.setattr(s, "validate_max_items", 2)
+    items = [{"files": [VALID]}] * 3
+    assert client.post("/validate", json={"items": items}, headers=_headers()).status_code == 413
+    assert client.post("/validate", json={"items": []}, headers=_headers()).status_code == 422
@@ -1,12 +1,14 @@
 package cmd
 
 import (
+	"errors"
 	"fmt"
 	"os"
 	"path/filepath"
 
 	"github.com/spf13/cobra"
 	"github.com/whaletamer/cli/internal/api"
+	"github.com/whaletamer/cli/internal/config"
 	"github.com/whaletamer/cli/internal/files"
 	"github.com/whaletamer/cli/internal/project"
 )
@@ -15,6 +17,7 @@ var (
 	outputFormat  string // "tree" | "markdown"
 	saveStructure string // путь к файлу для сохранения структуры (пусто = не сохранять)
 	projectRoot   string
+	fullContext   bool // отправлять контекст целиком, без дельты
 )
 
 var generateCmd = &cobra.Command{
@@ -29,6 +32,7 @@ func init() {
 	generateCmd.Flags().StringVarP(&outputFormat, "format", "f", "tree", "Формат структуры: tree | markdown")
 	generateCmd.Flags().StringVarP(&saveStructure, "save-structure", "s", "", "Сохранить структуру в файл (например project-structure.md или structure.txt)")
 	generateCmd.Flags().StringVarP(&projectRoot, "project-root", "p", ".", "Корень проекта")
+	generateCmd.Flags().BoolVar(&fullContext, "full-context", false, "Отправить контекст целиком (без дельты относительно прошлой загрузки)")
 }
 
 func runGenerate(cmd *cobra.Command, args []string) error {
@@ -72,7 +76,7 @@ func runGenerate(cmd *cobra.Command, args []string) error {
 		Commands:    ctx.Commands,
 	}
 
-	resp, err := api.Generate(apiBase, token, structure, outputFormat, reqContext)
+	resp, err := generateWithDelta(root, structure, reqContext)
 	if err != nil {
 		return err
 	}
@@ -92,3 +96,29 @@ func runGenerate(cmd *cobra.Command, args []string) error {
 	}
 	return nil
 }
+
+// generateWithDelta отправляет контекст дельтой относительно прошлой успешной загрузки.
+// Если сервер не знает части хэшей, повторяет запрос с полным контекстом.
+func generateWithDelta(root, structure string, reqContext *api.ProjectContext) (*api.GenerateResponse, error) {
+	var resp *api.GenerateResponse
+	var err error
+	if fullContext {
+		resp, err = api.Generate(apiBase, token, structure, outputFormat, reqContext)
+	} else {
+		state, _ := config.ReadUploadState(root)
+		if state != nil && state.APIBase != apiBase {
+			state = nil
+		}
+		resp, err = api.GenerateDelta(apiBase, token, structure, outputFormat, api.BuildContextDelta(reqContext, state))
+		if errors.Is(err, api.ErrUnknownContextHashes) {
+			resp, err = api.Generate(apiBase, token, structure, outputFormat, reqContext)
+		}
+	}
+	if err != nil {
+		return nil, err
+	}
+	if err := config.WriteUploadState(root, api.NewUploadState(apiBase, reqContext)); err != nil {
+		fmt.Fprintf(os.Stderr, "Не удалось сохранить состояние загрузки контекста: %v\n", err)
+	}
+	return resp, nil
+}
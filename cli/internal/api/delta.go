@@ -0,0 +1,124 @@
+package api
+
+import (
+	"crypto/sha256"
+	"encoding/hex"
+	"errors"
+	"sort"
+	"strings"
+
+	"github.com/whaletamer/cli/internal/config"
+)
+
+// ErrUnknownContextHashes — сервер не знает часть хэшей (перезапуск, вытеснение из кэша, другая реплика).
+// В этом случае контекст нужно отправить целиком.
+var ErrUnknownContextHashes = errors.New("сервер не знает часть хэшей контекста")
+
+// ContextDelta — контекст проекта в виде sha256-ссылок на уже загруженное содержимое и изменений.
+type ContextDelta struct {
+	Paths        []string          `json:"paths,omitempty"`
+	PathsBase    string            `json:"paths_base,omitempty"`
+	PathsAdded   []string          `json:"paths_added,omitempty"`
+	PathsRemoved []string          `json:"paths_removed,omitempty"`
+	Manifests    map[string]string `json:"manifests,omitempty"` // путь -> sha256
+	Snippets     map[string]string `json:"snippets,omitempty"`  // путь -> sha256
+	Blobs        map[string]string `json:"blobs,omitempty"`     // sha256 -> содержимое, которого у сервера может не быть
+	Entrypoints  []string          `json:"entrypoints,omitempty"`
+	Commands     []string          `json:"commands,omitempty"`
+}
+
+// HashContent — sha256 в hex, как на сервере.
+func HashContent(content string) string {
+	sum := sha256.Sum256([]byte(content))
+	return hex.EncodeToString(sum[:])
+}
+
+// HashPaths хэширует набор путей в том же виде, в каком его хранит сервер: отсортированные, через \n.
+func HashPaths(paths []string) string {
+	sorted := append([]string(nil), paths...)
+	sort.Strings(sorted)
+	return HashContent(strings.Join(sorted, "\n"))
+}
+
+// BuildContextDelta строит дельту относительно прошлой успешной загрузки (state может быть nil).
+func BuildContextDelta(ctx *ProjectContext, state *config.UploadState) *ContextDelta {
+	known := map[string]bool{}
+	if state != nil {
+		for _, h := range state.Blobs {
+			known[h] = true
+		}
+	}
+	delta := &ContextDelta{
+		Manifests:   map[string]string{},
+		Snippets:    map[string]string{},
+		Blobs:       map[string]string{},
+		Entrypoints: ctx.Entrypoints,
+		Commands:    ctx.Commands,
+	}
+	for path, content := range ctx.Manifests {
+		delta.Manifests[path] = addBlob(delta.Blobs, known, content)
+	}
+	for path, content := range ctx.Snippets {
+		delta.Snippets[path] = addBlob(delta.Blobs, known, content)
+	}
+
+	if state == nil || state.PathsHash == "" {
+		delta.Paths = ctx.Paths
+		return delta
+	}
+	added, removed := diffPaths(state.Paths, ctx.Paths)
+	if len(added)+len(removed) > len(ctx.Paths)/2 {
+		// Дельта почти не меньше полного списка.
+		delta.Paths = ctx.Paths
+		return delta
+	}
+	delta.PathsBase = state.PathsHash
+	delta.PathsAdded = added
+	delta.PathsRemoved = removed
+	return delta
+}
+
+// NewUploadState запоминает отправленный контекст для следующей дельты.
+func NewUploadState(apiBase string, ctx *ProjectContext) *config.UploadState {
+	state := &config.UploadState{
+		APIBase:   apiBase,
+		PathsHash: HashPaths(ctx.Paths),
+		Paths:     ctx.Paths,
+	}
+	for _, content := range ctx.Manifests {
+		state.Blobs = append(state.Blobs, HashContent(content))
+	}
+	for _, content := range ctx.Snippets {
+		state.Blobs = append(state.Blobs, HashContent(content))
+	}
+	sort.Strings(state.Blobs)
+	return state
+}
+
+func addBlob(blobs map[string]string, known map[string]bool, content string) string {
+	h := HashContent(content)
+	if !known[h] {
+		blobs[h] = content
+	}
+	return h
+}
+
+func diffPaths(prev, cur []string) (added, removed []string) {
+	prevSet := make(map[string]bool, len(prev))
+	for _, p := range prev {
+		prevSet[p] = true
+	}
+	curSet := make(map[string]bool, len(cur))
+	for _, p := range cur {
+		curSet[p] = true
+		if !prevSet[p] {
+			added = append(added, p)
+		}
+	}
+	for _, p := range prev {
+		if !curSet[p] {
+			removed = append(removed, p)
+		}
+	}
+	return added, removed
+}
@@ -13,6 +13,8 @@ type GenerateRequest struct {
 	ProjectStructure string          `json:"project_structure"`
 	Format           string          `json:"format,omitempty"` // "tree" | "markdown"
 	ProjectContext   *ProjectContext `json:"project_context,omitempty"`
+	// ProjectContextDelta — альтернатива ProjectContext: хэши и изменения относительно прошлой загрузки.
+	ProjectContextDelta *ContextDelta `json:"project_context_delta,omitempty"`
 }
 
 // ProjectContext — дополнительный контекст проекта для более точной генерации.
@@ -37,13 +39,26 @@ type GenerateResponse struct {
 
 // Generate вызывает POST /generate и возвращает список файлов с содержимым.
 func Generate(apiBase, token, projectStructure, format string, context *ProjectContext) (*GenerateResponse, error) {
-	if format == "" {
-		format = "tree"
-	}
-	body := GenerateRequest{
+	return postGenerate(apiBase, token, GenerateRequest{
 		ProjectStructure: projectStructure,
 		Format:           format,
 		ProjectContext:   context,
+	})
+}
+
+// GenerateDelta вызывает POST /generate, передавая контекст дельтой.
+// Если сервер не знает части хэшей, возвращает ErrUnknownContextHashes.
+func GenerateDelta(apiBase, token, projectStructure, format string, delta *ContextDelta) (*GenerateResponse, error) {
+	return postGenerate(apiBase, token, GenerateRequest{
+		ProjectStructure:    projectStructure,
+		Format:              format,
+		ProjectContextDelta: delta,
+	})
+}
+
+func postGenerate(apiBase, token string, body GenerateRequest) (*GenerateResponse, error) {
+	if body.Format == "" {
+		body.Format = "tree"
 	}
 	raw, err := json.Marshal(body)
 	if err != nil {
@@ -69,6 +84,9 @@ func Generate(apiBase, token, projectStructure, format string, context *ProjectC
 	if err != nil {
 		return nil, err
 	}
+	if resp.StatusCode == http.StatusConflict && body.ProjectContextDelta != nil {
+		return nil, ErrUnknownContextHashes
+	}
 	if resp.StatusCode != http.StatusOK {
 		return nil, fmt.Errorf("API вернул %s: %s", resp.Status, string(respBody))
 	}
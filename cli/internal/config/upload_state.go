@@ -0,0 +1,71 @@
+package config
+
+import (
+	"crypto/sha256"
+	"encoding/hex"
+	"encoding/json"
+	"os"
+	"path/filepath"
+)
+
+const uploadStateDirName = "context"
+
+// UploadState — что из контекста проекта уже отправлено на сервер.
+// Используется, чтобы при следующем запуске передавать только хэши и изменения.
+type UploadState struct {
+	APIBase   string   `json:"api_base"`
+	PathsHash string   `json:"paths_hash"`
+	Paths     []string `json:"paths"`
+	Blobs     []string `json:"blobs"` // sha256 отправленных манифестов и сниппетов
+}
+
+// UploadStatePath returns the per-project state file inside the user cache directory.
+func UploadStatePath(projectRoot string) (string, error) {
+	dir, err := os.UserCacheDir()
+	if err != nil {
+		dir, err = os.UserHomeDir()
+		if err != nil {
+			return "", err
+		}
+		dir = filepath.Join(dir, ".cache")
+	}
+	sum := sha256.Sum256([]byte(projectRoot))
+	name := hex.EncodeToString(sum[:8]) + ".json"
+	return filepath.Join(dir, configDirName, uploadStateDirName, name), nil
+}
+
+// ReadUploadState returns nil without error if there is no saved state for the project.
+func ReadUploadState(projectRoot string) (*UploadState, error) {
+	p, err := UploadStatePath(projectRoot)
+	if err != nil {
+		return nil, err
+	}
+	data, err := os.ReadFile(p)
+	if err != nil {
+		if os.IsNotExist(err) {
+			return nil, nil
+		}
+		return nil, err
+	}
+	var state UploadState
+	if err := json.Unmarshal(data, &state); err != nil {
+		return nil, nil
+	}
+	return &state, nil
+}
+
+// WriteUploadState saves the state, creating the cache directory if needed.
+func WriteUploadState(projectRoot string, state *UploadState) error {
+	p, err := UploadStatePath(projectRoot)
+	if err != nil {
+		return err
+	}
+	if err := os.MkdirAll(filepath.Dir(p), 0700); err != nil {
+		return err
+	}
+	data, err := json.Marshal(state)
+	if err != nil {
+		return err
+	}
+	return os.WriteFile(p, data, 0600)
+}
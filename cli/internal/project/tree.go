@@ -56,7 +56,12 @@ func walkTree(b *strings.Builder, dir, prefix string, isLast bool, ignore map[st
 			connector = "└── "
 			nextPrefix = "    "
 		}
-		b.WriteString(prefix + connector + e.Name() + "\n")
+		name := e.Name()
+		if e.IsDir() {
+			// Как tree -F: иначе пустой каталог не отличить от файла.
+			name += "/"
+		}
+		b.WriteString(prefix + connector + name + "\n")
 		if e.IsDir() {
 			subDir := filepath.Join(dir, e.Name())
 			if err := walkTree(b, subDir, prefix+nextPrefix, last, ignore); err != nil {